@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+CELLAR Corpus Inventory
+
+Finds the cellar_tree_notice.xml files of an organized corpus
+(root/TYPE/NAME/cellar_tree_notice.xml, or its .xml.gz / .xml.zst compressed
+form) and their *_metadata.json outputs
+with os.scandir, one directory level at a time with every directory of a
+level scanned in parallel, and turns the result into a work plan:
+
+- todo:  notice without metadata JSON
+- skip:  metadata JSON at least as new as the notice
+- stale: metadata JSON older than the notice (re-extract)
+
+The scan can be persisted as an index file; later scans then only list the
+directories whose mtime changed and reuse the recorded entries of the rest.
+
+Usage:
+    python cellar_corpus_inventory.py --root /path/to/root --index inventory.json
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+NOTICE_NAME = 'cellar_tree_notice.xml'
+# Plain notice first: when a folder has several forms of its notice, the
+# first one is the document (the others are the same content)
+NOTICE_NAMES = (NOTICE_NAME, NOTICE_NAME + '.gz', NOTICE_NAME + '.zst')
+OUTPUT_SUFFIX = '_metadata.json'
+INDEX_VERSION = 2
+
+
+def find_notice(folder):
+    """Path of the notice of a document folder (plain or compressed), None if it has none"""
+    for name in NOTICE_NAMES:
+        path = Path(folder) / name
+        if path.exists():
+            return path
+    return None
+
+
+class NoticeEntry:
+    """A notice found by the inventory, with its metadata JSON outputs"""
+    
+    def __init__(self, xml_path, size, mtime_ns, outputs):
+        self.xml_path = xml_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.outputs = outputs    # output file name -> mtime_ns
+    
+    @property
+    def status(self):
+        """'todo', 'skip' or 'stale'"""
+        if not self.outputs:
+            return 'todo'
+        if max(self.outputs.values()) >= self.mtime_ns:
+            return 'skip'
+        return 'stale'
+
+
+class WorkPlan:
+    """Notices of a corpus split by what process_batch has to do with them"""
+    
+    def __init__(self, notices):
+        self.notices = notices
+        self.by_path = {entry.xml_path: entry for entry in notices}
+        self.todo = [entry for entry in notices if entry.status == 'todo']
+        self.skip = [entry for entry in notices if entry.status == 'skip']
+        self.stale = [entry for entry in notices if entry.status == 'stale']
+    
+    def status(self, xml_path):
+        """Status of a notice, None if it is not part of the plan"""
+        entry = self.by_path.get(Path(xml_path))
+        return entry.status if entry is not None else None
+    
+    def summary(self):
+        return {
+            'notices': len(self.notices),
+            'todo': len(self.todo),
+            'skip': len(self.skip),
+            'stale': len(self.stale)
+        }
+
+
+class CorpusInventory:
+    """
+    Parallel os.scandir inventory of a corpus directory tree.
+    
+    Keeps the directory records of the last scan (and optionally an index
+    file), so that rescans only list directories whose mtime changed. Files
+    rewritten in place do not change their directory's mtime; drop the index
+    (or use a fresh inventory) to force a full scan.
+    """
+    
+    def __init__(self, root, index_path=None, max_workers=16):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else None
+        self.max_workers = max_workers
+        self.records = self.load_index()    # relative dir path -> record
+        self.rescanned = 0                  # directories listed by the last scan
+    
+    def load_index(self):
+        """Load the directory records of a previous scan of the same root"""
+        if self.index_path is None or not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION or index.get('root') != str(self.root.resolve()):
+            return {}
+        return index.get('dirs', {})
+    
+    def save_index(self):
+        """Persist the directory records (written to a temp file, then renamed)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'root': str(self.root.resolve()),
+                'dirs': self.records
+            }, f)
+        os.replace(tmp_path, self.index_path)
+    
+    def scan_dir(self, rel_path, previous):
+        """
+        Record one directory: mtime, notice/output files and subdirectories.
+        
+        Returns the previous record unchanged when the directory's mtime did not
+        change, and None when the directory can no longer be read.
+        """
+        path = self.root / rel_path if rel_path else self.root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            old = previous.get(rel_path)
+            if old is not None and old['mtime_ns'] == mtime_ns:
+                return old
+            
+            files = {}
+            subdirs = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if entry.is_dir():
+                        subdirs.append(name)
+                    elif name in NOTICE_NAMES or name.endswith(OUTPUT_SUFFIX):
+                        stat = entry.stat()
+                        files[name] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            return None
+        
+        return {'mtime_ns': mtime_ns, 'files': files, 'subdirs': sorted(subdirs)}
+    
+    def scan(self):
+        """
+        Walk the corpus and return its notices, sorted by path.
+        
+        Every directory of one level (TYPE folders, then NAME folders, ...) is
+        scanned in parallel; network storage is latency bound, not CPU bound.
+        """
+        previous = self.records
+        records = {}
+        
+        level = ['']
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                next_level = []
+                for rel_path, record in zip(level, executor.map(lambda rel: self.scan_dir(rel, previous), level)):
+                    if record is None:
+                        continue
+                    records[rel_path] = record
+                    next_level.extend(
+                        f"{rel_path}/{name}" if rel_path else name for name in record['subdirs']
+                    )
+                level = next_level
+        
+        self.records = records
+        self.rescanned = sum(1 for rel_path, record in records.items() if previous.get(rel_path) is not record)
+        if self.index_path is not None:
+            self.save_index()
+        return self.notices()
+    
+    def notices(self):
+        """Notices of the last scan, sorted by path"""
+        notices = []
+        for rel_path in sorted(self.records):
+            files = self.records[rel_path]['files']
+            notice_name = next((name for name in NOTICE_NAMES if name in files), None)
+            if notice_name is None:
+                continue
+            folder = self.root / rel_path if rel_path else self.root
+            size, mtime_ns = files[notice_name]
+            outputs = {name: stat[1] for name, stat in files.items() if name not in NOTICE_NAMES}
+            notices.append(NoticeEntry(folder / notice_name, size, mtime_ns, outputs))
+        return notices
+    
+    def plan(self):
+        """Scan the corpus and return its WorkPlan"""
+        return WorkPlan(self.scan())
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description='Inventory a CELLAR corpus and plan metadata extraction')
+    parser.add_argument('--root', type=str, required=True, help='Root directory (root/TYPE/NAME/)')
+    parser.add_argument('--index', type=str, help='Inventory index file (rescan only changed directories)')
+    parser.add_argument('--workers', type=int, default=16, help='Parallel directory scans (default: 16)')
+    parser.add_argument('--list', choices=['todo', 'skip', 'stale'], help='Print the notices with this status')
+    args = parser.parse_args()
+    
+    inventory = CorpusInventory(args.root, args.index, args.workers)
+    plan = inventory.plan()
+    summary = plan.summary()
+    
+    print(f"Notices: {summary['notices']} ({inventory.rescanned} of {len(inventory.records)} directories listed)")
+    print(f"  todo:  {summary['todo']}")
+    print(f"  skip:  {summary['skip']}")
+    print(f"  stale: {summary['stale']}")
+    
+    if args.list:
+        for entry in getattr(plan, args.list):
+            print(entry.xml_path)
+    
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+CELLAR Extractor Benchmark
+
+Generates synthetic CELLAR tree notices and times CellarXMLParser on them,
+so extraction performance can be measured offline without CELLAR access.
+
+The suite runs every scenario (notice shape) with every engine, each in a
+fresh process, and reports docs/sec and peak RSS overall and per stage
+(parse, main work, languages and every extract_* step). Results can be saved
+and later runs compared against them to catch regressions.
+
+Usage:
+    # Every scenario with every engine
+    python cellar_extractor_benchmark.py
+    
+    # Save a baseline, then fail (exit 1) if a later run is more than 15% worse
+    python cellar_extractor_benchmark.py --save baseline.json
+    python cellar_extractor_benchmark.py --baseline baseline.json --tolerance 0.15
+    
+    # Tag index vs. one descendant scan per field
+    python cellar_extractor_benchmark.py --tag-index --languages 24 --caselaw 500 --repeat 10
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from cellar_metadata_extractor import CellarXMLParser, TagIndex, StageProfiler, ENGINES, percentile
+
+try:
+    import resource
+except ImportError:    # Windows
+    resource = None
+
+LANGUAGES = [
+    'BUL', 'CES', 'DAN', 'DEU', 'ELL', 'ENG', 'EST', 'FIN', 'FRA', 'GLE', 'HRV', 'HUN',
+    'ITA', 'LAV', 'LIT', 'MLT', 'NLD', 'POL', 'POR', 'RON', 'SLK', 'SLV', 'SPA', 'SWE'
+]
+
+CASELAW_TAGS = [
+    'RESOURCE_LEGAL_INTERPRETED_BY_CASE-LAW',
+    'RESOURCE_LEGAL_PRELIMINARY_QUESTION-SUBMITTED_BY_COMMUNICATION_CASE_NEW',
+    'CASE-LAW_CONFIRMS_RESOURCE_LEGAL',
+    'CASE-LAW_DECLARES_VALID_RESOURCE_LEGAL',
+    'CASE-LAW_DECLARES_VOID_RESOURCE_LEGAL',
+    'CASE-LAW_AMENDS_RESOURCE_LEGAL',
+    'CASE-LAW_REQUESTS_ANNULMENT_OF_RESOURCE_LEGAL'
+]
+
+ARTICLE_REFERENCES = ['A6P1', 'A58P5', 'A61', 'A17', '{AR|http://publications.europa.eu/resource/authority/fd_370/ART} 82',
+                      '{AR|a} 23 {PA|b} 1 {PTA|c} (e)', 'N']
+
+COUNTRIES = ['AT', 'BE', 'BG', 'CY', 'CZ', 'DE', 'DK', 'EE', 'EL', 'ES', 'FI', 'FR', 'HR', 'HU',
+             'IE', 'IT', 'LT', 'LU', 'LV', 'MT', 'NL', 'PL', 'PT', 'RO', 'SE', 'SI', 'SK']
+
+# Notice shapes of the suite (generate_notice arguments)
+SCENARIOS = {
+    'small': dict(languages=4, caselaw=5, embedded_works=1, eurovoc=5),
+    'typical': dict(languages=24, caselaw=40, embedded_works=2, eurovoc=10, amendments=5, implementations=10),
+    'caselaw-heavy': dict(languages=24, caselaw=1000, embedded_works=20, eurovoc=15, amendments=20,
+                          implementations=30),
+    'manifestation-heavy': dict(languages=24, caselaw=40, embedded_works=2, eurovoc=10, manifestation_items=60)
+}
+
+
+def sameas(identifier, id_type):
+    """SAMEAS block as found in tree notices"""
+    return (f'<SAMEAS><URI><VALUE>http://publications.europa.eu/resource/{id_type}/{identifier}</VALUE>'
+            f'<IDENTIFIER>{identifier}</IDENTIFIER><TYPE>{id_type}</TYPE></URI></SAMEAS>')
+
+
+def value(tag, text):
+    return f'<{tag}><VALUE>{text}</VALUE></{tag}>'
+
+
+def generate_notice(languages=24, caselaw=50, embedded_works=2, eurovoc=10, seed=0,
+                    amendments=0, implementations=0, manifestation_items=4):
+    """
+    Generate a synthetic CELLAR tree notice.
+    
+    Args:
+        languages: Number of language EXPRESSIONs (each with manifestations)
+        caselaw: Number of case law links on the main WORK
+        embedded_works: Number of embedded OJ WORKs (EMBEDDED_NOTICE)
+        eurovoc: Number of Eurovoc concepts (domains/microthesauri scale with it)
+        seed: Random seed
+        amendments: Number of amended acts (and as many consolidated versions)
+        implementations: Number of national implementing measures
+        manifestation_items: Items per MANIFESTATION (3 manifestations per language)
+    
+    Returns:
+        str: XML document
+    """
+    rnd = random.Random(seed)
+    celex = '32016R0679'
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<NOTICE decoding="eng" type="tree">', '<WORK>']
+    
+    parts.append(sameas(celex, 'celex'))
+    parts.append(sameas('JOL_2016_119_R_0001', 'oj'))
+    parts.append(sameas('20120125-011:COM(2012)11', 'immc'))
+    parts.append(value('RESOURCE_LEGAL_ID_CELEX', '01995L0046-20180525'))
+    parts.append(value('RESOURCE_LEGAL_ID_CELEX', celex))
+    parts.append(value('ID_CELEX', celex))
+    parts.append('<WORK_DATE_DOCUMENT><VALUE>2016-04-27</VALUE><YEAR>2016</YEAR><MONTH>04</MONTH><DAY>27</DAY></WORK_DATE_DOCUMENT>')
+    parts.append(value('RESOURCE_LEGAL_DATE_SIGNATURE', '2016-04-27'))
+    parts.append(value('RESOURCE_LEGAL_DATE_ENTRY-INTO-FORCE', '2016-05-24'))
+    parts.append(value('RESOURCE_LEGAL_DATE_END-OF-VALIDITY', '9999-12-31'))
+    parts.append(value('RESOURCE_LEGAL_ELI', 'http://data.europa.eu/eli/reg/2016/679/oj'))
+    parts.append(value('RESOURCE_LEGAL_NUMBER_NATURAL_CELEX', '0679'))
+    parts.append(value('RESOURCE_LEGAL_TYPE', 'R'))
+    parts.append(value('RESOURCE_LEGAL_YEAR', '2016'))
+    parts.append(value('ID_SECTOR', '3'))
+    parts.append(value('RESOURCE_LEGAL_IN-FORCE', 'true'))
+    parts.append(value('VERSION', '12'))
+    parts.append(value('LASTMODIFICATIONDATE', '2024-03-01'))
+    parts.append('<WORK_CREATED_BY_AGENT><PREFLABEL>European Parliament</PREFLABEL></WORK_CREATED_BY_AGENT>')
+    parts.append('<RESOURCE_LEGAL_RESPONSIBILITY_OF_AGENT><PREFLABEL>Directorate-General for Justice</PREFLABEL></RESOURCE_LEGAL_RESPONSIBILITY_OF_AGENT>')
+    parts.append('<RESOURCE_LEGAL_IS_ABOUT_SUBJECT-MATTER_1><PREFLABEL>Data protection</PREFLABEL></RESOURCE_LEGAL_IS_ABOUT_SUBJECT-MATTER_1>')
+    parts.append('<WORK_PART_OF_DOSSIER>' + sameas('2012/0011/COD', 'procedure') + '</WORK_PART_OF_DOSSIER>')
+    parts.append('<RESOURCE_LEGAL_BASED_ON_CONCEPT_TREATY><PREFLABEL>Treaty on the Functioning of the European Union</PREFLABEL></RESOURCE_LEGAL_BASED_ON_CONCEPT_TREATY>')
+    parts.append('<RESOURCE_LEGAL_BASED_ON_RESOURCE_LEGAL>' + sameas('12016E016', 'celex') + '</RESOURCE_LEGAL_BASED_ON_RESOURCE_LEGAL>')
+    parts.append('<RESOURCE_LEGAL_REPEALS_RESOURCE_LEGAL>' + sameas('31995L0046', 'celex') + '</RESOURCE_LEGAL_REPEALS_RESOURCE_LEGAL>')
+    for i in range(20):
+        parts.append('<WORK_CITES_WORK>' + sameas(f'3{rnd.randint(1990, 2015)}L{rnd.randint(1, 999):04d}', 'celex') + '</WORK_CITES_WORK>')
+    parts.append('<RESOURCE_LEGAL_CORRECTED_BY_RESOURCE_LEGAL>' + sameas('32016R0679R(02)', 'celex') + '</RESOURCE_LEGAL_CORRECTED_BY_RESOURCE_LEGAL>')
+    
+    # Eurovoc: concepts plus proportionally fewer domains/microthesauri/terms
+    for kind, count in (('CONCEPT', eurovoc), ('DOM', max(1, eurovoc // 4)),
+                        ('MTH', max(1, eurovoc // 3)), ('TT', max(1, eurovoc // 2))):
+        parts.append('<WORK_IS_ABOUT_CONCEPT_EUROVOC>')
+        for i in range(count):
+            parts.append(f'<WORK_IS_ABOUT_CONCEPT_EUROVOC_{kind}><IDENTIFIER>{rnd.randint(100, 9999)}</IDENTIFIER>'
+                         f'<PREFLABEL>{kind.lower()} label {i}</PREFLABEL></WORK_IS_ABOUT_CONCEPT_EUROVOC_{kind}>')
+        parts.append('</WORK_IS_ABOUT_CONCEPT_EUROVOC>')
+    
+    for i in range(caselaw):
+        tag = CASELAW_TAGS[0] if rnd.random() < 0.7 else rnd.choice(CASELAW_TAGS)
+        parts.append(f'<{tag}>')
+        parts.append(sameas(f'6{rnd.randint(2000, 2024)}CJ{rnd.randint(1, 999):04d}', 'celex'))
+        if rnd.random() < 0.4:
+            parts.append(sameas(f'ECLI:EU:C:{rnd.randint(2000, 2024)}:{rnd.randint(1, 999)}', 'ecli'))
+        for _ in range(rnd.randint(0, 4)):
+            parts.append(f'<ANNOTATION><REFERENCE_TO_MODIFIED_LOCATION>{rnd.choice(ARTICLE_REFERENCES)}'
+                         '</REFERENCE_TO_MODIFIED_LOCATION></ANNOTATION>')
+        parts.append(f'</{tag}>')
+    
+    for i in range(embedded_works):
+        parts.append('<RESOURCE_LEGAL_PUBLISHED_IN_OFFICIAL-JOURNAL><EMBEDDED_NOTICE><WORK>')
+        parts.append(value('DATE_PUBLICATION', '2016-05-04'))
+        parts.append(value('RESOURCE_LEGAL_ID_CELEX', f'3{rnd.randint(1990, 2024)}D{i:04d}'))
+        parts.append(value('OFFICIAL-JOURNAL_NUMBER', str(119 + i)))
+        parts.append('</WORK></EMBEDDED_NOTICE></RESOURCE_LEGAL_PUBLISHED_IN_OFFICIAL-JOURNAL>')
+    
+    for i in range(amendments):
+        parts.append('<RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>' + sameas(f'3{rnd.randint(1990, 2015)}R{rnd.randint(1, 999):04d}', 'celex')
+                     + '</RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>')
+        parts.append('<RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>' + sameas(f'02016R0679-2016050{i % 10}', 'celex')
+                     + '</RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>')
+    
+    for i in range(implementations):
+        country = rnd.choice(COUNTRIES)
+        parts.append(f'<RESOURCE_LEGAL_IMPLEMENTED_BY_MEASURE_NATIONAL_IMPLEMENTING><URI>'
+                     f'<VALUE>http://publications.europa.eu/resource/mne/{country}{i}</VALUE>'
+                     f'<IDENTIFIER>7{rnd.randint(2016, 2024)}{country}{i:04d}</IDENTIFIER><TYPE>mne</TYPE></URI>'
+                     f'<ANNOTATION><COUNTRY>{country}</COUNTRY></ANNOTATION>'
+                     f'</RESOURCE_LEGAL_IMPLEMENTED_BY_MEASURE_NATIONAL_IMPLEMENTING>')
+    
+    parts.append('</WORK>')
+    
+    for lang in LANGUAGES[:languages]:
+        parts.append('<EXPRESSION>')
+        parts.append(f'<EXPRESSION_USES_LANGUAGE><URI><VALUE>http://publications.europa.eu/resource/authority/language/{lang}</VALUE>'
+                     f'<IDENTIFIER>{lang}</IDENTIFIER><TYPE>language</TYPE></URI></EXPRESSION_USES_LANGUAGE>')
+        parts.append(value('EXPRESSION_TITLE', f'Regulation (EU) 2016/679 ({lang}) on the protection of natural persons'))
+        parts.append(value('EXPRESSION_TITLE_SHORT', f'General Data Protection Regulation ({lang})'))
+        parts.append(value('EXPRESSION_SUBTITLE', 'Text with EEA relevance'))
+        for manifestation in ('pdfa2a', 'fmx4', 'xhtml'):
+            parts.append('<MANIFESTATION>')
+            parts.append(value('MANIFESTATION_TYPE', manifestation))
+            parts.append(sameas(f'oj:JOL_2016_119_R_0001.{lang}.{manifestation}', 'oj'))
+            for item in range(manifestation_items):
+                parts.append(f'<MANIFESTATION_HAS_ITEM><URI><VALUE>http://publications.europa.eu/resource/cellar/'
+                             f'{rnd.getrandbits(64):016x}.{item:04d}</VALUE></URI></MANIFESTATION_HAS_ITEM>')
+            parts.append('</MANIFESTATION>')
+        parts.append('</EXPRESSION>')
+    
+    parts.append('</NOTICE>\n')
+    return ''.join(parts)
+
+
+def time_extraction(parser, xml_path, repeat):
+    """Average seconds per parse + main work + build_metadata_json"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tree = parser.parse_xml_file(xml_path)
+        main_work = parser.identify_main_work(tree, '32016R0679')
+        parser.build_metadata_json(tree, main_work, '32016R0679')
+        parser.index = None
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark_tag_index(xml_path, repeat):
+    """Compare one descendant scan per field against one tag index pass per document"""
+    scanning = CellarXMLParser()
+    scanning.use_tag_index = False
+    indexed = CellarXMLParser()
+    
+    tree = indexed.parse_xml_file(xml_path)
+    indexed.index = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        TagIndex(tree, indexed.anchor_tags)
+    index_time = (time.perf_counter() - start) / repeat
+    
+    scan_time = time_extraction(scanning, xml_path, repeat)
+    index_total = time_extraction(indexed, xml_path, repeat)
+    
+    print(f"One scan per field:      {scan_time * 1000:8.1f} ms/doc")
+    print(f"One tag index per doc:   {index_total * 1000:8.1f} ms/doc "
+          f"(index build {index_time * 1000:.1f} ms)")
+    print(f"Speedup:                 {scan_time / index_total:8.2f}x")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB), 0 where unavailable"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def track_rss(stage, method, growth):
+    """Wrap a stage method to record how far it raised the peak RSS (MB)"""
+    def tracked(*args, **kwargs):
+        before = peak_rss_mb()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            growth[stage] = max(growth.get(stage, 0.0), peak_rss_mb() - before)
+    return tracked
+
+
+def measure(engine, xml_path, repeat, config_path='cellar_xpath_config.json', languages=None):
+    """
+    Time one engine on one notice, stage by stage (run in a fresh process).
+    
+    The first extraction is a warm-up: it is not timed, but it is the one that
+    raises the peak RSS of each stage. Rates are taken from median times, so a
+    few slow repetitions do not move them.
+    
+    Returns:
+        dict: docs_per_sec, peak_rss_mb and per stage p50_ms, docs_per_sec, rss_mb
+    """
+    baseline_rss = peak_rss_mb()
+    parser = ENGINES[engine](config_path)
+    if languages:
+        parser.select_languages(languages)
+    
+    rss_growth = {}
+    for name, stage in StageProfiler.STAGES.items():
+        setattr(parser, name, track_rss(stage, getattr(parser, name), rss_growth))
+    profiler = parser.enable_profiling()
+    extract = profiler.wrap_document(parser.extract_document)
+    
+    extract(xml_path)
+    profiler.take()
+    for _ in range(repeat):
+        extract(xml_path)
+    
+    stages = {}
+    for stage, row in profiler.summary().items():
+        if stage == 'other':
+            continue
+        stages[stage] = {
+            'p50_ms': row['p50'] * 1000,
+            'docs_per_sec': 1 / row['p50'] if row['p50'] else None,
+            'rss_mb': rss_growth.get(stage, 0.0)
+        }
+    totals = sorted(timings['total'] for _, timings in profiler.documents)
+    return {
+        'docs_per_sec': 1 / percentile(totals, 0.5),
+        'peak_rss_mb': peak_rss_mb() - baseline_rss,
+        'stages': stages
+    }
+
+
+def run_suite(scenarios, engines, repeat, config_path='cellar_xpath_config.json', languages=None):
+    """
+    Measure every scenario with every engine, each in its own fresh process.
+    
+    Returns:
+        dict: scenario -> {'notice': shape and size, engine -> measure() result}
+    """
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    config_path = str(Path(config_path).resolve())
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, shape in scenarios.items():
+            xml_path = Path(tmp) / name / 'cellar_tree_notice.xml'
+            xml_path.parent.mkdir()
+            xml_path.write_text(generate_notice(**shape), encoding='utf-8')
+            results[name] = {'notice': dict(shape, size_kb=round(xml_path.stat().st_size / 1024))}
+            
+            for engine in engines:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    results[name][engine] = executor.submit(
+                        measure, engine, str(xml_path), repeat, config_path, languages
+                    ).result()
+            print_scenario(name, results[name], engines)
+    return results
+
+
+def print_scenario(name, result, engines):
+    """Overall and per-stage table of one scenario"""
+    notice = result['notice']
+    print(f"\n{name}: {notice['size_kb']} KB "
+          f"({', '.join(f'{key}={value}' for key, value in notice.items() if key != 'size_kb')})")
+    for engine in engines:
+        row = result[engine]
+        print(f"  {engine:<8}{row['docs_per_sec']:10.1f} docs/s  peak RSS +{row['peak_rss_mb']:.1f} MB")
+    
+    print(f"  {'stage':<16}" + ''.join(f"{engine + ' ms':>12}{'docs/s':>10}{'RSS MB':>8}" for engine in engines))
+    stages = [stage for stage in StageProfiler.STAGES.values()
+              if any(stage in result[engine]['stages'] for engine in engines)]
+    for stage in stages:
+        line = f"  {stage:<16}"
+        for engine in engines:
+            row = result[engine]['stages'].get(stage)
+            if row is None:
+                line += f"{'-':>12}{'-':>10}{'-':>8}"
+            else:
+                docs_per_sec = f"{row['docs_per_sec']:.0f}" if row['docs_per_sec'] else '-'
+                line += f"{row['p50_ms']:>12.2f}{docs_per_sec:>10}{row['rss_mb']:>8.1f}"
+        print(line)
+
+
+def compare_results(baseline, results, tolerance, min_stage_ms=0.5, min_rss_mb=1.0):
+    """
+    List the measurements of results that are worse than baseline by more than tolerance.
+    
+    Stages faster than min_stage_ms and RSS changes below min_rss_mb are too
+    noisy to compare and are ignored.
+    
+    Returns:
+        list of str: one line per regression
+    """
+    regressions = []
+    for scenario, engines in results.items():
+        for engine, row in engines.items():
+            base = baseline.get(scenario, {}).get(engine)
+            if engine == 'notice' or base is None:
+                continue
+            label = f"{scenario}/{engine}"
+            if row['docs_per_sec'] < base['docs_per_sec'] * (1 - tolerance):
+                regressions.append(f"{label}: {row['docs_per_sec']:.1f} docs/s (baseline {base['docs_per_sec']:.1f})")
+            if (row['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance)
+                    and row['peak_rss_mb'] - base['peak_rss_mb'] >= min_rss_mb):
+                regressions.append(f"{label}: peak RSS +{row['peak_rss_mb']:.1f} MB "
+                                   f"(baseline +{base['peak_rss_mb']:.1f} MB)")
+            for stage, stage_row in row['stages'].items():
+                base_stage = base['stages'].get(stage)
+                if base_stage is None or base_stage['p50_ms'] < min_stage_ms:
+                    continue
+                if stage_row['p50_ms'] > base_stage['p50_ms'] * (1 + tolerance):
+                    regressions.append(f"{label} {stage}: {stage_row['p50_ms']:.2f} ms "
+                                       f"(baseline {base_stage['p50_ms']:.2f} ms)")
+    return regressions
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the CELLAR metadata extractor on synthetic notices')
+    parser.add_argument('--scenarios', type=str, default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios ({', '.join(SCENARIOS)}, custom)")
+    parser.add_argument('--engines', type=str, default=','.join(ENGINES),
+                        help=f"Comma-separated engines ({', '.join(ENGINES)})")
+    parser.add_argument('--select-languages', type=str,
+                        help='Run the engines with parse-time pruning to these languages (e.g. eng)')
+    parser.add_argument('--config', type=str, default='cellar_xpath_config.json',
+                        help='Path to XPath configuration file')
+    parser.add_argument('--save', type=str, help='Save the results (JSON) as a baseline')
+    parser.add_argument('--baseline', type=str, help='Compare against saved results; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed slowdown / memory growth against the baseline (default: 0.15)')
+    parser.add_argument('--tag-index', action='store_true',
+                        help='Compare one descendant scan per field against the tag index instead')
+    
+    # Shape of the 'custom' scenario (and of the --tag-index notice)
+    parser.add_argument('--languages', type=int, default=24, help='Language expressions per notice')
+    parser.add_argument('--caselaw', type=int, default=200, help='Case law links per notice')
+    parser.add_argument('--embedded-works', type=int, default=20, help='Embedded OJ works per notice')
+    parser.add_argument('--eurovoc', type=int, default=15, help='Eurovoc concepts per notice')
+    parser.add_argument('--repeat', type=int, default=10, help='Repetitions per measurement')
+    args = parser.parse_args()
+    
+    if args.tag_index:
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_path = Path(tmp) / 'cellar_tree_notice.xml'
+            xml_path.write_text(generate_notice(args.languages, args.caselaw, args.embedded_works, args.eurovoc),
+                                encoding='utf-8')
+            print(f"Synthetic notice: {xml_path.stat().st_size / 1024:.0f} KB "
+                  f"({args.languages} languages, {args.caselaw} case law links, "
+                  f"{args.embedded_works} embedded works, {args.eurovoc} Eurovoc concepts)\n")
+            benchmark_tag_index(xml_path, args.repeat)
+        return 0
+    
+    available = dict(SCENARIOS, custom=dict(languages=args.languages, caselaw=args.caselaw,
+                                            embedded_works=args.embedded_works, eurovoc=args.eurovoc))
+    scenario_names = args.scenarios.split(',')
+    engines = args.engines.split(',')
+    unknown = [name for name in scenario_names if name not in available] + [
+        engine for engine in engines if engine not in ENGINES
+    ]
+    if unknown:
+        print(f"Error: unknown scenario or engine: {', '.join(unknown)}")
+        return 1
+    scenarios = {name: available[name] for name in scenario_names}
+    languages = args.select_languages.split(',') if args.select_languages else None
+    
+    results = run_suite(scenarios, engines, args.repeat, args.config, languages)
+    
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -11,28 +11,746 @@ Usage:
     
     # Batch processing
     python cellar_metadata_extractor.py --root /path/to/root --limit 5
+    
+    # Tree-less streaming engine (flat memory on very large notices)
+    python cellar_metadata_extractor.py --root /path/to/root --engine stream
+    
+    # Whole mapping as one compiled XSLT stylesheet run by libxslt
+    python cellar_metadata_extractor.py --root /path/to/root --engine xslt
+    
+    # Skip MANIFESTATIONs and the EXPRESSIONs of other languages while parsing
+    python cellar_metadata_extractor.py --root /path/to/root --languages eng,fra,deu
+    
+    # Re-runs only extract new, changed or config-affected notices
+    python cellar_metadata_extractor.py --root /path/to/root --cache extraction_cache.sqlite
+    
+    # One consolidated JSONL corpus (with a CELEX offset index) instead of per-document files
+    python cellar_metadata_extractor.py --root /path/to/root --output-format jsonl --output-file corpus.jsonl.zst
+    
+    # Normalized SQLite database for the reader app
+    python cellar_metadata_extractor.py --root /path/to/root --output-format sqlite --output-file corpus.sqlite
+    
+    # Eurovoc IDs only; labels in one corpus dictionary (optionally seeded from the SKOS thesaurus)
+    python cellar_metadata_extractor.py --root /path/to/root --eurovoc-dictionary eurovoc.sqlite
 """
 
+import io
+import os
+import csv
+import gzip
 import json
+import math
 import re
+import time
+import queue
+import hashlib
+import sqlite3
 import argparse
+import threading
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from lxml import etree
+from cellar_corpus_inventory import CorpusInventory, find_notice
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Bump whenever a change to the extraction code changes the JSON output,
+# so that --cache re-extracts every document
+EXTRACTOR_VERSION = '2.4'
+
+
+# XPaths evaluated relative to the main WORK element, keyed like the sections
+# of cellar_xpath_config.json. Dates use direct children (./) so that dates of
+# embedded notices are not picked up.
+MAIN_WORK_XPATHS = {
+    'dates': {
+        'document': './WORK_DATE_DOCUMENT/VALUE',
+        'document_year': './WORK_DATE_DOCUMENT/YEAR',
+        'document_month': './WORK_DATE_DOCUMENT/MONTH',
+        'document_day': './WORK_DATE_DOCUMENT/DAY',
+        'publication': './RESOURCE_LEGAL_PUBLISHED_IN_OFFICIAL-JOURNAL/EMBEDDED_NOTICE/WORK/DATE_PUBLICATION/VALUE',
+        'signature': './RESOURCE_LEGAL_DATE_SIGNATURE/VALUE',
+        'entry_into_force': './RESOURCE_LEGAL_DATE_ENTRY-INTO-FORCE/VALUE',
+        'end_of_validity': './RESOURCE_LEGAL_DATE_END-OF-VALIDITY/VALUE',
+        'transposition_deadline': './RESOURCE_LEGAL_DATE_DEADLINE/VALUE'
+    },
+    'identifiers': {
+        'celex_values': './/RESOURCE_LEGAL_ID_CELEX/VALUE/text()',
+        'celex': './/ID_CELEX/VALUE',
+        'resource_legal_eli': './/RESOURCE_LEGAL_ELI/VALUE',
+        'eli': './/ELI/VALUE',
+        'oj_reference': './/SAMEAS[URI/TYPE="oj"]/URI/IDENTIFIER',
+        'immc': './/SAMEAS[URI/TYPE="immc"]/URI/IDENTIFIER',
+        'natural_number': './/RESOURCE_LEGAL_NUMBER_NATURAL_CELEX/VALUE',
+        'type': './/RESOURCE_LEGAL_TYPE/VALUE',
+        'year': './/RESOURCE_LEGAL_YEAR/VALUE',
+        'sector': './/ID_SECTOR/VALUE'
+    },
+    'legal_relations': {
+        'based_on': './/BASED_ON/SAMEAS/URI/IDENTIFIER',
+        'based_on_legal': './/RESOURCE_LEGAL_BASED_ON_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER',
+        'treaty_basis': './/RESOURCE_LEGAL_BASED_ON_CONCEPT_TREATY/PREFLABEL',
+        'cites': './/WORK_CITES_WORK/SAMEAS/URI/IDENTIFIER',
+        'amends': './/RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER',
+        'repeals': './/RESOURCE_LEGAL_REPEALS_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER',
+        'repeals_alt': './/RESOURCE_LEGAL_DOES_REPEAL_OF_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER',
+        'consolidated_by': './/RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED/SAMEAS/URI/IDENTIFIER',
+        'corrected_by': './/RESOURCE_LEGAL_CORRECTED_BY_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER'
+    },
+    'metadata': {
+        'created_by': './/WORK_CREATED_BY_AGENT/PREFLABEL',
+        'created_by_alt': './/CREATED_BY/PREFLABEL',
+        'responsible_agent': './/RESOURCE_LEGAL_RESPONSIBILITY_OF_AGENT/PREFLABEL',
+        'in_force': './/RESOURCE_LEGAL_IN-FORCE/VALUE',
+        'subject_matter': './/RESOURCE_LEGAL_IS_ABOUT_SUBJECT-MATTER_1/PREFLABEL',
+        'dossier_reference': './/WORK_PART_OF_DOSSIER/SAMEAS/URI/IDENTIFIER',
+        'version': './/VERSION/VALUE',
+        'last_modified': './/LASTMODIFICATIONDATE/VALUE'
+    }
+}
+
+# XPaths evaluated relative to each EXPRESSION element
+EXPRESSION_XPATHS = {
+    'language': './EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER',
+    'title': './EXPRESSION_TITLE/VALUE',
+    'short': './EXPRESSION_TITLE_SHORT/VALUE',
+    'subtitle': './EXPRESSION_SUBTITLE/VALUE'
+}
+
+# XPaths used to navigate the notice structure and detect languages
+DOCUMENT_XPATHS = {
+    'expressions': '//EXPRESSION',
+    'child_expressions': './EXPRESSION',
+    'descendant_expressions': './/EXPRESSION',
+    'expression_titles': '//EXPRESSION_TITLE/VALUE',
+    'expression_languages': '//EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER',
+    'lang_tags': '//LANG'
+}
+
+# Sections of the output document, in output order; --sections extracts a subset
+SECTIONS = ('languages', 'title', 'dates', 'identifiers', 'eurovoc', 'caselaw',
+            'implementation', 'legalRelations', 'metadata')
+
+# Output schemas of the JSON and JSONL outputs (see CompactSchema)
+SCHEMAS = ('full', 'compact')
+
+# Output section of the cellar_xpath_config.json / MAIN_WORK_XPATHS sections named differently
+CONFIG_SECTIONS = {'legal_relations': 'legalRelations'}
+
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+ZSTD_NOTICES_REQUIRED = "Reading .zst notices requires the 'zstandard' package (pip install zstandard)"
+
+
+def open_notice(xml_path, data=None):
+    """
+    Open a notice as a binary stream.
+    
+    'cellar_tree_notice.xml.gz' and '.xml.zst' notices are decompressed on the
+    fly while the parser reads them, without temporary files. data: the file's
+    bytes when they were already read (ReadAhead); the path then only gives
+    the compression.
+    """
+    xml_path = Path(xml_path)
+    source = io.BytesIO(data) if data is not None else None
+    if xml_path.suffix == '.gz':
+        return gzip.GzipFile(fileobj=source, mode='rb') if source is not None else gzip.open(xml_path, 'rb')
+    if xml_path.suffix == '.zst':
+        if zstandard is None:
+            raise ImportError(ZSTD_NOTICES_REQUIRED)
+        # Notices written by streaming compressors can hold several frames
+        return zstandard.ZstdDecompressor().stream_reader(
+            source if source is not None else open(xml_path, 'rb'), closefd=True, read_across_frames=True
+        )
+    return source if source is not None else open(xml_path, 'rb')
+
+
+class ReadAhead:
+    """
+    Bounded read-ahead of notice files.
+    
+    A small thread pool reads upcoming notices into memory (as stored, so
+    compressed notices stay compressed) while the current ones are parsed.
+    Every notice reserves its size from the byte budget before it is read and
+    holds it until release(); a notice larger than the whole budget is read
+    once nothing else is held. Iterating yields (xml_path, data, size) in
+    order; data is None when the read failed, so that the parser reports the
+    error on its own read.
+    """
+    
+    def __init__(self, notices, budget=64 << 20, threads=4):
+        self.notices = notices    # [(xml_path, size)]
+        self.budget = budget
+        self.threads = threads
+        self.held = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.queue = queue.Queue()
+    
+    def reserve(self, size):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.closed or self.held == 0 or self.held + size <= self.budget
+            )
+            self.held += size
+    
+    def release(self, size):
+        """Give a consumed notice's bytes back to the budget"""
+        with self.condition:
+            self.held -= size
+            self.condition.notify_all()
+    
+    @staticmethod
+    def read(xml_path):
+        try:
+            with open(xml_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def feed(self, executor):
+        """Schedule the reads in order, as far ahead as the budget allows"""
+        for xml_path, size in self.notices:
+            self.reserve(size)
+            if self.closed:
+                break
+            self.queue.put((xml_path, size, executor.submit(self.read, xml_path)))
+        self.queue.put(None)
+    
+    def __iter__(self):
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            feeder = threading.Thread(target=self.feed, args=(executor,), daemon=True)
+            feeder.start()
+            try:
+                while True:
+                    item = self.queue.get()
+                    if item is None:
+                        break
+                    xml_path, size, future = item
+                    yield xml_path, future.result(), size
+            finally:
+                # Stop the feeder if the consumer gave up early
+                with self.condition:
+                    self.closed = True
+                    self.condition.notify_all()
+                feeder.join()
+
+
+# "content_hash" of an output file, read from its first bytes
+CONTENT_HASH_PATTERN = re.compile(rb'"content_hash":\s*"([0-9a-f]{64})"')
+
+# Top-level keys left out of the content_hash
+UNHASHED_KEYS = ('content_hash', 'extraction_timestamp')
+
+
+def content_hash(payload):
+    """sha256 of a payload's canonical JSON (sorted keys, no whitespace, UTF-8), without UNHASHED_KEYS"""
+    hashed = {key: value for key, value in payload.items() if key not in UNHASHED_KEYS}
+    canonical = json.dumps(hashed, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def with_content_hash(payload):
+    """The payload with its content_hash as the first key"""
+    hashed = {'content_hash': content_hash(payload)}
+    hashed.update(payload)
+    return hashed
+
+
+def stored_content_hash(output_path):
+    """content_hash of an existing output file, None if it has none (or does not exist)"""
+    try:
+        with open(output_path, 'rb') as f:
+            head = f.read(128)
+    except OSError:
+        return None
+    match = CONTENT_HASH_PATTERN.search(head)
+    return match.group(1).decode('ascii') if match else None
+
+
+def replace_file(path, data, sync=True):
+    """
+    Write data (bytes) to path through a temporary file in the same
+    directory and an atomic rename: readers, and an interrupted batch, only
+    ever see the old or the new complete file. With sync, the temporary file
+    is fsynced before the rename, so not even a crash leaves a truncated file
+    under the real name; the rename itself is made durable by fsyncing the
+    directory (see OutputSync).
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class OutputSync:
+    """
+    Batched fsync of the directories of replaced files.
+    
+    replace_file fsyncs each file's data before renaming it; the renames
+    only become durable once their directory is fsynced. Files are added as
+    they come (from any process); every batch_size files, each of their
+    directories is fsynced once, instead of one directory fsync per output.
+    """
+    
+    def __init__(self, batch_size=256):
+        self.batch_size = batch_size
+        self.files = 0
+        self.directories = {}
+    
+    def add(self, *paths):
+        for path in paths:
+            self.directories[Path(path).parent] = None
+        self.files += len(paths)
+        if self.files >= self.batch_size:
+            self.sync()
+    
+    def sync(self):
+        """fsync the directories of the pending files"""
+        directories, self.directories, self.files = self.directories, {}, 0
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass    # directories cannot be fsynced on every platform
+            finally:
+                os.close(fd)
+
+
+# '//A...', './/A...' or './A...' whose first step is a plain element name
+ANCHORED_XPATH = re.compile(r'^(//|\.//|\./)([A-Za-z_][\w.\-]*)(?=$|[/\[])')
+
+
+def split_anchor(xpath):
+    """
+    Split an XPath on its first step.
+    
+    Returns:
+        (axis, anchor tag, compiled 'self::...' XPath) for '//A/B', './/A/B'
+        or './A/B' style paths, None for anything else (unions, wildcards)
+    """
+    match = ANCHORED_XPATH.match(xpath)
+    if not match or '|' in xpath:
+        return None
+    axis = 'child' if match.group(1) == './' else 'descendant'
+    relative = xpath[len(match.group(1)):]
+    return axis, match.group(2), etree.XPath('self::' + relative, smart_strings=False)
+
+
+# Case law sub-paths that can be read by iterating the relation element's children
+SAMEAS_IDENTIFIERS = './SAMEAS/URI/IDENTIFIER'
+SAMEAS_TYPED_IDENTIFIERS = re.compile(r"^\./SAMEAS\[URI/TYPE=(['\"])([^'\"]*)\1\]/URI/IDENTIFIER$")
+ANNOTATION_CHILDREN = re.compile(r'^\./ANNOTATION/([A-Za-z_][\w.\-]*)$')
+
+
+def read_relation_children(elem, annotation_tag=None):
+    """
+    Read the SAMEAS and ANNOTATION children of a relation element in one scan.
+    
+    Returns:
+        (identifiers, identifiers by URI/TYPE, annotation elements): the results
+        of './SAMEAS/URI/IDENTIFIER', "./SAMEAS[URI/TYPE='...']/URI/IDENTIFIER"
+        and './ANNOTATION/{annotation_tag}', in document order
+    """
+    identifiers = []
+    by_type = {}
+    annotations = []
+    for child in elem.iterchildren(etree.Element):
+        tag = child.tag
+        if tag == 'SAMEAS':
+            sameas_identifiers = []
+            sameas_types = set()
+            for uri in child.iterchildren('URI'):
+                sameas_identifiers.extend(uri.iterchildren('IDENTIFIER'))
+                for type_elem in uri.iterchildren('TYPE'):
+                    sameas_types.add(''.join(type_elem.itertext()))
+            identifiers.extend(sameas_identifiers)
+            for id_type in sameas_types:
+                by_type.setdefault(id_type, []).extend(sameas_identifiers)
+        elif tag == 'ANNOTATION' and annotation_tag is not None:
+            annotations.extend(child.iterchildren(annotation_tag))
+    return identifiers, by_type, annotations
+
+
+class TagIndex:
+    """
+    Per-document element index built in a single tree.iter() pass.
+    
+    Maps every indexed tag to its elements in document order, so '//TAG/...'
+    and './/TAG/...' lookups only visit the elements with that tag instead
+    of walking the whole tree again.
+    """
+    
+    # Scoped './/TAG' lookups filter TAG elements by ancestry, which only beats
+    # a single XPath walk for tags that are rare in the document
+    SCOPED_LIMIT = 64
+    
+    def __init__(self, tree, tags):
+        self.tree = tree
+        self.root = tree.getroot()
+        self.elements = {tag: [] for tag in tags}   # tag -> elements in document order
+        self.nested = {}                            # tag -> whether the tag occurs inside itself
+        self.scoped = {}                            # (context, tag) -> elements with tag below context
+        
+        for elem in self.root.iter(*tags):
+            self.elements[elem.tag].append(elem)
+    
+    def descendants(self, context, tag):
+        """Return the elements with tag below context, in document order"""
+        if context is self.root:
+            return self.elements.get(tag, ())
+        key = (context, tag)
+        found = self.scoped.get(key)
+        if found is None:
+            found = [
+                elem for elem in self.elements.get(tag, ())
+                if any(parent is context for parent in elem.iterancestors(context.tag))
+            ]
+            self.scoped[key] = found
+        return found
+    
+    def self_nested(self, tag):
+        """Check whether an element with tag occurs inside another one with the same tag"""
+        nested = self.nested.get(tag)
+        if nested is None:
+            nested = any(
+                next(elem.iterancestors(tag), None) is not None for elem in self.elements.get(tag, ())
+            )
+            self.nested[tag] = nested
+        return nested
+
+
+def preferred_celex(celex_values):
+    """Pick the CELEX of the original act (starting with '3'), else the first one"""
+    for val in celex_values:
+        if val and val.strip().startswith('3'):
+            return val.strip()
+    if celex_values:
+        return celex_values[0].strip() if celex_values[0] else None
+    return None
+
+
+class CelexIndex:
+    """
+    CELEX -> WORK lookups for one document.
+    
+    Holds the RESOURCE_LEGAL_ID_CELEX values of every WORK (including those of
+    its embedded WORKs, as './/RESOURCE_LEGAL_ID_CELEX' sees them), so main
+    work selection and CELEX resolution are dictionary lookups.
+    """
+    
+    VALUE_TEXT = etree.XPath('VALUE/text()', smart_strings=False)
+    
+    def __init__(self, works, values):
+        """
+        Args:
+            works: All WORKs in document order
+            values: WORK -> CELEX values, for WORKs with a RESOURCE_LEGAL_ID_CELEX
+        """
+        self.works = works
+        self.values = values
+        self.with_celex = [work for work in works if work in values]
+        self.by_celex = {}       # CELEX -> first WORK containing it
+        self.original = None     # first WORK with a CELEX starting with '3'
+        self.preferred = {}      # WORK -> its preferred CELEX
+        
+        for work in self.with_celex:
+            for celex in values[work]:
+                self.by_celex.setdefault(celex, work)
+                if self.original is None and celex and celex.startswith('3'):
+                    self.original = work
+            self.preferred[work] = preferred_celex(values[work])
+    
+    @classmethod
+    def from_tree(cls, tree):
+        """Build the index in a single pass over WORK and RESOURCE_LEGAL_ID_CELEX elements"""
+        works = []
+        values = {}
+        for elem in tree.getroot().iter('WORK', 'RESOURCE_LEGAL_ID_CELEX'):
+            if elem.tag == 'WORK':
+                works.append(elem)
+                continue
+            texts = cls.VALUE_TEXT(elem)
+            for work in elem.iterancestors('WORK'):
+                values.setdefault(work, []).extend(texts)
+        return cls(works, values)
+    
+    def main_work(self, celex_hint=None):
+        """
+        Strategy:
+        1. The first WORK containing celex_hint
+        2. The first WORK with a CELEX starting with '3' (original acts)
+        3. The first WORK with a CELEX, else the first WORK
+        """
+        if celex_hint and celex_hint in self.by_celex:
+            return self.by_celex[celex_hint]
+        if self.original is not None:
+            return self.original
+        works = self.with_celex or self.works
+        return works[0] if works else None
+
+
+class LanguageSummary:
+    """
+    Language signals of one document: EXPRESSION_USES_LANGUAGE identifiers,
+    LANG elements and xml:lang/lang attributes.
+    """
+    
+    def __init__(self):
+        self.languages = set()
+        self.expressions = {}    # EXPRESSION -> its EXPRESSION_USES_LANGUAGE identifier
+        self.titles = None       # Leading EXPRESSION_TITLE values, when EXPRESSIONs are pruned
+    
+    @classmethod
+    def from_tree(cls, tree):
+        """Collect all three signals in a single traversal"""
+        summary = cls()
+        for elem in tree.getroot().iter(etree.Element):
+            tag = elem.tag
+            if tag == 'IDENTIFIER':
+                uri = elem.getparent()
+                use = uri.getparent() if uri.tag == 'URI' else None
+                if use is not None and use.tag == 'EXPRESSION_USES_LANGUAGE':
+                    summary.add_expression_language(elem.text)
+                    expression = use.getparent()
+                    if expression is not None and expression.tag == 'EXPRESSION':
+                        summary.expressions.setdefault(expression, elem.text)
+            elif tag == 'LANG':
+                summary.add_lang_tag(elem.text)
+            if elem.attrib:
+                summary.add_attribute(elem.get(XML_LANG))
+                summary.add_attribute(elem.get('lang'))
+        return summary
+    
+    def add_expression_language(self, text):
+        """Add a language URI/code (e.g. 'ENG' from .../language/ENG)"""
+        if text:
+            lang = text.strip().split('/')[-1].lower()
+            if len(lang) == 3:
+                self.languages.add(lang)
+    
+    def add_lang_tag(self, text):
+        """Add the content of a LANG element"""
+        if text and len(text.strip()) == 3:
+            self.languages.add(text.strip().lower())
+    
+    def add_attribute(self, lang):
+        """Add an xml:lang or lang attribute value"""
+        if lang and len(lang) in [2, 3]:
+            self.languages.add(lang.lower())
+    
+    def codes(self):
+        """Sorted language codes"""
+        return sorted(self.languages)
+    
+    def expression_language(self, expression):
+        """Language identifier of an EXPRESSION (stripped), None if it has none"""
+        text = self.expressions.get(expression)
+        return text.strip() if text else None
+
+
+class SubtreePruner:
+    """
+    Parse-time filter for the subtrees build_metadata_json does not read.
+    
+    MANIFESTATION subtrees (PDF/FMX/XHTML item lists) are always dropped, and
+    so are the EXPRESSIONs whose language is not selected. The language
+    signals of a dropped subtree go to a LanguageSummary first, so the
+    available languages of a document do not depend on the pruning. So do
+    the leading EXPRESSION titles the primary title falls back to.
+    """
+    
+    TAGS = ('EXPRESSION', 'MANIFESTATION')
+    EXPRESSION_LANGUAGE = 'EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER'
+    
+    # Language signals of a subtree (see LanguageSummary.from_tree)
+    SUBTREE_EXPRESSION_LANGUAGES = etree.XPath('descendant-or-self::EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER')
+    SUBTREE_LANG_TAGS = etree.XPath('descendant-or-self::LANG')
+    SUBTREE_LANG_ATTRIBUTES = etree.XPath('descendant-or-self::*/@xml:lang | descendant-or-self::*/@lang')
+    SUBTREE_TITLES = etree.XPath('descendant-or-self::EXPRESSION_TITLE/VALUE')
+    
+    # EXPRESSION titles read by the primary title fallback (see extract_title)
+    FALLBACK_TITLES = 2
+    
+    def __init__(self, languages=None):
+        """
+        Args:
+            languages: Language codes of the EXPRESSIONs to keep ('eng', 'fra', ...),
+                       None to keep every EXPRESSION and only drop MANIFESTATIONs.
+                       English is always kept: the primary title is read from it.
+        """
+        self.languages = frozenset(lang.lower() for lang in languages) | {'eng'} if languages is not None else None
+        self.parser = None
+    
+    def __getstate__(self):
+        # The pull parser cannot be pickled; each process creates its own
+        state = self.__dict__.copy()
+        state['parser'] = None
+        return state
+    
+    def prunes(self, elem):
+        """True if elem (a MANIFESTATION or EXPRESSION) is to be dropped"""
+        if elem.tag == 'MANIFESTATION':
+            return True
+        if self.languages is None:
+            return False
+        text = elem.findtext(self.EXPRESSION_LANGUAGE)
+        # Expressions without a language are kept
+        return bool(text and text.strip()) and text.strip().split('/')[-1].lower() not in self.languages
+    
+    def drop(self, elem, summary):
+        """Record the language signals of a subtree, then free it"""
+        for identifier in self.SUBTREE_EXPRESSION_LANGUAGES(elem):
+            summary.add_expression_language(identifier.text)
+        for lang in self.SUBTREE_LANG_TAGS(elem):
+            summary.add_lang_tag(lang.text)
+        for lang in self.SUBTREE_LANG_ATTRIBUTES(elem):
+            summary.add_attribute(str(lang))
+        elem.clear()
+    
+    def note_titles(self, elem, summary):
+        """Record the titles of an EXPRESSION until the fallback has all it reads"""
+        if summary.titles is None:
+            summary.titles = []
+        if len(summary.titles) < self.FALLBACK_TITLES:
+            summary.titles.extend(value.text for value in self.SUBTREE_TITLES(elem))
+    
+    def parse(self, xml_path, data=None):
+        """
+        Parse a notice (or its read-ahead bytes) without its pruned subtrees.
+        
+        Returns:
+            tuple: (lxml tree, LanguageSummary of the dropped subtrees)
+        """
+        # One pull parser is reused for every document: a fresh iterparse per
+        # document sits in a reference cycle and keeps its tree until the next
+        # garbage collection
+        if self.parser is None:
+            self.parser = etree.XMLPullParser(
+                events=('end',), tag=self.TAGS, remove_blank_text=True, huge_tree=True
+            )
+        parser = self.parser
+        summary = LanguageSummary()
+        dropped = []
+        try:
+            with open_notice(xml_path, data) as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    parser.feed(chunk)
+                    for _, elem in parser.read_events():
+                        if elem.tag == 'EXPRESSION' and self.languages is not None:
+                            self.note_titles(elem, summary)
+                        if self.prunes(elem):
+                            self.drop(elem, summary)
+                            dropped.append(elem)
+            root = parser.close()
+        except Exception:
+            self.parser = None
+            raise
+        
+        # Unlink the emptied subtrees once the parser is done with their parents
+        for elem in dropped:
+            parent = elem.getparent()
+            if parent is not None:
+                parent.remove(elem)
+        return etree.ElementTree(root), summary
+    
+    def events(self, context, summary):
+        """
+        Filter iterparse ('start'/'end', elem) events of pruned subtrees.
+        
+        An EXPRESSION's language is only known once it has been read, so its
+        events are held back until its end and then replayed or dropped.
+        """
+        skipped = None      # MANIFESTATION being skipped
+        held = None         # EXPRESSION being held back, and its events
+        held_events = []
+        
+        for event, elem in context:
+            if skipped is not None:
+                if event == 'end' and elem is skipped:
+                    self.drop(elem, summary)
+                    skipped = None
+                continue
+            if event == 'start' and elem.tag == 'MANIFESTATION':
+                skipped = elem
+                continue
+            
+            if held is not None:
+                if event == 'end' and elem is held:
+                    self.note_titles(elem, summary)
+                    if self.prunes(elem):
+                        self.drop(elem, summary)
+                    else:
+                        held_events.append((event, elem))
+                        yield from held_events
+                    held = None
+                    held_events = []
+                else:
+                    held_events.append((event, elem))
+                continue
+            if event == 'start' and elem.tag == 'EXPRESSION' and self.languages is not None:
+                held = elem
+                held_events.append((event, elem))
+                continue
+            
+            yield event, elem
+
 
 class ArticleReferenceParser:
-    """Parse article references from case law annotations"""
+    """
+    Parse article references from case law annotations.
+    
+    Results are memoized on the raw string (the same references repeat across
+    the whole corpus), so the returned dicts are shared and must not be modified.
+    """
     
     # Regex patterns
     SIMPLE_PATTERN = re.compile(r'^A(\d+)(?:P(\d+))?$')
     COMPLEX_PATTERN = re.compile(
         r'\{AR\|[^\}]*\}\s*(\d+)(?:\s*\{PA\|[^\}]*\}\s*(\d+))?(?:\s*\{PTA\|[^\}]*\}\s*\(([^\)]+)\))?'
     )
+    NUMBER_PATTERN = re.compile(r'\b(\d+)\b')
+    
+    # Placeholder for case law entries without article references
+    NOT_SPECIFIED = {
+        'raw': 'Not specified',
+        'parsed': 'Not specified',
+        'type': 'none',
+        'components': {}
+    }
+    
+    # Memo cache: raw reference -> parsed dict, oldest entries evicted first
+    CACHE_SIZE = 100000
+    _cache = {}
+    
+    # Raw references seen since collect_references(), None when not collecting
+    _seen = None
     
     @classmethod
     def parse(cls, reference):
         """
-        Parse article reference into structured format.
+        Parse article reference into structured format (memoized).
         
         Args:
             reference: Raw reference string
@@ -40,6 +758,60 @@ class ArticleReferenceParser:
         Returns:
             dict with raw, parsed, components, and type
         """
+        if cls._seen is not None:
+            cls._seen.add(reference)
+        
+        parsed = cls._cache.get(reference)
+        if parsed is None:
+            parsed = cls.parse_uncached(reference)
+            if len(cls._cache) >= cls.CACHE_SIZE:
+                del cls._cache[next(iter(cls._cache))]
+            cls._cache[reference] = parsed
+        return parsed
+    
+    @classmethod
+    def parse_many(cls, references):
+        """Parse a list of raw references, in order"""
+        return [cls.parse(reference) for reference in references]
+    
+    @classmethod
+    def collect_references(cls):
+        """Start recording every raw reference parsed, for normalization_table()"""
+        if cls._seen is None:
+            cls._seen = set()
+    
+    @classmethod
+    def drain_references(cls):
+        """Return the raw references recorded since the last drain and reset the record"""
+        if cls._seen is None:
+            return set()
+        seen, cls._seen = cls._seen, set()
+        return seen
+    
+    @classmethod
+    def stop_collecting(cls):
+        """Stop recording raw references and return those not drained yet"""
+        seen = cls.drain_references()
+        cls._seen = None
+        return seen
+    
+    @classmethod
+    def normalization_table(cls, references):
+        """Build the raw -> parsed table for the given raw references, sorted by raw string"""
+        return {reference: cls.parse_uncached(reference)
+                for reference in sorted(ref for ref in references if ref is not None)}
+    
+    @classmethod
+    def save_normalization_table(cls, output_path, references):
+        """Save normalization_table() as JSON"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(cls.normalization_table(references), f, indent=2, ensure_ascii=False)
+    
+    @classmethod
+    def parse_uncached(cls, reference):
+        """Parse article reference without the memo cache"""
         if not reference or reference == 'Not specified':
             return {
                 'raw': reference,
@@ -94,7 +866,7 @@ class ArticleReferenceParser:
             }
         
         # Try to extract any numbers as potential articles
-        number_match = re.search(r'\b(\d+)\b', reference)
+        number_match = cls.NUMBER_PATTERN.search(reference)
         if number_match:
             article = number_match.group(1)
             return {
@@ -113,22 +885,1482 @@ class ArticleReferenceParser:
         }
 
 
+class CompactSchema:
+    """
+    Compact form of the metadata JSON (--schema compact).
+    
+    A field holding its full-schema default ('Not found', 'No label',
+    'unknown', an empty array, ...) is omitted, arrays are deduplicated
+    (first occurrence kept), available_languages (a copy of
+    document.languages) and the constant implementation status are dropped,
+    and case law keeps its raw 'articles' with their 'parsed' texts instead
+    of the parsedArticles objects and the 'Not specified' placeholder.
+    
+    expand() maps a compact document back to the full schema; the only
+    difference to the original is that arrays stay deduplicated, and so do
+    the counts in 'stats'.
+    """
+    
+    NAME = 'compact/1'
+    
+    # Full-schema defaults of the section fields, in output order
+    SECTION_DEFAULTS = {
+        'title': {
+            'primary': 'Not found', 'work': 'Not found',
+            'alternative': [], 'subtitle': [], 'short': [], 'multilingual': {}
+        },
+        'dates': dict.fromkeys(
+            ('document', 'publication', 'signature', 'entryIntoForce', 'endOfValidity',
+             'transpositionDeadline'), 'Not found'
+        ),
+        'identifiers': dict.fromkeys(
+            ('celex', 'eli', 'ojReference', 'immc', 'naturalNumber', 'type', 'year', 'sector'), 'Not found'
+        ),
+        'eurovoc': {'concepts': [], 'domains': [], 'microthesaurus': [], 'terms': []},
+        'legalRelations': {
+            'basedOn': [], 'cites': [], 'amends': [], 'repeals': [],
+            'consolidatedBy': [], 'correctedBy': [], 'treatyBasis': []
+        },
+        'metadata': dict.fromkeys(
+            ('createdBy', 'responsibleAgent', 'inForce', 'subjectMatter', 'dossierReference',
+             'version', 'lastModified'), 'Not found'
+        )
+    }
+    
+    # Item fields; REQUIRED fields are always written
+    REQUIRED = object()
+    EUROVOC_ITEM_DEFAULTS = {'id': REQUIRED, 'label': 'No label', 'language': 'unknown'}
+    CASE_DEFAULTS = {'celexId': REQUIRED, 'ecli': None, 'articles': None, 'parsedArticles': None, 'type': REQUIRED}
+    IMPLEMENTATION_DEFAULTS = {'identifier': REQUIRED, 'country': 'Unknown', 'status': 'Implemented'}
+    
+    @staticmethod
+    def unique(values):
+        """Values without repeats, in first-occurrence order"""
+        seen = set()
+        result = []
+        for value in values:
+            key = json.dumps(value, sort_keys=True) if isinstance(value, dict) else value
+            if key not in seen:
+                seen.add(key)
+                result.append(value)
+        return result
+    
+    @classmethod
+    def compact_fields(cls, data, defaults):
+        """Drop the fields holding their default, deduplicate arrays (also inside objects)"""
+        result = {}
+        for key, value in data.items():
+            if isinstance(value, list):
+                value = cls.unique(value)
+            elif isinstance(value, dict):
+                value = {name: cls.unique(items) if isinstance(items, list) else items
+                         for name, items in value.items()}
+            if key not in defaults or value != defaults[key]:
+                result[key] = value
+        return result
+    
+    @staticmethod
+    def expand_fields(data, defaults):
+        """Put back the omitted fields with their default, in full-schema order"""
+        result = {}
+        for key, default in defaults.items():
+            if key in data:
+                result[key] = data[key]
+            elif isinstance(default, (list, dict)):
+                result[key] = type(default)()
+            else:
+                result[key] = default
+        result.update((key, value) for key, value in data.items() if key not in defaults)
+        return result
+    
+    @classmethod
+    def compact_case(cls, case):
+        """Case law entry without its article placeholders and parsedArticles"""
+        result = cls.compact_fields(
+            {key: value for key, value in case.items() if key not in ('articles', 'parsedArticles')},
+            cls.CASE_DEFAULTS
+        )
+        articles = case.get('articles', [])
+        if articles != [ArticleReferenceParser.NOT_SPECIFIED['raw']]:
+            parsed = dict(zip(articles, (article['parsed'] for article in case.get('parsedArticles', []))))
+            result['articles'] = cls.unique(articles)
+            result['parsed'] = [parsed.get(raw) for raw in result['articles']]
+        return result
+    
+    @classmethod
+    def expand_case(cls, case):
+        """Full-schema case law entry (articles re-parsed from their raw form)"""
+        case = dict(case)
+        case.pop('parsed', None)
+        articles = case.pop('articles', None)
+        if articles:
+            case['articles'] = articles
+            case['parsedArticles'] = ArticleReferenceParser.parse_many(articles)
+        else:
+            case['articles'] = [ArticleReferenceParser.NOT_SPECIFIED['raw']]
+            case['parsedArticles'] = [dict(ArticleReferenceParser.NOT_SPECIFIED)]
+        return cls.expand_fields(case, cls.CASE_DEFAULTS)
+    
+    @classmethod
+    def compact(cls, metadata):
+        """Compact form of a full-schema metadata dict"""
+        document = {}
+        for section, data in metadata['document'].items():
+            if section in cls.SECTION_DEFAULTS:
+                if section == 'eurovoc':
+                    data = {category: [cls.compact_fields(item, cls.EUROVOC_ITEM_DEFAULTS)
+                                       if isinstance(item, dict) else item for item in items]
+                            for category, items in data.items()}
+                document[section] = cls.compact_fields(data, cls.SECTION_DEFAULTS[section])
+            elif section == 'caselaw':
+                document[section] = cls.unique(cls.compact_case(case) for case in data)
+            elif section == 'implementation':
+                document[section] = cls.unique(
+                    cls.compact_fields(item, cls.IMPLEMENTATION_DEFAULTS) for item in data
+                )
+            else:
+                document[section] = cls.unique(data) if isinstance(data, list) else data
+        
+        compact = {'schema': cls.NAME}
+        compact.update((key, value) for key, value in metadata.items()
+                       if key not in ('content_hash', 'available_languages', 'document', 'stats'))
+        compact['document'] = document
+        # Counted again on the deduplicated document
+        compact['stats'] = CellarXMLParser.calculate_stats(cls.expand_document(document))
+        return compact
+    
+    @classmethod
+    def expand_document(cls, compact_document):
+        """Full-schema 'document' of a compact one"""
+        document = {}
+        for section, data in compact_document.items():
+            if section in cls.SECTION_DEFAULTS:
+                data = cls.expand_fields(data, cls.SECTION_DEFAULTS[section])
+                if section == 'eurovoc':
+                    data = {category: [cls.expand_fields(item, cls.EUROVOC_ITEM_DEFAULTS)
+                                       if isinstance(item, dict) else item for item in items]
+                            for category, items in data.items()}
+            elif section == 'caselaw':
+                data = [cls.expand_case(case) for case in data]
+            elif section == 'implementation':
+                data = [cls.expand_fields(item, cls.IMPLEMENTATION_DEFAULTS) for item in data]
+            document[section] = data
+        return document
+    
+    @classmethod
+    def expand(cls, compact):
+        """Full-schema metadata dict of a compact one"""
+        document = cls.expand_document(compact['document'])
+        metadata = {key: value for key, value in compact.items()
+                    if key not in ('content_hash', 'schema', 'document', 'stats')}
+        if 'languages' in document:
+            metadata['available_languages'] = list(document['languages'])
+        metadata['document'] = document
+        metadata['stats'] = compact['stats']
+        return metadata
+
+
+class ExtractionCache:
+    """
+    Persistent extraction cache (SQLite).
+    
+    Outputs are keyed on (sha256 of the notice, sha256 of the XPath config,
+    extractor version, output format, output path), so unchanged notices are
+    skipped and a config change re-extracts exactly the documents it affects,
+    while a run into another format or corpus file re-extracts everything it
+    does not hold yet. Notice digests are kept with
+    the file size and mtime and only recomputed when the file changed. They
+    are taken over the decompressed XML, so compressing a notice does not make
+    it a new document.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS notices (
+                xml_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                xml_sha256 TEXT NOT NULL
+            );
+            -- Extractions recorded without their output format (extractor 2.2 and earlier)
+            DROP TABLE IF EXISTS extractions;
+            CREATE TABLE IF NOT EXISTS outputs (
+                xml_sha256 TEXT NOT NULL,
+                config_sha256 TEXT NOT NULL,
+                extractor_version TEXT NOT NULL,
+                output_format TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                extracted_at TEXT NOT NULL,
+                PRIMARY KEY (xml_sha256, config_sha256, extractor_version, output_format, output_path)
+            );
+        """)
+        self.pending = 0
+    
+    @staticmethod
+    def file_sha256(path):
+        """sha256 of a notice's XML (decompressed if needed), read in 1 MB chunks"""
+        digest = hashlib.sha256()
+        with open_notice(path) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def notice_digest(self, xml_path):
+        """sha256 of a notice, rehashed only if its size or mtime changed"""
+        key = str(Path(xml_path).resolve())
+        stat = Path(xml_path).stat()
+        row = self.conn.execute(
+            'SELECT size, mtime_ns, xml_sha256 FROM notices WHERE xml_path = ?', (key,)
+        ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        
+        digest = self.file_sha256(xml_path)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO notices (xml_path, size, mtime_ns, xml_sha256) VALUES (?, ?, ?, ?)',
+            (key, stat.st_size, stat.st_mtime_ns, digest)
+        )
+        self.mark_pending()
+        return digest
+    
+    def lookup(self, xml_digest, config_hash, output_format='json', output_file=None,
+               version=EXTRACTOR_VERSION):
+        """
+        Return the output path of a cached extraction if it still exists, else None.
+        
+        output_file: corpus file of the 'jsonl' and 'sqlite' formats; only an
+                     extraction written to that same file counts
+        """
+        sql = ('SELECT output_path FROM outputs WHERE xml_sha256 = ? AND config_sha256 = ? '
+               'AND extractor_version = ? AND output_format = ?')
+        params = (xml_digest, config_hash, version, output_format)
+        if output_file is not None:
+            sql += ' AND output_path = ?'
+            params += (str(Path(output_file).resolve()),)
+        for (output_path,) in self.conn.execute(sql, params):
+            if Path(output_path).exists():
+                return Path(output_path)
+        return None
+    
+    def store(self, xml_digest, config_hash, output_path, output_format='json', version=EXTRACTOR_VERSION):
+        """Record a successful extraction"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO outputs '
+            '(xml_sha256, config_sha256, extractor_version, output_format, output_path, extracted_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (xml_digest, config_hash, version, output_format, str(Path(output_path).resolve()),
+             datetime.now().isoformat())
+        )
+        self.mark_pending()
+    
+    def forget(self, output_file):
+        """Drop the extractions recorded for a corpus file (e.g. about to be created anew)"""
+        self.conn.execute('DELETE FROM outputs WHERE output_path = ?', (str(Path(output_file).resolve()),))
+        self.commit()
+    
+    def mark_pending(self, batch_size=500):
+        """Commit every batch_size writes"""
+        self.pending += 1
+        if self.pending >= batch_size:
+            self.commit()
+    
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+    
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+def failure_class(error):
+    """Class name of the error behind a failure (the parse error a 'Failed to parse XML' wraps)"""
+    while type(error) is Exception and (error.__cause__ or error.__context__) is not None:
+        error = error.__cause__ or error.__context__
+    return type(error).__name__
+
+
+class FailureQuarantine:
+    """
+    Persistent store of notices that failed to extract (SQLite).
+    
+    Every quarantined notice is recorded with its sha256, size and mtime and
+    the class and message of its failure. Batches skip a quarantined notice
+    while its size and mtime are unchanged; a changed file is rehashed, and
+    only leaves the quarantine if its content really changed. Notices that
+    never failed cost a path lookup, no read. Transient failures (I/O,
+    memory, a missing package) are not quarantined.
+    """
+    
+    TRANSIENT = {'MemoryError', 'TimeoutError', 'InterruptedError', 'ConnectionError',
+                 'PermissionError', 'FileNotFoundError', 'ImportError', 'ModuleNotFoundError'}
+    MESSAGE_SIZE = 2000
+    
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS quarantine (
+                xml_path TEXT PRIMARY KEY,
+                xml_sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                error_type TEXT NOT NULL,
+                message TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                first_failed TEXT NOT NULL,
+                last_failed TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS quarantine_error_type ON quarantine (error_type);
+        """)
+        self.pending = 0
+    
+    def contains(self, xml_path):
+        """Whether a notice is quarantined with its current content"""
+        key = str(Path(xml_path).resolve())
+        row = self.conn.execute(
+            'SELECT xml_sha256, size, mtime_ns FROM quarantine WHERE xml_path = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return False
+        try:
+            stat = Path(xml_path).stat()
+            if row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+                return True
+            digest = ExtractionCache.file_sha256(xml_path)
+        except OSError:
+            return False
+        if digest != row[0]:
+            self.release(xml_path)
+            return False
+        # Touched but same content: remember the new size and mtime
+        self.conn.execute('UPDATE quarantine SET size = ?, mtime_ns = ? WHERE xml_path = ?',
+                          (stat.st_size, stat.st_mtime_ns, key))
+        self.mark_pending()
+        return True
+    
+    def add(self, xml_path, error_type, message):
+        """Quarantine a failed notice; False if the failure is transient or the file unreadable"""
+        if error_type in self.TRANSIENT:
+            return False
+        key = str(Path(xml_path).resolve())
+        try:
+            stat = Path(xml_path).stat()
+            digest = ExtractionCache.file_sha256(xml_path)
+        except OSError:
+            return False
+        now = datetime.now().isoformat()
+        self.conn.execute(
+            'INSERT INTO quarantine (xml_path, xml_sha256, size, mtime_ns, error_type, message, attempts, '
+            'first_failed, last_failed) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?) '
+            'ON CONFLICT (xml_path) DO UPDATE SET xml_sha256 = excluded.xml_sha256, size = excluded.size, '
+            'mtime_ns = excluded.mtime_ns, error_type = excluded.error_type, message = excluded.message, '
+            'attempts = attempts + 1, last_failed = excluded.last_failed',
+            (key, digest, stat.st_size, stat.st_mtime_ns, error_type, message[:self.MESSAGE_SIZE], now, now)
+        )
+        self.mark_pending()
+        return True
+    
+    def release(self, xml_path):
+        """Take a notice out of the quarantine (it changed or was extracted on a retry)"""
+        self.conn.execute('DELETE FROM quarantine WHERE xml_path = ?', (str(Path(xml_path).resolve()),))
+        self.mark_pending()
+    
+    def report(self, examples=5):
+        """
+        Quarantined notices grouped by error type, most frequent first.
+        
+        Returns:
+            list: {'error_type', 'count', 'examples': [{'xml_path', 'message', 'attempts', 'last_failed'}]}
+        """
+        self.commit()
+        groups = []
+        for error_type, count in self.conn.execute(
+            'SELECT error_type, COUNT(*) FROM quarantine GROUP BY error_type ORDER BY COUNT(*) DESC, error_type'
+        ).fetchall():
+            rows = self.conn.execute(
+                'SELECT xml_path, message, attempts, last_failed FROM quarantine WHERE error_type = ? '
+                'ORDER BY last_failed DESC LIMIT ?', (error_type, examples)
+            ).fetchall()
+            groups.append({
+                'error_type': error_type,
+                'count': count,
+                'examples': [
+                    {'xml_path': path, 'message': message, 'attempts': attempts, 'last_failed': last_failed}
+                    for path, message, attempts, last_failed in rows
+                ]
+            })
+        return groups
+    
+    def print_report(self, examples=5):
+        groups = self.report(examples)
+        total = sum(group['count'] for group in groups)
+        print(f"Quarantined documents: {total}")
+        for group in groups:
+            print(f"\n  {group['error_type']}: {group['count']}")
+            for example in group['examples']:
+                print(f"    - {Path(example['xml_path']).parent.name} "
+                      f"(x{example['attempts']}): {example['message'][:120]}")
+            if group['count'] > len(group['examples']):
+                print(f"    ... and {group['count'] - len(group['examples'])} more")
+    
+    def mark_pending(self, batch_size=500):
+        """Commit every batch_size writes"""
+        self.pending += 1
+        if self.pending >= batch_size:
+            self.commit()
+    
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+    
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class EurovocDictionary:
+    """
+    Corpus-level Eurovoc label dictionary (SQLite, read through mmap).
+    
+    With a dictionary, documents store only the IDs of their Eurovoc
+    concepts, domains, microthesauri and terms. The labels live here once per
+    (concept ID, language), filled from a local thesaurus file (SKOS RDF/XML,
+    load_thesaurus) and/or from the notices of each batch. Thesaurus labels
+    take precedence. Lookups read single index pages of the memory-mapped
+    file, so consumers resolve labels without loading the dictionary.
+    """
+    
+    SKOS = 'http://www.w3.org/2004/02/skos/core#'
+    RDF_ABOUT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about'
+    
+    def __init__(self, db_path, readonly=False, mmap_size=256 << 20):
+        self.db_path = Path(db_path)
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path))
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS labels (
+                    concept_id TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    PRIMARY KEY (concept_id, language)
+                ) WITHOUT ROWID;
+            """)
+        self.conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    
+    def ids(self):
+        """IDs with at least one label"""
+        return {row[0] for row in self.conn.execute('SELECT DISTINCT concept_id FROM labels')}
+    
+    def add(self, labels, source='notice'):
+        """
+        Add (concept ID, language, label) triples. Notice labels never replace
+        existing ones; thesaurus labels replace notice labels.
+        
+        Returns:
+            int: Number of triples given
+        """
+        labels = list(labels)
+        if not labels:
+            return 0
+        if source == 'thesaurus':
+            self.conn.executemany(
+                'INSERT INTO labels (concept_id, language, label, source) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (concept_id, language) DO UPDATE SET label = excluded.label, source = excluded.source',
+                [(concept_id, language, label, source) for concept_id, language, label in labels]
+            )
+        else:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO labels (concept_id, language, label, source) VALUES (?, ?, ?, ?)',
+                [(concept_id, language, label, source) for concept_id, language, label in labels]
+            )
+        self.conn.commit()
+        return len(labels)
+    
+    def load_thesaurus(self, thesaurus_path, languages=None, batch_size=10000):
+        """
+        Load the preferred labels of a Eurovoc SKOS RDF/XML file (also .gz/.zst).
+        
+        Every element with an rdf:about URI and skos:prefLabel children gives
+        the labels of the ID at the end of the URI
+        (http://eurovoc.europa.eu/1234 -> 1234). Parsed elements are dropped as
+        the file streams by, so memory stays flat whatever its size.
+        
+        Args:
+            thesaurus_path: SKOS file, e.g. eurovoc_in_skos_core_concepts.rdf
+            languages: Only load these xml:lang codes (default: all)
+        
+        Returns:
+            int: Number of labels loaded
+        """
+        total = 0
+        batch = []
+        with open_notice(thesaurus_path) as source:
+            for _, elem in etree.iterparse(source, tag=f"{{{self.SKOS}}}prefLabel", huge_tree=True):
+                concept = elem.getparent()
+                about = concept.get(self.RDF_ABOUT)
+                language = elem.get(XML_LANG)
+                if about and elem.text and (languages is None or language in languages):
+                    batch.append((about.rstrip('/').rsplit('/', 1)[-1], language or 'unknown', elem.text.strip()))
+                # Drop the concept's children parsed so far and the concepts before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del concept[0]
+                parent = concept.getparent()
+                if parent is not None:
+                    while concept.getprevious() is not None:
+                        del parent[0]
+                if len(batch) >= batch_size:
+                    total += self.add(batch, 'thesaurus')
+                    batch = []
+        return total + self.add(batch, 'thesaurus')
+    
+    def labels(self, concept_id):
+        """Language -> label of one ID"""
+        return dict(self.conn.execute(
+            'SELECT language, label FROM labels WHERE concept_id = ?', (concept_id,)
+        ).fetchall())
+    
+    def label(self, concept_id, language=None):
+        """
+        Label of one ID in the given language (default or missing: the first
+        one stored); (None, None) if the ID has no label.
+        
+        Returns:
+            tuple: (label, language)
+        """
+        labels = self.labels(concept_id)
+        if language in labels:
+            return labels[language], language
+        for other, label in sorted(labels.items()):
+            return label, other
+        return None, None
+    
+    def expand(self, eurovoc, language=None):
+        """Full-schema eurovoc section ({id, label, language} items) of an IDs-only one"""
+        expanded = {}
+        for category, ids in eurovoc.items():
+            items = []
+            for concept_id in ids:
+                label, label_language = self.label(concept_id, language)
+                items.append({'id': concept_id, 'label': label or 'No label', 'language': label_language or 'unknown'})
+            expanded[category] = items
+        return expanded
+    
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class JsonlCorpusWriter:
+    """
+    Single writer of the consolidated JSONL output.
+    
+    Every document is one compact JSON line. A '.zst' output gets one zstd frame
+    per document (the concatenation is a regular .zst stream), so the offset
+    index '<output>.idx' (CELEX, offset, length per line) can address each
+    document without scanning or decompressing the rest of the file.
+    """
+    
+    FORMAT = 'jsonl'
+    
+    def __init__(self, output_file, append=False):
+        """
+        Args:
+            output_file: corpus.jsonl or corpus.jsonl.zst
+            append: Keep the existing documents (and index) and add new ones after them
+        """
+        self.path = Path(output_file)
+        self.index_path = self.index_file(self.path)
+        self.compressor = None
+        if self.path.suffix == '.zst':
+            if zstandard is None:
+                raise ValueError("Writing .zst output requires the 'zstandard' package (pip install zstandard)")
+            self.compressor = zstandard.ZstdCompressor(level=3)
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'a' if append else 'w'
+        self.file = open(self.path, mode + 'b', buffering=1 << 20)
+        self.index = open(self.index_path, mode, encoding='utf-8')
+        self.offset = self.file.tell()
+        self.count = 0
+    
+    @staticmethod
+    def index_file(output_file):
+        return Path(str(output_file) + '.idx')
+    
+    @staticmethod
+    def encode(data):
+        """One compact JSON line (bytes)"""
+        return (json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+    
+    def write_encoded(self, celex, line, source=None):
+        """Append an encoded line and its index entry"""
+        payload = self.compressor.compress(line) if self.compressor is not None else line
+        self.file.write(payload)
+        self.index.write(f"{celex}\t{self.offset}\t{len(payload)}\n")
+        self.offset += len(payload)
+        self.count += 1
+    
+    def write(self, celex, data):
+        self.write_encoded(celex, self.encode(data))
+    
+    def close(self):
+        self.file.close()
+        self.index.close()
+    
+    @classmethod
+    def load_index(cls, output_file):
+        """CELEX -> (offset, length) of its latest line"""
+        index = {}
+        with open(cls.index_file(output_file), 'r', encoding='utf-8') as f:
+            for line in f:
+                celex, offset, length = line.rstrip('\n').split('\t')
+                index[celex] = (int(offset), int(length))
+        return index
+    
+    @classmethod
+    def read_document(cls, output_file, celex, index=None):
+        """
+        Fetch one document by CELEX through the offset index.
+        
+        Returns:
+            dict, or None if the CELEX is not in the corpus
+        """
+        if index is None:
+            index = cls.load_index(output_file)
+        if celex not in index:
+            return None
+        offset, length = index[celex]
+        with open(output_file, 'rb') as f:
+            f.seek(offset)
+            payload = f.read(length)
+        if str(output_file).endswith('.zst'):
+            if zstandard is None:
+                raise ValueError("Reading .zst output requires the 'zstandard' package (pip install zstandard)")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        return json.loads(payload)
+
+
+class SqliteCorpusWriter:
+    """
+    Single writer of the SQLite output: one database of normalized tables that
+    the reader app opens as is.
+    
+    Documents are inserted in batched transactions with the database in WAL
+    mode; the indexes are only created once the load is done (bulk inserts into
+    unindexed tables are much faster), after which the WAL is checkpointed and
+    the database switched back to a single-file journal.
+    
+    'Not found' / 'No label' / 'unknown' placeholders of the JSON output are
+    stored as NULL, and missing dates and identifiers get no row at all.
+    """
+    
+    FORMAT = 'sqlite'
+    BATCH_SIZE = 500    # documents per transaction
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            celex TEXT,
+            type TEXT,
+            year INTEGER,
+            sector TEXT,
+            in_force INTEGER,
+            title TEXT,
+            work_title TEXT,
+            selected_language TEXT,
+            languages TEXT,
+            created_by TEXT,
+            responsible_agent TEXT,
+            subject_matter TEXT,
+            dossier_reference TEXT,
+            version TEXT,
+            last_modified TEXT,
+            extracted_at TEXT,
+            source_path TEXT
+        );
+        CREATE TABLE IF NOT EXISTS titles (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            kind TEXT NOT NULL,
+            language TEXT,
+            title TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dates (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            kind TEXT NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS identifiers (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS eurovoc_items (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            category TEXT NOT NULL,
+            concept_id TEXT NOT NULL,
+            label TEXT,
+            language TEXT
+        );
+        CREATE TABLE IF NOT EXISTS caselaw_links (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            case_celex TEXT NOT NULL,
+            ecli TEXT,
+            type TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS caselaw_articles (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            link_position INTEGER NOT NULL,
+            raw TEXT NOT NULL,
+            parsed TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            article INTEGER,
+            paragraph INTEGER,
+            point TEXT
+        );
+        CREATE TABLE IF NOT EXISTS legal_relations (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            relation TEXT NOT NULL,
+            target TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS implementations (
+            document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            identifier TEXT NOT NULL,
+            country TEXT,
+            status TEXT
+        );
+    """
+    
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS documents_celex ON documents(celex);
+        CREATE INDEX IF NOT EXISTS documents_type ON documents(type);
+        CREATE INDEX IF NOT EXISTS documents_year ON documents(year);
+        CREATE INDEX IF NOT EXISTS documents_in_force ON documents(in_force);
+        CREATE INDEX IF NOT EXISTS documents_source_path ON documents(source_path);
+        CREATE INDEX IF NOT EXISTS titles_document ON titles(document_id);
+        CREATE INDEX IF NOT EXISTS dates_document ON dates(document_id);
+        CREATE INDEX IF NOT EXISTS identifiers_document ON identifiers(document_id);
+        CREATE INDEX IF NOT EXISTS eurovoc_items_document ON eurovoc_items(document_id);
+        CREATE INDEX IF NOT EXISTS eurovoc_items_concept ON eurovoc_items(concept_id);
+        CREATE INDEX IF NOT EXISTS caselaw_links_document ON caselaw_links(document_id);
+        CREATE INDEX IF NOT EXISTS caselaw_links_case ON caselaw_links(case_celex);
+        CREATE INDEX IF NOT EXISTS caselaw_articles_document ON caselaw_articles(document_id, link_position);
+        CREATE INDEX IF NOT EXISTS legal_relations_document ON legal_relations(document_id);
+        CREATE INDEX IF NOT EXISTS legal_relations_target ON legal_relations(target);
+        CREATE INDEX IF NOT EXISTS implementations_document ON implementations(document_id);
+    """
+    
+    # Child table -> its columns after document_id, in encode() row order
+    CHILD_TABLES = {
+        'titles': ('kind', 'language', 'title'),
+        'dates': ('kind', 'date'),
+        'identifiers': ('kind', 'value'),
+        'eurovoc_items': ('category', 'concept_id', 'label', 'language'),
+        'caselaw_links': ('position', 'case_celex', 'ecli', 'type'),
+        'caselaw_articles': ('link_position', 'raw', 'parsed', 'kind', 'article', 'paragraph', 'point'),
+        'legal_relations': ('relation', 'target'),
+        'implementations': ('identifier', 'country', 'status')
+    }
+    
+    DOCUMENT_COLUMNS = ('celex', 'type', 'year', 'sector', 'in_force', 'title', 'work_title',
+                        'selected_language', 'languages', 'created_by', 'responsible_agent',
+                        'subject_matter', 'dossier_reference', 'version', 'last_modified',
+                        'extracted_at')
+    
+    PLACEHOLDERS = ('Not found', 'No label', 'unknown')
+    
+    def __init__(self, output_file, append=False):
+        """
+        Args:
+            output_file: corpus.sqlite
+            append: Keep the existing documents; a re-extracted notice replaces its
+                    previous rows (matched on the notice path)
+        """
+        self.path = Path(output_file)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not append:
+            for suffix in ('', '-wal', '-shm'):
+                Path(str(self.path) + suffix).unlink(missing_ok=True)
+        
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(self.SCHEMA)
+        self.append = append
+        self.document_sql = (
+            f"INSERT INTO documents ({', '.join(self.DOCUMENT_COLUMNS)}, source_path) "
+            f"VALUES ({', '.join('?' * (len(self.DOCUMENT_COLUMNS) + 1))})"
+        )
+        self.child_sql = {
+            table: f"INSERT INTO {table} (document_id, {', '.join(columns)}) "
+                   f"VALUES ({', '.join('?' * (len(columns) + 1))})"
+            for table, columns in self.CHILD_TABLES.items()
+        }
+        self.count = 0
+        self.conn.execute('BEGIN')
+    
+    @classmethod
+    def value(cls, text):
+        """None for a placeholder, else the value itself"""
+        return None if text in cls.PLACEHOLDERS else text
+    
+    @staticmethod
+    def integer(text):
+        return int(text) if isinstance(text, str) and text.isdigit() else None
+    
+    @classmethod
+    def encode(cls, data):
+        """
+        Flatten a metadata dict into rows (runs in the worker processes).
+        Sections left out by --sections give NULL columns and no child rows.
+        
+        Returns:
+            dict: 'documents' -> the document row, child table -> list of rows
+        """
+        value = cls.value
+        doc = data['document']
+        title = doc.get('title', {})
+        identifiers = doc.get('identifiers', {})
+        metadata = doc.get('metadata', {})
+        in_force = value(metadata.get('inForce'))
+        
+        rows = {'documents': (
+            value(identifiers.get('celex')),
+            value(identifiers.get('type')),
+            cls.integer(identifiers.get('year')),
+            value(identifiers.get('sector')),
+            None if in_force is None else int(in_force.lower() in ('true', '1')),
+            value(title.get('primary')),
+            value(title.get('work')),
+            data['selected_language'],
+            ','.join(data['available_languages']) if 'available_languages' in data else None,
+            value(metadata.get('createdBy')),
+            value(metadata.get('responsibleAgent')),
+            value(metadata.get('subjectMatter')),
+            value(metadata.get('dossierReference')),
+            value(metadata.get('version')),
+            value(metadata.get('lastModified')),
+            datetime.now().isoformat()
+        )}
+        
+        titles = rows['titles'] = []
+        for kind in ('alternative', 'subtitle', 'short'):
+            titles.extend((kind, None, text) for text in title.get(kind, []))
+        for language, texts in title.get('multilingual', {}).items():
+            titles.extend(('multilingual', language, text) for text in texts)
+        
+        rows['dates'] = [(kind, date) for kind, date in doc.get('dates', {}).items() if value(date) is not None]
+        rows['identifiers'] = [
+            (kind, text) for kind, text in identifiers.items() if value(text) is not None
+        ]
+        rows['eurovoc_items'] = [
+            (category, item['id'], value(item['label']), value(item['language']))
+            if isinstance(item, dict) else (category, item, None, None)    # IDs only (EurovocDictionary)
+            for category, items in doc.get('eurovoc', {}).items()
+            for item in items
+        ]
+        
+        rows['caselaw_links'] = []
+        rows['caselaw_articles'] = []
+        for position, case in enumerate(doc.get('caselaw', [])):
+            rows['caselaw_links'].append((position, case['celexId'], case['ecli'], case['type']))
+            for article in case['parsedArticles']:
+                if article['type'] == 'none':
+                    continue
+                components = article['components']
+                rows['caselaw_articles'].append((
+                    position, article['raw'], article['parsed'], article['type'],
+                    components.get('article'), components.get('paragraph'), components.get('point')
+                ))
+        
+        rows['legal_relations'] = [
+            (relation, target)
+            for relation, targets in doc.get('legalRelations', {}).items()
+            for target in targets
+        ]
+        rows['implementations'] = [
+            (impl['identifier'], value(impl['country']), impl['status'])
+            for impl in doc.get('implementation', [])
+        ]
+        return rows
+    
+    def write_encoded(self, celex, rows, source=None):
+        """Insert the rows of one encoded document"""
+        if self.append and source is not None:
+            self.conn.execute('DELETE FROM documents WHERE source_path = ?', (str(source),))
+        cursor = self.conn.execute(self.document_sql, rows['documents'] + (
+            str(source) if source is not None else None,
+        ))
+        document_id = cursor.lastrowid
+        for table, sql in self.child_sql.items():
+            if rows[table]:
+                self.conn.executemany(sql, [(document_id,) + row for row in rows[table]])
+        
+        self.count += 1
+        if self.count % self.BATCH_SIZE == 0:
+            self.conn.execute('COMMIT')
+            self.conn.execute('BEGIN')
+    
+    def write(self, celex, data, source=None):
+        self.write_encoded(celex, self.encode(data), source)
+    
+    def close(self):
+        """Commit, index, and leave a single self-contained database file"""
+        self.conn.execute('COMMIT')
+        self.conn.executescript(self.INDEXES)
+        self.conn.execute('ANALYZE')
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.conn.execute('PRAGMA journal_mode=DELETE')
+        self.conn.close()
+
+
+# --output-format -> single writer class of the consolidated outputs
+CORPUS_WRITERS = {
+    JsonlCorpusWriter.FORMAT: JsonlCorpusWriter,
+    SqliteCorpusWriter.FORMAT: SqliteCorpusWriter
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+
+class StageProfiler:
+    """
+    Per-document stage timings of a batch (opt-in, see enable_profiling).
+    
+    The stage methods of the parser are wrapped on the instance, so a parser
+    without a profiler runs the plain methods with no overhead at all.
+    """
+    
+    # Parser method -> stage name, in pipeline order
+    STAGES = {
+        'parse_xml_file': 'parse',
+        'identify_main_work': 'main_work',
+        'detect_languages': 'languages',
+        'extract_title': 'title',
+        'extract_dates': 'dates',
+        'extract_identifiers': 'identifiers',
+        'extract_eurovoc': 'eurovoc',
+        'extract_caselaw': 'caselaw',
+        'extract_implementation': 'implementation',
+        'extract_legal_relations': 'legal_relations',
+        'extract_metadata': 'metadata',
+        'save_json': 'save',
+        'encode_document': 'encode'
+    }
+    
+    # Timed in the main process by the single corpus writer
+    WRITE_STAGE = 'write'
+    
+    def __init__(self):
+        self.current = None
+        self.documents = []    # (xml path, {stage: seconds, 'total': seconds})
+    
+    def stage_names(self):
+        return list(self.STAGES.values()) + [self.WRITE_STAGE, 'other']
+    
+    def wrap_stage(self, stage, method):
+        """Time every call of method into the current document's stage"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                if self.current is not None:
+                    self.current[stage] = self.current.get(stage, 0.0) + time.perf_counter() - start
+        return timed
+    
+    def wrap_document(self, method):
+        """Time method(xml_path, ...) as one document"""
+        def timed(xml_path, *args, **kwargs):
+            self.current = {}
+            start = time.perf_counter()
+            try:
+                return method(xml_path, *args, **kwargs)
+            finally:
+                self.current['total'] = time.perf_counter() - start
+                self.documents.append((str(xml_path), self.current))
+                self.current = None
+        return timed
+    
+    def add_time(self, xml_path, stage, seconds):
+        """Add a stage timed outside of the wrapped methods to a recorded document"""
+        for path, timings in reversed(self.documents):
+            if path == str(xml_path):
+                timings[stage] = timings.get(stage, 0.0) + seconds
+                timings['total'] += seconds
+                return
+    
+    def take(self):
+        """Return and forget the recorded documents (worker -> main process)"""
+        documents, self.documents = self.documents, []
+        return documents
+    
+    def summary(self):
+        """
+        Returns:
+            dict: stage -> {p50, p95, max (seconds), total (seconds), share of all document time}
+        """
+        grand_total = sum(timings['total'] for _, timings in self.documents) or 1.0
+        summary = {}
+        for stage in self.stage_names():
+            if stage == 'other':
+                values = [timings['total'] - sum(v for k, v in timings.items() if k != 'total')
+                          for _, timings in self.documents]
+            else:
+                values = [timings[stage] for _, timings in self.documents if stage in timings]
+            if not values:
+                continue
+            values.sort()
+            summary[stage] = {
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95),
+                'max': values[-1],
+                'total': sum(values),
+                'share': sum(values) / grand_total
+            }
+        return summary
+    
+    def print_summary(self, slowest=5):
+        """Print the stage table and the slowest documents"""
+        print(f"\nSTAGE PROFILE ({len(self.documents)} documents)")
+        print(f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'total s':>10}{'share':>8}")
+        for stage, row in self.summary().items():
+            print(f"{stage:<16}{row['p50'] * 1000:>10.2f}{row['p95'] * 1000:>10.2f}{row['max'] * 1000:>10.2f}"
+                  f"{row['total']:>10.2f}{row['share']:>8.1%}")
+        
+        print(f"\nSlowest documents:")
+        for path, timings in sorted(self.documents, key=lambda doc: doc[1]['total'], reverse=True)[:slowest]:
+            hottest = max((stage for stage in timings if stage != 'total'), key=timings.get, default='-')
+            print(f"  {timings['total'] * 1000:8.1f} ms  {Path(path).parent.name}  (hottest: {hottest})")
+    
+    def save_csv(self, csv_path):
+        """One row per document: path, total and every stage, in milliseconds"""
+        stages = [stage for stage in self.stage_names() if stage != 'other']
+        csv_path = Path(csv_path)
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['xml_path', 'total_ms'] + [f"{stage}_ms" for stage in stages])
+            for path, timings in self.documents:
+                writer.writerow([path, f"{timings['total'] * 1000:.3f}"] + [
+                    f"{timings[stage] * 1000:.3f}" if stage in timings else '' for stage in stages
+                ])
+
+
+class ExtractionResult:
+    """
+    Outcome of one document, as returned by process_document / process_for_batch.
+    
+    Unpacks as (success, output, error) like the tuples it replaces. stats
+    holds the counts also written as the document's 'stats', so nothing
+    needs to be read back from the output.
+    """
+    
+    def __init__(self, xml_path, success, output=None, error=None, error_type=None,
+                 celex=None, stats=None, timings=None, written=None):
+        self.xml_path = Path(xml_path)
+        self.success = success
+        self.output = output            # output path ('json'), (celex, encoded) for the single writer
+        self.error = error
+        self.error_type = error_type    # see failure_class; None for a crashed worker
+        self.celex = celex
+        self.stats = stats or {}
+        self.timings = timings or {}    # stage -> seconds: extract, save or encode (write), total
+        self.written = written          # 'json': False if the output was unchanged and not rewritten
+    
+    def __iter__(self):
+        return iter((self.success, self.output, self.error))
+
+
+class ExtractionAggregator:
+    """
+    Running totals of a batch, fed one ExtractionResult (or skip) at a time.
+    
+    Used by process_batch and the Streamlit UI; summary() is the statistics
+    dict process_batch returns.
+    """
+    
+    STATS = ('languages', 'cases', 'eurovoc', 'articles', 'relations', 'implementations')
+    
+    def __init__(self):
+        self.success = 0
+        self.failed = 0
+        self.skipped = 0
+        self.quarantined = 0
+        self.unchanged = 0
+        self.errors = []
+        self.totals = dict.fromkeys(self.STATS, 0)
+        self.timings = {}    # stage -> seconds, summed over the documents
+    
+    def add(self, result):
+        """Count an ExtractionResult"""
+        for stage, seconds in result.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        if result.success:
+            self.success += 1
+            if result.written is False:
+                self.unchanged += 1
+            for name, count in result.stats.items():
+                self.totals[name] = self.totals.get(name, 0) + count
+        else:
+            self.failed += 1
+            self.errors.append({
+                'file': str(result.xml_path),
+                'type': result.error_type,
+                'error': result.error
+            })
+    
+    def skip(self, quarantined=False):
+        """Count a document that was not processed"""
+        if quarantined:
+            self.quarantined += 1
+        else:
+            self.skipped += 1
+    
+    def average(self, name):
+        """Mean of a stat over the successful documents"""
+        return self.totals.get(name, 0) / self.success if self.success else 0
+    
+    def error_types(self):
+        """Error type -> number of failed documents, most frequent first"""
+        return Counter(err['type'] or 'worker crash' for err in self.errors).most_common()
+    
+    def summary(self):
+        """
+        Returns:
+            dict: success, failed, skipped, quarantined, unchanged (successful, but the output
+            file already held the same content), errors ({'file', 'type', 'error'}),
+            stats (totals over the successful documents) and timings (stage -> total seconds)
+        """
+        return {
+            'success': self.success,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'quarantined': self.quarantined,
+            'unchanged': self.unchanged,
+            'errors': self.errors,
+            'stats': dict(self.totals),
+            'timings': dict(self.timings)
+        }
+
+
 class CellarXMLParser:
     """Main parser for CELLAR tree XML notices"""
     
-    def __init__(self, config_path='cellar_xpath_config.json'):
-        """Initialize parser with XPath configuration"""
+    def __init__(self, config_path='cellar_xpath_config.json', title_languages=None):
+        """Initialize parser with XPath configuration (and the languages of title.multilingual)"""
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
+        self.pruner = None
+        self.sections = None
+        self.schema = 'full'
+        self.title_languages = self.resolve_languages(title_languages)
+        # Eurovoc IDs with a dictionary label (IDs-only output), see use_eurovoc_dictionary
+        self.eurovoc_known = None
+        self.eurovoc_labels = {}
+        self.config_hash = self.settings_hash()
+        self.compile_plan()
+        # fsync outputs before renaming them into place (see replace_file)
+        self.sync_outputs = True
+        
+        # Tag index of the document being processed (tree engine only)
+        self.use_tag_index = True
+        self.index = None
+        self.celex_index = None
+        self.language_summary = None
+        self.pruned_languages = None
+        self.profiler = None
+    
+    def __getstate__(self):
+        # Compiled XPaths cannot be pickled; worker processes recompile them once
+        state = self.__dict__.copy()
+        for key in ('plan', 'anchored', 'index', 'celex_index', 'language_summary', 'pruned_languages'):
+            del state[key]
+        # Profiled stage methods are rewrapped around a fresh profiler
+        if self.profiler is not None:
+            for name in list(StageProfiler.STAGES) + ['process_for_batch']:
+                state.pop(name, None)
+            state['profiler'] = StageProfiler()
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.compile_plan()
+        self.index = None
+        self.celex_index = None
+        self.language_summary = None
+        self.pruned_languages = None
+        if self.profiler is not None:
+            self.wrap_stages()
+    
+    def enable_profiling(self):
+        """Time every stage of every document processed by process_for_batch"""
+        self.profiler = StageProfiler()
+        self.wrap_stages()
+        return self.profiler
+    
+    def disable_profiling(self):
+        """Restore the unwrapped stage methods"""
+        for name in list(StageProfiler.STAGES) + ['process_for_batch']:
+            self.__dict__.pop(name, None)
+        self.profiler = None
+    
+    def wrap_stages(self):
+        for name, stage in StageProfiler.STAGES.items():
+            setattr(self, name, self.profiler.wrap_stage(stage, getattr(self, name)))
+        self.process_for_batch = self.profiler.wrap_document(self.process_for_batch)
+    
+    def settings_hash(self):
+        """sha256 of everything that shapes the output: the config, language/section selection and schema"""
+        settings = self.config
+        selection = {}
+        if self.pruner is not None:
+            languages = self.pruner.languages
+            selection['languages'] = sorted(languages) if languages is not None else 'all'
+        if self.sections is not None:
+            selection['sections'] = list(self.sections)
+        if self.schema != 'full':
+            selection['schema'] = self.schema
+        if self.title_languages is not None:
+            selection['title_languages'] = sorted(self.title_languages)
+        if self.eurovoc_known is not None:
+            selection['eurovoc'] = 'ids'
+        if selection:
+            settings = dict(selection, config=self.config)
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def select_languages(self, languages):
+        """
+        Prune subtrees at parse time: MANIFESTATIONs, and the EXPRESSIONs of
+        languages other than the given codes and English ('all' keeps every
+        EXPRESSION, None disables pruning).
+        """
+        if languages is None:
+            self.pruner = None
+        else:
+            self.pruner = SubtreePruner(None if languages == 'all' else languages)
+        self.config_hash = self.settings_hash()
+    
+    def select_sections(self, sections):
+        """
+        Only extract the given output sections (see SECTIONS; a list or a
+        comma-separated string, 'all' or None extracts everything). The
+        extractors of the other sections never run.
+        """
+        self.sections = self.resolve_sections(sections)
+        self.config_hash = self.settings_hash()
+    
+    def select_title_languages(self, languages):
+        """
+        Only put the titles of these language codes (e.g. eng,fra,deu; a list
+        or a comma-separated string) in title.multilingual; 'all' or None keeps
+        every language. The primary title is always the English one.
+        """
+        self.title_languages = self.resolve_languages(languages)
+        self.config_hash = self.settings_hash()
+    
+    @staticmethod
+    def resolve_languages(languages):
+        """Set of lowercase language codes, None for all of them"""
+        if languages is None or languages == 'all':
+            return None
+        if isinstance(languages, str):
+            languages = languages.split(',')
+        return {language.strip().lower() for language in languages if language.strip()}
+    
+    def select_schema(self, schema):
+        """Write the 'full' metadata JSON (default) or its 'compact' form (CompactSchema)"""
+        if schema not in SCHEMAS:
+            raise ValueError(f"Unknown schema: {schema} (available: {', '.join(SCHEMAS)})")
+        self.schema = schema
+        self.config_hash = self.settings_hash()
+    
+    def use_eurovoc_dictionary(self, known_ids):
+        """
+        Write only the IDs of the Eurovoc items (EurovocDictionary holds the
+        labels). Labels are only read for IDs not in known_ids, and collected
+        for the dictionary (drain_eurovoc_labels). None: full items (default).
+        """
+        self.eurovoc_known = set(known_ids) if known_ids is not None else None
+        self.eurovoc_labels = {}
+        self.config_hash = self.settings_hash()
+    
+    def drain_eurovoc_labels(self):
+        """Return the (ID, language, label) triples collected since the last drain"""
+        labels, self.eurovoc_labels = self.eurovoc_labels, {}
+        return [(concept_id, language, label) for (concept_id, language), label in labels.items()]
+
+    @staticmethod
+    def resolve_sections(sections):
+        """Selected sections in output order, None for all of them"""
+        if sections is None or sections == 'all':
+            return None
+        if isinstance(sections, str):
+            sections = [section.strip() for section in sections.split(',') if section.strip()]
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))} "
+                             f"(available: {', '.join(SECTIONS)})")
+        return tuple(section for section in SECTIONS if section in sections)
+    
+    def plan_xpaths(self):
+        """Yield (name, xpath) for every XPath the extractors evaluate"""
+        for section, entries in self.config.items():
+            for key, value in entries.items():
+                if isinstance(value, dict):
+                    # Case law entries: everything but the display type is an XPath
+                    for sub_key, xpath in value.items():
+                        if sub_key != 'type':
+                            yield f"{section}.{key}.{sub_key}", xpath
+                else:
+                    yield f"{section}.{key}", value
+        
+        # Eurovoc paths are also evaluated relative to the main WORK
+        for key, xpath in self.config['eurovoc'].items():
+            yield f"eurovoc.{key} (main work)", './/' + xpath.lstrip('/')
+        
+        for section, entries in MAIN_WORK_XPATHS.items():
+            for key, xpath in entries.items():
+                yield f"main work {section}.{key}", xpath
+        for key, xpath in EXPRESSION_XPATHS.items():
+            yield f"expression {key}", xpath
+        for key, xpath in DOCUMENT_XPATHS.items():
+            yield f"document {key}", xpath
+    
+    def compile_plan(self):
+        """
+        Compile every XPath of the configuration and the built-in tables once.
+        
+        Sets self.plan (XPath string -> compiled etree.XPath) and self.anchored
+        (XPath string -> (anchor tag, compiled 'self::' path, anchor only) for
+        the paths that can be answered from the tag index).
+            
+        Raises:
+            ValueError: if any expression is not valid XPath
+        """
+        self.plan = {}
+        self.anchored = {}
+        for name, xpath in self.plan_xpaths():
+            if xpath in self.plan:
+                continue
+            try:
+                self.plan[xpath] = etree.XPath(xpath, smart_strings=False)
+            except (etree.XPathSyntaxError, TypeError) as e:
+                raise ValueError(f"Invalid XPath for '{name}': {xpath!r} ({e})")
+            anchored = split_anchor(xpath)
+            if anchored is not None and anchored[0] == 'descendant':
+                _, tag, compiled_self = anchored
+                self.anchored[xpath] = (tag, compiled_self, self.selects_anchor_only(xpath, tag))
+        self.anchor_tags = sorted({tag for tag, _, _ in self.anchored.values()})
+        self.compile_caselaw_plan()
+    
+    def compile_caselaw_plan(self):
+        """
+        Build the case law dispatch table.
+        
+        Sets self.caselaw_routes (anchor tag -> case type, for case types whose
+        xpath is a plain '//TAG') and self.caselaw_readers (case type ->
+        (celex TYPE, ecli TYPE, annotation tag) when all its sub-paths have the
+        standard SAMEAS/ANNOTATION shape and can be read by child iteration).
+        """
+        self.caselaw_routes = {}
+        self.caselaw_readers = {}
+        for case_type, case_cfg in self.config['caselaw'].items():
+            match = re.fullmatch(r'//([A-Za-z_][\w.\-]*)', case_cfg['xpath'])
+            if match and match.group(1) not in self.caselaw_routes:
+                self.caselaw_routes[match.group(1)] = case_type
+            
+            celex = SAMEAS_TYPED_IDENTIFIERS.match(case_cfg['celex'])
+            ecli = SAMEAS_TYPED_IDENTIFIERS.match(case_cfg['ecli']) if 'ecli' in case_cfg else None
+            articles = ANNOTATION_CHILDREN.match(case_cfg['articles']) if 'articles' in case_cfg else None
+            if (case_cfg['identifier'] == SAMEAS_IDENTIFIERS and celex
+                    and (ecli or 'ecli' not in case_cfg) and (articles or 'articles' not in case_cfg)):
+                self.caselaw_readers[case_type] = (
+                    celex.group(2),
+                    ecli.group(2) if ecli else None,
+                    articles.group(1) if articles else None
+                )
+    
+    @staticmethod
+    def selects_anchor_only(xpath, tag):
+        """Check whether an anchored XPath can only return its anchor element ('//A[...]')"""
+        depth = 0
+        for char in xpath[xpath.index(tag) + len(tag):]:
+            if char == '[':
+                depth += 1
+            elif char == ']':
+                depth -= 1
+            elif depth == 0:
+                return False
+        return True
+    
+    def evaluate(self, context, xpath):
+        """
+        Evaluate an XPath through the compiled plan.
+        
+        '//TAG/...' on the indexed tree and './/TAG/...' on one of its elements
+        are answered from the tag index: the rest of the path is evaluated on
+        each TAG element only, instead of scanning the tree.
+        """
+        index = self.index
+        anchored = self.anchored.get(xpath)
+        if index is not None and anchored is not None:
+            tag, compiled_self, anchor_only = anchored
+            candidates = None
+            if context is index.tree:
+                if xpath.startswith('//'):
+                    candidates = index.elements.get(tag, ())
+            elif (xpath.startswith('.//') and len(index.elements.get(tag, ())) <= index.SCOPED_LIMIT
+                  and context.getroottree().getroot() is index.root):
+                candidates = index.descendants(context, tag)
+            
+            # Per-anchor results are only in document order if TAG never nests in itself
+            if candidates is not None and (anchor_only or len(candidates) < 2 or
+                                           not index.self_nested(tag)):
+                results = []
+                for elem in candidates:
+                    results.extend(compiled_self(elem))
+                return results
+        
+        compiled = self.plan.get(xpath)
+        if compiled is None:
+            compiled = self.plan[xpath] = etree.XPath(xpath, smart_strings=False)
+        return compiled(context)
     
-    def parse_xml_file(self, xml_path):
-        """Parse XML file and return lxml tree"""
+    def parse_xml_file(self, xml_path, data=None):
+        """Parse XML file (or its read-ahead bytes) and return lxml tree (indexed for the extractors)"""
         try:
-            parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
-            tree = etree.parse(str(xml_path), parser)
-            return tree
+            tree = self.read_tree(xml_path, data)
         except Exception as e:
             raise Exception(f"Failed to parse XML: {e}")
+        self.index = TagIndex(tree, self.anchor_tags) if self.use_tag_index else None
+        return tree
+    
+    def read_tree(self, xml_path, data=None):
+        """Parse a notice into an lxml tree, pruned if languages were selected"""
+        if self.pruner is not None:
+            tree, self.pruned_languages = self.pruner.parse(xml_path, data)
+            return tree
+        parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        if data is not None and Path(xml_path).suffix == '.xml':
+            return etree.fromstring(data, parser).getroottree()
+        with open_notice(xml_path, data) as f:
+            return etree.parse(f, parser)
     
     def identify_main_work(self, tree, celex_hint=None):
         """
@@ -146,37 +2378,29 @@ class CellarXMLParser:
         Returns:
             lxml Element for the main WORK, or None
         """
-        # Find all WORK elements with RESOURCE_LEGAL_ID_CELEX
-        works = tree.xpath("//WORK[.//RESOURCE_LEGAL_ID_CELEX]")
-        
-        if not works:
-            # Fallback: find any WORK element
-            works = tree.xpath("//WORK")
-        
-        if not works:
-            return None
-        
-        # If celex_hint provided, find matching WORK
-        if celex_hint:
-            for work in works:
-                celex_values = work.xpath(".//RESOURCE_LEGAL_ID_CELEX/VALUE/text()")
-                if celex_hint in celex_values:
-                    return work
-        
-        # Fallback: Find work with CELEX starting with '3' (original acts)
-        for work in works:
-            celex_values = work.xpath(".//RESOURCE_LEGAL_ID_CELEX/VALUE/text()")
-            for celex in celex_values:
-                if celex and celex.startswith('3'):
-                    return work
-        
-        # Last resort: return first WORK
-        return works[0]
+        self.celex_index = self.build_celex_index(tree)
+        return self.celex_index.main_work(celex_hint)
+    
+    def build_celex_index(self, tree):
+        """Build the CELEX -> WORK index of a document"""
+        return CelexIndex.from_tree(tree)
+    
+    def celex_values(self, work):
+        """Return all RESOURCE_LEGAL_ID_CELEX values below a WORK element"""
+        if self.celex_index is not None and work in self.celex_index.values:
+            return self.celex_index.values[work]
+        return self.evaluate(work, MAIN_WORK_XPATHS['identifiers']['celex_values'])
+    
+    def main_celex(self, work):
+        """Preferred CELEX of a WORK (original act starting with '3', else the first one)"""
+        if self.celex_index is not None and work in self.celex_index.preferred:
+            return self.celex_index.preferred[work]
+        return preferred_celex(self.celex_values(work))
     
     def extract_text_from_element(self, element, xpath):
         """Extract single text value from an element using relative XPath"""
         try:
-            result = element.xpath(xpath)
+            result = self.evaluate(element, xpath)
             if result and len(result) > 0:
                 text = result[0].text if hasattr(result[0], 'text') else str(result[0])
                 return text.strip() if text else None
@@ -187,7 +2411,7 @@ class CellarXMLParser:
     def extract_array_from_element(self, element, xpath):
         """Extract array of text values from an element using relative XPath"""
         try:
-            results = element.xpath(xpath)
+            results = self.evaluate(element, xpath)
             values = []
             for result in results:
                 text = result.text if hasattr(result, 'text') else str(result)
@@ -197,10 +2421,19 @@ class CellarXMLParser:
         except Exception as e:
             return []
     
+    def extract_texts(self, context, xpath):
+        """Extract the raw text (possibly None) of every element matched by XPath"""
+        return [elem.text for elem in self.evaluate(context, xpath)]
+    
+    def extract_labels(self, context, xpath):
+        """Extract (text, language attribute) pairs for every element matched by XPath"""
+        return [(elem.text, elem.get('xml:lang') or elem.get('lang'))
+                for elem in self.evaluate(context, xpath)]
+    
     def extract_text(self, tree, xpath):
         """Extract single text value using XPath"""
         try:
-            result = tree.xpath(xpath)
+            result = self.evaluate(tree, xpath)
             if result and len(result) > 0:
                 text = result[0].text if hasattr(result[0], 'text') else str(result[0])
                 return text.strip() if text else None
@@ -211,7 +2444,7 @@ class CellarXMLParser:
     def extract_array(self, tree, xpath):
         """Extract array of text values using XPath"""
         try:
-            results = tree.xpath(xpath)
+            results = self.evaluate(tree, xpath)
             values = []
             for result in results:
                 text = result.text if hasattr(result, 'text') else str(result)
@@ -222,95 +2455,81 @@ class CellarXMLParser:
             return []
     
     def detect_languages(self, tree):
-        """Detect available languages in the document"""
-        languages = set()
-        
-        # Method 1: EXPRESSION_USES_LANGUAGE
-        lang_elements = tree.xpath('//EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER')
-        for elem in lang_elements:
-            if elem.text:
-                # Extract language code (e.g., 'ENG' from URI)
-                lang = elem.text.strip().split('/')[-1].lower()
-                if len(lang) == 3:
-                    languages.add(lang)
-        
-        # Method 2: LANG elements
-        lang_tags = tree.xpath('//LANG')
-        for elem in lang_tags:
-            if elem.text and len(elem.text.strip()) == 3:
-                languages.add(elem.text.strip().lower())
-        
-        # Method 3: xml:lang attributes
-        lang_attrs = tree.xpath('//*[@xml:lang]/@xml:lang | //*[@lang]/@lang')
-        for lang in lang_attrs:
-            if lang and len(lang) in [2, 3]:
-                languages.add(lang.lower())
-        
-        return sorted(list(languages))
+        """Detect available languages in the document (one traversal, kept for the extractors)"""
+        self.language_summary = LanguageSummary.from_tree(tree)
+        if self.pruned_languages is not None:
+            self.language_summary.languages.update(self.pruned_languages.languages)
+        return self.language_summary.codes()
+    
+    def expression_language(self, expr):
+        """Language identifier of an EXPRESSION"""
+        summary = self.language_summary
+        if summary is not None and expr in summary.expressions:
+            return summary.expression_language(expr)
+        return self.extract_text_from_element(expr, EXPRESSION_XPATHS['language'])
+    
+    def title_expressions(self, tree, main_work):
+        """Return the EXPRESSION elements that belong to the main work"""
+        if main_work is not None:
+            # Check if this is /NOTICE/WORK (expressions are siblings at /NOTICE/EXPRESSION)
+            parent = main_work.getparent()
+            if parent is not None and parent.tag == 'NOTICE':
+                return self.evaluate(parent, DOCUMENT_XPATHS['child_expressions'])
+            # Expressions are descendants of the work
+            return self.evaluate(main_work, DOCUMENT_XPATHS['descendant_expressions'])
+        # Fallback to tree-level search
+        return self.evaluate(tree, DOCUMENT_XPATHS['expressions'])
     
     def extract_title(self, tree, main_work):
         """Extract all title information from main work context"""
         cfg = self.config['title']
+        selected = self.title_languages
+        
+        # Language -> EXPRESSIONs of the main WORK, in document order. Languages
+        # outside the selection are dropped before any title XPath runs (English
+        # is kept for the primary title)
+        by_language = {}
+        for expr in self.title_expressions(tree, main_work):
+            lang = self.expression_language(expr)
+            if lang is None:
+                continue
+            code = lang.split('/')[-1].lower()
+            if selected is None or code in selected or code == 'eng':
+                by_language.setdefault(code, []).append(expr)
         
-        # Find English expression within the main WORK
         primary_title = 'Not found'
         short_title = []
         subtitle = []
-        
-        # Get expressions from the main work
-        if main_work is not None:
-            # Check if this is /NOTICE/WORK (expressions are siblings at /NOTICE/EXPRESSION)
-            parent = main_work.getparent()
-            if parent is not None and parent.tag == 'NOTICE':
-                expressions = parent.xpath('./EXPRESSION')
-            else:
-                # Expressions are descendants of the work
-                expressions = main_work.xpath('.//EXPRESSION')
-        else:
-            # Fallback to tree-level search
-            expressions = tree.xpath('//EXPRESSION')
-        
-        for expr in expressions:
-            # Check language
-            lang_elem = expr.xpath('./EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER')
-            if lang_elem and lang_elem[0].text:
-                lang = lang_elem[0].text.strip().split('/')[-1].upper()
-                
-                if lang == 'ENG':
-                    # Get title from this English expression
-                    title_elem = expr.xpath('./EXPRESSION_TITLE/VALUE')
-                    if title_elem and title_elem[0].text:
-                        primary_title = title_elem[0].text.strip()
-                    
-                    # Get short title
-                    short_elem = expr.xpath('./EXPRESSION_TITLE_SHORT/VALUE')
-                    if short_elem and short_elem[0].text:
-                        short_title = [short_elem[0].text.strip()]
-                    
-                    # Get subtitle
-                    sub_elem = expr.xpath('./EXPRESSION_SUBTITLE/VALUE')
-                    if sub_elem and sub_elem[0].text:
-                        subtitle = [sub_elem[0].text.strip()]
-                    
-                    break
+        multilingual = {}
+        for code, exprs in by_language.items():
+            in_multilingual = selected is None or code in selected
+            titles = [self.extract_text_from_element(expr, EXPRESSION_XPATHS['title'])
+                      for expr in (exprs if in_multilingual else exprs[:1])]
+            
+            # The first English expression gives the primary title, short title and subtitle
+            if code == 'eng':
+                if titles[0] is not None:
+                    primary_title = titles[0]
+                short = self.extract_text_from_element(exprs[0], EXPRESSION_XPATHS['short'])
+                if short is not None:
+                    short_title = [short]
+                sub = self.extract_text_from_element(exprs[0], EXPRESSION_XPATHS['subtitle'])
+                if sub is not None:
+                    subtitle = [sub]
+            
+            titles = [title for title in titles if title is not None]
+            if in_multilingual and titles:
+                multilingual[code] = titles
         
         # Fallback to old method if English not found
         if primary_title == 'Not found':
-            title_results = tree.xpath('//EXPRESSION_TITLE/VALUE')
-            if title_results and len(title_results) > 1 and title_results[1].text:
-                primary_title = title_results[1].text.strip()
-        
-        # Get multilingual titles
-        multilingual = {}
-        for expr in expressions:
-            lang_elem = expr.xpath('./EXPRESSION_USES_LANGUAGE/URI/IDENTIFIER')
-            title_elem = expr.xpath('./EXPRESSION_TITLE/VALUE')
-            
-            if lang_elem and lang_elem[0].text and title_elem and title_elem[0].text:
-                lang = lang_elem[0].text.strip().split('/')[-1].lower()
-                if lang not in multilingual:
-                    multilingual[lang] = []
-                multilingual[lang].append(title_elem[0].text.strip())
+            if self.pruned_languages is not None and self.pruned_languages.titles is not None:
+                # Noted before the EXPRESSIONs of other languages were pruned
+                title_results = self.pruned_languages.titles
+            else:
+                title_results = self.extract_texts(tree, DOCUMENT_XPATHS['expression_titles'])
+            if len(title_results) > 1 and title_results[1]:
+                primary_title = title_results[1].strip()
         
         return {
             'primary': primary_title,
@@ -328,21 +2547,22 @@ class CellarXMLParser:
         # Extract from main work if available
         if main_work is not None:
             # Use direct children (./...) not all descendants (.//...) to avoid embedded documents
-            doc_date = self.extract_text_from_element(main_work, './WORK_DATE_DOCUMENT/VALUE')
+            work_cfg = MAIN_WORK_XPATHS['dates']
+            doc_date = self.extract_text_from_element(main_work, work_cfg['document'])
             if not doc_date:
-                year = self.extract_text_from_element(main_work, './WORK_DATE_DOCUMENT/YEAR')
-                month = self.extract_text_from_element(main_work, './WORK_DATE_DOCUMENT/MONTH')
-                day = self.extract_text_from_element(main_work, './WORK_DATE_DOCUMENT/DAY')
+                year = self.extract_text_from_element(main_work, work_cfg['document_year'])
+                month = self.extract_text_from_element(main_work, work_cfg['document_month'])
+                day = self.extract_text_from_element(main_work, work_cfg['document_day'])
                 if year and month and day:
                     doc_date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
             
             return {
                 'document': doc_date or 'Not found',
-                'publication': self.extract_text_from_element(main_work, './RESOURCE_LEGAL_PUBLISHED_IN_OFFICIAL-JOURNAL/EMBEDDED_NOTICE/WORK/DATE_PUBLICATION/VALUE') or 'Not found',
-                'signature': self.extract_text_from_element(main_work, './RESOURCE_LEGAL_DATE_SIGNATURE/VALUE') or 'Not found',
-                'entryIntoForce': self.extract_text_from_element(main_work, './RESOURCE_LEGAL_DATE_ENTRY-INTO-FORCE/VALUE') or 'Not found',
-                'endOfValidity': self.extract_text_from_element(main_work, './RESOURCE_LEGAL_DATE_END-OF-VALIDITY/VALUE') or 'Not found',
-                'transpositionDeadline': self.extract_text_from_element(main_work, './RESOURCE_LEGAL_DATE_DEADLINE/VALUE') or 'Not found'
+                'publication': self.extract_text_from_element(main_work, work_cfg['publication']) or 'Not found',
+                'signature': self.extract_text_from_element(main_work, work_cfg['signature']) or 'Not found',
+                'entryIntoForce': self.extract_text_from_element(main_work, work_cfg['entry_into_force']) or 'Not found',
+                'endOfValidity': self.extract_text_from_element(main_work, work_cfg['end_of_validity']) or 'Not found',
+                'transpositionDeadline': self.extract_text_from_element(main_work, work_cfg['transposition_deadline']) or 'Not found'
             }
         else:
             # Fallback to tree-level extraction
@@ -369,37 +2589,27 @@ class CellarXMLParser:
         
         if main_work is not None:
             # Get CELEX from main work - prefer original acts (starting with '3')
-            celex = None
-            celex_values = main_work.xpath('.//RESOURCE_LEGAL_ID_CELEX/VALUE/text()')
-            
-            # First try to find a CELEX starting with '3' (original acts)
-            for val in celex_values:
-                if val and val.strip().startswith('3'):
-                    celex = val.strip()
-                    break
-            
-            # If no '3' CELEX found, use the first one
-            if not celex and celex_values:
-                celex = celex_values[0].strip() if celex_values[0] else None
+            work_cfg = MAIN_WORK_XPATHS['identifiers']
+            celex = self.main_celex(main_work)
             
             # Fallback to ID_CELEX
             if not celex:
-                celex = self.extract_text_from_element(main_work, './/ID_CELEX/VALUE')
+                celex = self.extract_text_from_element(main_work, work_cfg['celex'])
             
             # Get ELI from main work
-            eli = self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_ELI/VALUE')
+            eli = self.extract_text_from_element(main_work, work_cfg['resource_legal_eli'])
             if not eli:
-                eli = self.extract_text_from_element(main_work, './/ELI/VALUE')
+                eli = self.extract_text_from_element(main_work, work_cfg['eli'])
             
             return {
                 'celex': celex or 'Not found',
                 'eli': eli or 'Not found',
-                'ojReference': self.extract_text_from_element(main_work, './/SAMEAS[URI/TYPE="oj"]/URI/IDENTIFIER') or 'Not found',
-                'immc': self.extract_text_from_element(main_work, './/SAMEAS[URI/TYPE="immc"]/URI/IDENTIFIER') or 'Not found',
-                'naturalNumber': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_NUMBER_NATURAL_CELEX/VALUE') or 'Not found',
-                'type': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_TYPE/VALUE') or 'Not found',
-                'year': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_YEAR/VALUE') or 'Not found',
-                'sector': self.extract_text_from_element(main_work, './/ID_SECTOR/VALUE') or 'Not found'
+                'ojReference': self.extract_text_from_element(main_work, work_cfg['oj_reference']) or 'Not found',
+                'immc': self.extract_text_from_element(main_work, work_cfg['immc']) or 'Not found',
+                'naturalNumber': self.extract_text_from_element(main_work, work_cfg['natural_number']) or 'Not found',
+                'type': self.extract_text_from_element(main_work, work_cfg['type']) or 'Not found',
+                'year': self.extract_text_from_element(main_work, work_cfg['year']) or 'Not found',
+                'sector': self.extract_text_from_element(main_work, work_cfg['sector']) or 'Not found'
             }
         else:
             # Fallback to tree-level extraction
@@ -434,34 +2644,41 @@ class CellarXMLParser:
             items = []
             # Make xpath relative if we have main_work
             if main_work is not None:
-                id_xpath_rel = './/' + id_xpath.lstrip('/')
-                label_xpath_rel = './/' + label_xpath.lstrip('/')
-                id_elements = search_context.xpath(id_xpath_rel)
-                label_elements = search_context.xpath(label_xpath_rel)
-            else:
-                id_elements = search_context.xpath(id_xpath)
-                label_elements = search_context.xpath(label_xpath)
+                id_xpath = './/' + id_xpath.lstrip('/')
+                label_xpath = './/' + label_xpath.lstrip('/')
+            ids = self.extract_texts(search_context, id_xpath)
+            known = self.eurovoc_known
+            if known is not None and known.issuperset(id_text.strip() for id_text in ids if id_text):
+                # Every label is in the dictionary: the label XPath is not even evaluated
+                return [id_text.strip() for id_text in ids if id_text]
+            labels = self.extract_labels(search_context, label_xpath)
             
-            for i, id_elem in enumerate(id_elements):
-                if id_elem.text:
+            for i, id_text in enumerate(ids):
+                if id_text:
                     item = {
-                        'id': id_elem.text.strip(),
+                        'id': id_text.strip(),
                         'label': 'No label',
                         'language': 'unknown'
                     }
                     
                     # Try to match with corresponding label
-                    if i < len(label_elements):
-                        label_elem = label_elements[i]
-                        if label_elem.text:
-                            item['label'] = label_elem.text.strip()
-                        lang = label_elem.get('xml:lang') or label_elem.get('lang')
+                    if i < len(labels):
+                        label_text, lang = labels[i]
+                        if label_text:
+                            item['label'] = label_text.strip()
                         if lang:
                             item['language'] = lang
                     
                     items.append(item)
             
-            return items
+            if known is None:
+                return items
+            # IDs only; new labels go to the dictionary
+            for item in items:
+                if item['label'] != 'No label':
+                    self.eurovoc_labels.setdefault((item['id'], item['language']), item['label'])
+                    known.add(item['id'])
+            return [item['id'] for item in items]
         
         return {
             'concepts': extract_eurovoc_category(cfg['concept_id'], cfg['concept_label']),
@@ -473,99 +2690,134 @@ class CellarXMLParser:
     def extract_caselaw(self, tree):
         """Extract and categorize case law references with article parsing"""
         cfg = self.config['caselaw']
-        caselaw_items = []
+        by_type = {case_type: [] for case_type in cfg}
         
+        # One pass over the tree, routing each relation element by tag
+        routes = self.caselaw_routes
+        if routes:
+            for case_elem in tree.getroot().iter(*routes):
+                case_type = routes[case_elem.tag]
+                by_type[case_type].extend(self.caselaw_items(case_elem, case_type))
+        
+        # Case types with other XPaths are evaluated on their own
+        routed = set(routes.values())
         for case_type, case_cfg in cfg.items():
-            # Find all elements of this case law type
-            case_elements = tree.xpath(case_cfg['xpath'])
-            
-            for case_elem in case_elements:
-                # Extract CELEX ID
-                celex_elements = case_elem.xpath(case_cfg['celex'])
-                if not celex_elements:
-                    # Fall back to any identifier
-                    celex_elements = case_elem.xpath(case_cfg['identifier'])
+            if case_type not in routed:
+                for case_elem in self.evaluate(tree, case_cfg['xpath']):
+                    by_type[case_type].extend(self.caselaw_items(case_elem, case_type))
+        
+        return [item for case_type in cfg for item in by_type[case_type]]
+    
+    def caselaw_items(self, case_elem, case_type):
+        """Build the case law entries for one relation element"""
+        case_cfg = self.config['caselaw'][case_type]
+        reader = self.caselaw_readers.get(case_type)
+        
+        if reader is not None:
+            # Standard SAMEAS/ANNOTATION layout: one scan over the children
+            celex_type, ecli_type, annotation_tag = reader
+            identifiers, by_type, annotations = read_relation_children(case_elem, annotation_tag)
+            celex_elements = by_type.get(celex_type) or identifiers
+            ecli_elements = by_type.get(ecli_type, []) if ecli_type is not None else None
+            article_elements = annotations if annotation_tag is not None else None
+        else:
+            # Extract CELEX ID, falling back to any identifier
+            celex_elements = (self.evaluate(case_elem, case_cfg['celex']) or
+                              self.evaluate(case_elem, case_cfg['identifier']))
+            ecli_elements = self.evaluate(case_elem, case_cfg['ecli']) if 'ecli' in case_cfg else None
+            article_elements = self.evaluate(case_elem, case_cfg['articles']) if 'articles' in case_cfg else None
+        
+        return self.caselaw_entries(
+            case_type,
+            [elem.text for elem in celex_elements],
+            ecli_elements[0].text if ecli_elements else None,
+            [elem.text for elem in article_elements or ()]
+        )
+    
+    def caselaw_entries(self, case_type, celex_texts, ecli_text, article_texts):
+        """Build the case law entries of one relation from raw texts (CELEX identifiers, first ECLI, articles)"""
+        case_cfg = self.config['caselaw'][case_type]
+        items = []
+        
+        for celex_text in celex_texts:
+            if celex_text:
+                celex_id = celex_text.strip()
+                
+                # ECLI if available
+                ecli = ecli_text.strip() if ecli_text else None
+                
+                # Article references if available
+                articles = [text.strip() for text in article_texts if text]
+                
+                if articles:
+                    parsed_articles = ArticleReferenceParser.parse_many(articles)
+                else:
+                    # If no articles found, add placeholder
+                    articles = ['Not specified']
+                    parsed_articles = [ArticleReferenceParser.NOT_SPECIFIED]
                 
-                for celex_elem in celex_elements:
-                    if celex_elem.text:
-                        celex_id = celex_elem.text.strip()
-                        
-                        # Extract ECLI if available
-                        ecli = None
-                        if 'ecli' in case_cfg:
-                            ecli_elements = case_elem.xpath(case_cfg['ecli'])
-                            if ecli_elements and ecli_elements[0].text:
-                                ecli = ecli_elements[0].text.strip()
-                        
-                        # Extract article references if available
-                        articles = []
-                        parsed_articles = []
-                        
-                        if 'articles' in case_cfg:
-                            article_elements = case_elem.xpath(case_cfg['articles'])
-                            for art_elem in article_elements:
-                                if art_elem.text:
-                                    article_ref = art_elem.text.strip()
-                                    articles.append(article_ref)
-                                    
-                                    # Parse the article reference
-                                    parsed = ArticleReferenceParser.parse(article_ref)
-                                    parsed_articles.append(parsed)
-                        
-                        # If no articles found, add placeholder
-                        if not articles:
-                            articles = ['Not specified']
-                            parsed_articles = [ArticleReferenceParser.parse('Not specified')]
-                        
-                        caselaw_items.append({
-                            'celexId': celex_id,
-                            'ecli': ecli,
-                            'articles': articles,
-                            'parsedArticles': parsed_articles,
-                            'type': case_cfg['type']
-                        })
-        
-        return caselaw_items
+                items.append({
+                    'celexId': celex_id,
+                    'ecli': ecli,
+                    'articles': articles,
+                    'parsedArticles': parsed_articles,
+                    'type': case_cfg['type']
+                })
+        
+        return items
     
     def extract_implementation(self, tree):
         """Extract implementation information"""
         cfg = self.config['implementation']
         implementations = []
         
-        impl_elements = tree.xpath(cfg['xpath'])
-        for impl_elem in impl_elements:
-            identifier_elem = impl_elem.xpath(cfg['identifier'])
-            country_elem = impl_elem.xpath(cfg['country'])
-            
-            if identifier_elem and identifier_elem[0].text:
-                implementations.append({
-                    'identifier': identifier_elem[0].text.strip(),
-                    'country': country_elem[0].text.strip() if country_elem and country_elem[0].text else 'Unknown',
-                    'status': 'Implemented'
-                })
+        for impl_elem in self.evaluate(tree, cfg['xpath']):
+            item = self.implementation_item(impl_elem, cfg)
+            if item:
+                implementations.append(item)
         
         return implementations
     
+    def implementation_item(self, impl_elem, cfg):
+        """Build the implementation entry for one national measure, or None"""
+        identifier_elem = self.evaluate(impl_elem, cfg['identifier'])
+        country_elem = self.evaluate(impl_elem, cfg['country'])
+        return self.implementation_entry(
+            identifier_elem[0].text if identifier_elem else None,
+            country_elem[0].text if country_elem else None
+        )
+    
+    def implementation_entry(self, identifier_text, country_text):
+        """Build the implementation entry from the raw identifier and country texts, or None"""
+        if identifier_text:
+            return {
+                'identifier': identifier_text.strip(),
+                'country': country_text.strip() if country_text else 'Unknown',
+                'status': 'Implemented'
+            }
+        return None
+    
     def extract_legal_relations(self, tree, main_work):
         """Extract legal relationships from main work context"""
         cfg = self.config['legal_relations']
         
         if main_work is not None:
             # For based_on and repeals, merge results from multiple XPaths
-            based_on = self.extract_array_from_element(main_work, './/BASED_ON/SAMEAS/URI/IDENTIFIER')
-            based_on.extend(self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_BASED_ON_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER'))
+            work_cfg = MAIN_WORK_XPATHS['legal_relations']
+            based_on = self.extract_array_from_element(main_work, work_cfg['based_on'])
+            based_on.extend(self.extract_array_from_element(main_work, work_cfg['based_on_legal']))
             
-            repeals = self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_REPEALS_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER')
-            repeals.extend(self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_DOES_REPEAL_OF_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER'))
+            repeals = self.extract_array_from_element(main_work, work_cfg['repeals'])
+            repeals.extend(self.extract_array_from_element(main_work, work_cfg['repeals_alt']))
             
             return {
-                'basedOn': list(set(based_on)),  # Remove duplicates
-                'cites': self.extract_array_from_element(main_work, './/WORK_CITES_WORK/SAMEAS/URI/IDENTIFIER'),
-                'amends': self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER'),
-                'repeals': list(set(repeals)),  # Remove duplicates
-                'consolidatedBy': self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED/SAMEAS/URI/IDENTIFIER'),
-                'correctedBy': self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_CORRECTED_BY_RESOURCE_LEGAL/SAMEAS/URI/IDENTIFIER'),
-                'treatyBasis': self.extract_array_from_element(main_work, './/RESOURCE_LEGAL_BASED_ON_CONCEPT_TREATY/PREFLABEL')
+                'basedOn': list(dict.fromkeys(based_on)),  # Remove duplicates, keep document order
+                'cites': self.extract_array_from_element(main_work, work_cfg['cites']),
+                'amends': self.extract_array_from_element(main_work, work_cfg['amends']),
+                'repeals': list(dict.fromkeys(repeals)),  # Remove duplicates, keep document order
+                'consolidatedBy': self.extract_array_from_element(main_work, work_cfg['consolidated_by']),
+                'correctedBy': self.extract_array_from_element(main_work, work_cfg['corrected_by']),
+                'treatyBasis': self.extract_array_from_element(main_work, work_cfg['treaty_basis'])
             }
         else:
             # Fallback to tree-level extraction
@@ -576,10 +2828,10 @@ class CellarXMLParser:
             repeals.extend(self.extract_array(tree, cfg['repeals_alt']))
             
             return {
-                'basedOn': list(set(based_on)),  # Remove duplicates
+                'basedOn': list(dict.fromkeys(based_on)),  # Remove duplicates, keep document order
                 'cites': self.extract_array(tree, cfg['cites']),
                 'amends': self.extract_array(tree, cfg['amends']),
-                'repeals': list(set(repeals)),  # Remove duplicates
+                'repeals': list(dict.fromkeys(repeals)),  # Remove duplicates, keep document order
                 'consolidatedBy': self.extract_array(tree, cfg['consolidated_by']),
                 'correctedBy': self.extract_array(tree, cfg['corrected_by']),
                 'treatyBasis': self.extract_array(tree, cfg['treaty_basis'])
@@ -591,18 +2843,19 @@ class CellarXMLParser:
         
         if main_work is not None:
             # Try both paths for created_by
-            created_by = self.extract_text_from_element(main_work, './/WORK_CREATED_BY_AGENT/PREFLABEL')
+            work_cfg = MAIN_WORK_XPATHS['metadata']
+            created_by = self.extract_text_from_element(main_work, work_cfg['created_by'])
             if not created_by:
-                created_by = self.extract_text_from_element(main_work, './/CREATED_BY/PREFLABEL')
+                created_by = self.extract_text_from_element(main_work, work_cfg['created_by_alt'])
             
             return {
                 'createdBy': created_by or 'Not found',
-                'responsibleAgent': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_RESPONSIBILITY_OF_AGENT/PREFLABEL') or 'Not found',
-                'inForce': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_IN-FORCE/VALUE') or 'Not found',
-                'subjectMatter': self.extract_text_from_element(main_work, './/RESOURCE_LEGAL_IS_ABOUT_SUBJECT-MATTER_1/PREFLABEL') or 'Not found',
-                'dossierReference': self.extract_text_from_element(main_work, './/WORK_PART_OF_DOSSIER/SAMEAS/URI/IDENTIFIER') or 'Not found',
-                'version': self.extract_text_from_element(main_work, './/VERSION/VALUE') or 'Not found',
-                'lastModified': self.extract_text_from_element(main_work, './/LASTMODIFICATIONDATE/VALUE') or 'Not found'
+                'responsibleAgent': self.extract_text_from_element(main_work, work_cfg['responsible_agent']) or 'Not found',
+                'inForce': self.extract_text_from_element(main_work, work_cfg['in_force']) or 'Not found',
+                'subjectMatter': self.extract_text_from_element(main_work, work_cfg['subject_matter']) or 'Not found',
+                'dossierReference': self.extract_text_from_element(main_work, work_cfg['dossier_reference']) or 'Not found',
+                'version': self.extract_text_from_element(main_work, work_cfg['version']) or 'Not found',
+                'lastModified': self.extract_text_from_element(main_work, work_cfg['last_modified']) or 'Not found'
             }
         else:
             # Fallback to tree-level extraction
@@ -620,8 +2873,19 @@ class CellarXMLParser:
                 'lastModified': self.extract_text(tree, cfg['last_modified']) or 'Not found'
             }
     
-    def calculate_stats(self, document_data):
-        """Calculate statistics from extracted data"""
+    # Output section each statistic is computed from
+    STAT_SECTIONS = {
+        'languages': 'languages',
+        'cases': 'caselaw',
+        'eurovoc': 'eurovoc',
+        'articles': 'caselaw',
+        'relations': 'legalRelations',
+        'implementations': 'implementation'
+    }
+    
+    @classmethod
+    def calculate_stats(cls, document_data):
+        """Calculate statistics from extracted data (only those of the extracted sections)"""
         eurovoc = document_data.get('eurovoc', {})
         caselaw = document_data.get('caselaw', [])
         relations = document_data.get('legalRelations', {})
@@ -647,7 +2911,7 @@ class CellarXMLParser:
             for key in ['basedOn', 'cites', 'amends', 'repeals', 'consolidatedBy', 'correctedBy', 'treatyBasis']
         )
         
-        return {
+        stats = {
             'languages': len(document_data.get('languages', [])),
             'cases': len(caselaw),
             'eurovoc': total_eurovoc,
@@ -655,41 +2919,82 @@ class CellarXMLParser:
             'relations': total_relations,
             'implementations': len(implementation)
         }
+        return {name: count for name, count in stats.items() if cls.STAT_SECTIONS[name] in document_data}
     
-    def build_metadata_json(self, tree, main_work, celex):
-        """Build complete JSON structure matching the schema"""
-        languages = self.detect_languages(tree)
+    def build_metadata_json(self, tree, main_work, celex, sections=None):
+        """
+        Build complete JSON structure matching the schema.
         
+        sections: output sections to extract (see select_sections; default: the
+        parser's selection). Unselected sections are left out of 'document'
+        and 'stats'; 'available_languages' is only set with 'languages'.
+        """
+        sections = self.sections if sections is None else self.resolve_sections(sections)
+        extractors = {
+            'languages': lambda: self.detect_languages(tree),
+            'title': lambda: self.extract_title(tree, main_work),
+            'dates': lambda: self.extract_dates(tree, main_work),
+            'identifiers': lambda: self.extract_identifiers(tree, main_work),
+            'eurovoc': lambda: self.extract_eurovoc(tree, main_work),
+            'caselaw': lambda: self.extract_caselaw(tree),
+            'implementation': lambda: self.extract_implementation(tree),
+            'legalRelations': lambda: self.extract_legal_relations(tree, main_work),
+            'metadata': lambda: self.extract_metadata(tree, main_work)
+        }
         document_data = {
-            'languages': languages,
-            'title': self.extract_title(tree, main_work),
-            'dates': self.extract_dates(tree, main_work),
-            'identifiers': self.extract_identifiers(tree, main_work),
-            'eurovoc': self.extract_eurovoc(tree, main_work),
-            'caselaw': self.extract_caselaw(tree),
-            'implementation': self.extract_implementation(tree),
-            'legalRelations': self.extract_legal_relations(tree, main_work),
-            'metadata': self.extract_metadata(tree, main_work)
+            section: extract() for section, extract in extractors.items()
+            if sections is None or section in sections
         }
         
         # Calculate statistics
         stats = self.calculate_stats(document_data)
         
-        return {
-            'extraction_timestamp': datetime.now().isoformat(),
-            'selected_language': 'eng',
-            'available_languages': languages,
-            'document': document_data,
-            'stats': stats
+        # Deterministic payload: save_json adds the extraction time of written files
+        metadata = {
+            'selected_language': 'eng'
         }
+        if 'languages' in document_data:
+            metadata['available_languages'] = document_data['languages']
+        metadata['document'] = document_data
+        metadata['stats'] = stats
+        return metadata
     
-    def save_json(self, data, output_path):
-        """Save metadata as formatted JSON"""
+    def save_json(self, data, output_path, xml_path=None):
+        """
+        Save metadata as formatted JSON (the compact schema without indentation),
+        with its content_hash, through replace_file.
+        
+        The content of a file that already holds the same content_hash is left
+        alone; only its mtime is refreshed when it is older than xml_path, its
+        notice, so the inventory no longer counts it as stale. A written file
+        gets its extraction_timestamp, which the content_hash leaves out.
+        
+        Returns:
+            bool: Whether the file was (re)written
+        """
+        output_path = Path(output_path)
+        compact = self.schema == 'compact'
+        payload = with_content_hash(CompactSchema.compact(data) if compact else data)
+        
+        if stored_content_hash(output_path) == payload['content_hash']:
+            try:
+                if xml_path is not None and output_path.stat().st_mtime_ns < Path(xml_path).stat().st_mtime_ns:
+                    os.utime(output_path)
+            except OSError:
+                pass
+            return False
+        
+        stamped = {'content_hash': payload['content_hash'], 'extraction_timestamp': datetime.now().isoformat()}
+        stamped.update(payload)
+        if compact:
+            text = json.dumps(stamped, ensure_ascii=False, separators=(',', ':'))
+        else:
+            text = json.dumps(stamped, indent=2, ensure_ascii=False)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    
-    def process_document(self, xml_path, celex=None, output_dir=None):
+        replace_file(output_path, text.encode('utf-8'), self.sync_outputs)
+        return True
+
+    def process_document(self, xml_path, celex=None, output_dir=None, sections=None, data=None):
         """
         Process a single document.
         
@@ -697,15 +3002,85 @@ class CellarXMLParser:
             xml_path: Path to XML file
             celex: CELEX ID (will be extracted if not provided)
             output_dir: Output directory (uses XML directory if not provided)
-            
+            sections: Output sections to extract (default: the parser's selection)
+            data: The notice file's bytes, if already read (ReadAhead)
+        
+        Returns:
+            ExtractionResult: unpacks as (success, output_path, error_message)
+        """
+        return self.run_document(xml_path, celex, 'json', output_dir, sections, data)
+    
+    def process_for_batch(self, xml_path, celex=None, output_format='json', data=None):
+        """
+        process_document() for process_batch.
+        
+        Returns:
+            ExtractionResult: its output is the output path for 'json' and
+            (celex, encoded document) for the single writer of the 'jsonl'
+            and 'sqlite' outputs
+        """
+        return self.run_document(xml_path, celex, output_format, data=data)
+    
+    def run_document(self, xml_path, celex, output_format, output_dir=None, sections=None, data=None):
+        """Extract one document and save or encode it; failures are returned, not raised"""
+        xml_path = Path(xml_path)
+        timings = {}
+        start = time.perf_counter()
+        try:
+            celex, metadata = self.extract_document(xml_path, celex, sections, data)
+            timings['extract'] = time.perf_counter() - start
+            written = None
+            if output_format == 'json':
+                output, written = self.save_document(metadata, celex, xml_path, output_dir)
+                timings['save'] = time.perf_counter() - start - timings['extract']
+            else:
+                output = (celex, self.encode_document(output_format, metadata))
+                timings['encode'] = time.perf_counter() - start - timings['extract']
+            result = ExtractionResult(xml_path, True, output, celex=celex, stats=metadata.get('stats'),
+                                      written=written)
+        except Exception as e:
+            result = ExtractionResult(xml_path, False, error=str(e), error_type=failure_class(e))
+        # With profiling on, the document's stages so far
+        if self.profiler is not None and self.profiler.current:
+            timings.update(self.profiler.current)
+        timings['total'] = time.perf_counter() - start
+        result.timings = timings
+        return result
+    
+    def save_document(self, metadata, celex, xml_path, output_dir=None):
+        """
+        Save a document's JSON next to its notice (or in output_dir).
+        
+        Returns:
+            tuple: (output_path, written), written False if the file was unchanged
+        """
+        if output_dir:
+            output_path = Path(output_dir) / f"{celex}_metadata.json"
+        else:
+            output_path = xml_path.parent / f"{celex}_metadata.json"
+        return output_path, self.save_json(metadata, output_path, xml_path)
+
+    def encode_document(self, output_format, metadata):
+        """Encode metadata for the single writer of a corpus output format"""
+        if output_format == 'jsonl':
+            metadata = with_content_hash(CompactSchema.compact(metadata) if self.schema == 'compact' else metadata)
+        return CORPUS_WRITERS[output_format].encode(metadata)
+    
+    def extract_document(self, xml_path, celex=None, sections=None, data=None):
+        """
+        Extract the metadata of a single document without saving it.
+        
+        sections: output sections to extract (default: the parser's selection)
+        data: the notice file's bytes, if already read (ReadAhead)
+        
         Returns:
-            tuple: (success, output_path, error_message)
+            tuple: (celex, metadata dict)
         """
         try:
             xml_path = Path(xml_path)
             
             # Parse XML
-            tree = self.parse_xml_file(xml_path)
+            tree = self.parse_xml_file(xml_path, data)
             
             # Extract CELEX hint from folder name if not provided
             celex_hint = celex
@@ -736,64 +3111,135 @@ class CellarXMLParser:
             # Extract CELEX from the identified main work - prefer original acts (starting with '3')
             if not celex:
                 if main_work is not None:
-                    celex_values = main_work.xpath('.//RESOURCE_LEGAL_ID_CELEX/VALUE/text()')
-                    # Prefer CELEX starting with '3'
-                    for val in celex_values:
-                        if val and val.strip().startswith('3'):
-                            celex = val.strip()
-                            break
-                    # Fallback to first CELEX
-                    if not celex and celex_values:
-                        celex = celex_values[0].strip() if celex_values[0] else None
+                    celex = self.main_celex(main_work)
                 if not celex:
                     celex = celex_hint if celex_hint else 'unknown'
             
             # Build metadata
-            metadata = self.build_metadata_json(tree, main_work, celex)
-            
-            # Determine output path
-            if output_dir:
-                output_path = Path(output_dir) / f"{celex}_metadata.json"
-            else:
-                output_path = xml_path.parent / f"{celex}_metadata.json"
-            
-            # Save JSON
-            self.save_json(metadata, output_path)
-            
-            return (True, output_path, None)
-            
-        except Exception as e:
-            return (False, None, str(e))
+            return celex, self.build_metadata_json(tree, main_work, celex, sections)
+        
+        finally:
+            # Release the document held by the indexes
+            self.index = None
+            self.celex_index = None
+            self.language_summary = None
+            self.pruned_languages = None
     
-    def process_batch(self, root_dir, limit=None, skip_existing=True, verbose=False):
+    def process_batch(self, root_dir, limit=None, skip_existing=True, verbose=False, workers=1,
+                      article_table=None, cache=None, inventory_index=None, output_format='json',
+                      output_file=None, profile=None, read_ahead=64 << 20, read_threads=4,
+                      quarantine=None, retry_quarantined=False, aggregate=None, eurovoc_dictionary=None,
+                      fsync_batch=256):
         """
         Process multiple documents in a directory tree.
         
         Args:
             root_dir: Root directory to scan
             limit: Max number of documents to process
-            skip_existing: Skip if JSON already exists
+            skip_existing: Skip if a metadata JSON at least as new as the notice exists
             verbose: Print detailed progress
+            workers: Number of worker processes (1 = process serially)
+            article_table: Path to save the raw -> parsed article reference table of the batch
+            cache: ExtractionCache (or path of its SQLite file). Notices whose content,
+                   config and extractor version match a cached extraction are skipped;
+                   replaces the skip_existing check
+            inventory_index: Inventory index file; rescans only list directories whose mtime changed
+            output_format: 'json' (one file next to each notice), 'jsonl' (one corpus file)
+                           or 'sqlite' (one database of normalized tables)
+            output_file: JSONL corpus file ('.jsonl' or '.jsonl.zst') or SQLite database;
+                         appended to when a cache is used, so that skipped documents are kept
+            profile: Path of a per-document stage timing CSV; also prints p50/p95/max and the
+                     share of every stage (and adds the summary to the statistics as 'profile')
+            read_ahead: Byte budget of the notices read into memory ahead of the parser
+                        (0 = every notice is read by its parser)
+            read_threads: Threads reading notices ahead
+            quarantine: FailureQuarantine (or path of its SQLite file). Notices that failed
+                        are quarantined and skipped by later batches until their content changes
+            retry_quarantined: Process quarantined notices again (released if they succeed)
+            aggregate: ExtractionAggregator fed with every document (default: a new one)
+            eurovoc_dictionary: EurovocDictionary (or path of its SQLite file). Documents only
+                                store Eurovoc IDs; labels new to the dictionary are added to it
+            fsync_batch: Per-document JSON outputs are fsynced before they are renamed into
+                         place, and their directories every fsync_batch written files and at the
+                         end of the batch (0 = never fsync)
             
         Returns:
-            dict: Statistics about processing
+            dict: Statistics about processing (ExtractionAggregator.summary)
         """
         root_dir = Path(root_dir)
-        results = {
-            'success': 0,
-            'failed': 0,
-            'skipped': 0,
-            'errors': []
-        }
+        if output_format != 'json' and not output_file:
+            raise ValueError(f"output_format '{output_format}' requires an output_file")
+        owns_cache = cache is not None and not isinstance(cache, ExtractionCache)
+        if owns_cache:
+            cache = ExtractionCache(cache)
+        owns_quarantine = quarantine is not None and not isinstance(quarantine, FailureQuarantine)
+        if owns_quarantine:
+            quarantine = FailureQuarantine(quarantine)
+        owns_dictionary = eurovoc_dictionary is not None and not isinstance(eurovoc_dictionary, EurovocDictionary)
+        if owns_dictionary:
+            eurovoc_dictionary = EurovocDictionary(eurovoc_dictionary)
+        if eurovoc_dictionary is not None:
+            self.use_eurovoc_dictionary(eurovoc_dictionary.ids())
+        writer = None
+        profiler = self.enable_profiling() if profile else None
+        # Set before the worker processes copy the parser
+        sync_outputs, self.sync_outputs = self.sync_outputs, bool(fsync_batch)
+        try:
+            if output_format != 'json':
+                # A new corpus file holds none of the documents cached for an older one
+                if cache is not None and not Path(output_file).exists():
+                    cache.forget(output_file)
+                writer = CORPUS_WRITERS[output_format](output_file, append=cache is not None)
+            results = self.run_batch(root_dir, limit, skip_existing, verbose, workers, article_table, cache,
+                                     inventory_index, writer, read_ahead, read_threads, quarantine,
+                                     retry_quarantined, aggregate or ExtractionAggregator(), eurovoc_dictionary,
+                                     OutputSync(fsync_batch) if fsync_batch and output_format == 'json' else None)
+            if profiler is not None:
+                profiler.print_summary()
+                profiler.save_csv(profile)
+                print(f"Saved stage timings of {len(profiler.documents)} documents to {profile}")
+                results['profile'] = profiler.summary()
+            return results
+        finally:
+            self.sync_outputs = sync_outputs
+            if profiler is not None:
+                self.disable_profiling()
+            if writer is not None:
+                writer.close()
+            if owns_cache:
+                cache.close()
+            elif cache is not None:
+                cache.commit()
+            if owns_quarantine:
+                quarantine.close()
+            elif quarantine is not None:
+                quarantine.commit()
+            if eurovoc_dictionary is not None:
+                self.use_eurovoc_dictionary(None)
+                if owns_dictionary:
+                    eurovoc_dictionary.close()
+    
+    def run_batch(self, root_dir, limit, skip_existing, verbose, workers, article_table, cache,
+                  inventory_index, writer, read_ahead, read_threads, quarantine, retry_quarantined, aggregate,
+                  eurovoc_dictionary, output_sync):
+        """process_batch() body, with the cache, the quarantine, the Eurovoc dictionary and the corpus writer opened"""
         
-        # Find all cellar_tree_notice.xml files
-        xml_files = list(root_dir.rglob('cellar_tree_notice.xml'))
+        # Find all cellar_tree_notice.xml files and their existing outputs
+        plan = CorpusInventory(root_dir, inventory_index).plan()
+        xml_files = [entry.xml_path for entry in plan.notices]
         
         if limit:
             xml_files = xml_files[:limit]
         
         print(f"Found {len(xml_files)} XML files to process")
         
+        # Stop once instead of failing every compressed notice
+        if zstandard is None and any(xml_path.suffix == '.zst' for xml_path in xml_files):
+            raise ImportError(ZSTD_NOTICES_REQUIRED)
+        
+        output_format = 'json' if writer is None else writer.FORMAT
+        todo = []
+        digests = {}
         for i, xml_path in enumerate(xml_files, 1):
             # Extract CELEX from folder name or XML
             folder_name = xml_path.parent.name
@@ -804,35 +3250,698 @@ class CellarXMLParser:
             if celex_match:
                 celex = celex_match.group(1)
             
-            # Check if output already exists
-            if celex:
-                output_path = xml_path.parent / f"{celex}_metadata.json"
-                if skip_existing and output_path.exists():
-                    results['skipped'] += 1
+            # Check the cache for an extraction of the same content and config
+            if cache is not None:
+                digest = digests[xml_path] = cache.notice_digest(xml_path)
+                if cache.lookup(digest, self.config_hash, output_format,
+                                None if writer is None else writer.path):
+                    aggregate.skip()
                     if verbose:
-                        print(f"[{i}/{len(xml_files)}] Skipped: {celex} (already exists)")
+                        print(f"[{i}/{len(xml_files)}] Skipped: {folder_name} (unchanged)")
                     continue
             
-            # Process document
-            if verbose:
-                print(f"[{i}/{len(xml_files)}] Processing: {xml_path.parent.name}")
+            # Check if an up-to-date output already exists
+            elif skip_existing and writer is None and plan.status(xml_path) == 'skip':
+                aggregate.skip()
+                if verbose:
+                    print(f"[{i}/{len(xml_files)}] Skipped: {folder_name} (already exists)")
+                continue
             
-            success, out_path, error = self.process_document(xml_path, celex)
+            # Skip notices that failed before, unless they changed since
+            if quarantine is not None and not retry_quarantined and quarantine.contains(xml_path):
+                aggregate.skip(quarantined=True)
+                if verbose:
+                    print(f"[{i}/{len(xml_files)}] Skipped: {folder_name} (quarantined)")
+                continue
             
-            if success:
-                results['success'] += 1
+            todo.append((i, xml_path, celex))
+        
+        references = set()
+        if article_table:
+            ArticleReferenceParser.collect_references()
+            ArticleReferenceParser.drain_references()
+        
+        def record(xml_path, result):
+            if result.success and writer is not None:
+                # Single writer: documents from all workers are written as they arrive
+                start = time.perf_counter()
+                writer.write_encoded(*result.output, xml_path)
+                seconds = time.perf_counter() - start
+                result.timings[StageProfiler.WRITE_STAGE] = seconds
+                result.timings['total'] = result.timings.get('total', 0.0) + seconds
+                if self.profiler is not None:
+                    self.profiler.add_time(xml_path, StageProfiler.WRITE_STAGE, seconds)
+                result.output = writer.path
+            aggregate.add(result)
+            if result.written and output_sync is not None:
+                output_sync.add(result.output)
+            if result.success:
+                if cache is not None:
+                    cache.store(digests[xml_path], self.config_hash, result.output, output_format)
+                if quarantine is not None and retry_quarantined:
+                    quarantine.release(xml_path)
                 if verbose:
-                    print(f"  ✓ Success: {out_path.name}")
+                    print(f"  ✓ Success: {result.output.name}{' (unchanged)' if result.written is False else ''}")
             else:
-                results['failed'] += 1
-                results['errors'].append({
-                    'file': str(xml_path),
-                    'error': error
-                })
+                # A crashed worker says nothing about the notice itself
+                if quarantine is not None and result.error_type is not None:
+                    quarantine.add(xml_path, result.error_type, result.error)
                 if verbose:
-                    print(f"  ✗ Failed: {error}")
+                    print(f"  ✗ Failed: {result.error}")
+        
+        # Notice bytes read ahead of the parser(s), within the byte budget
+        reader = None
+        if read_ahead:
+            reader = ReadAhead([(xml_path, plan.by_path[xml_path].size) for _, xml_path, _ in todo],
+                               read_ahead, read_threads)
+            buffers = iter(reader)
+        else:
+            buffers = ((xml_path, None, 0) for _, xml_path, _ in todo)
+        
+        try:
+            if workers > 1 and len(todo) > 1:
+                # Each worker process keeps one parser (and its compiled plan) for its lifetime
+                done = aggregate.skipped + aggregate.quarantined
+                
+                def finish(future):
+                    nonlocal done
+                    xml_path = futures.pop(future)
+                    done += 1
+                    try:
+                        result, seen, timings, labels = future.result()
+                        references.update(seen)
+                        if self.profiler is not None:
+                            self.profiler.documents.extend(timings)
+                        if eurovoc_dictionary is not None:
+                            eurovoc_dictionary.add(labels)
+                    except Exception as e:
+                        result = ExtractionResult(xml_path, False, error=f"Worker failed: {e}")
+                    if verbose:
+                        print(f"[{done}/{len(xml_files)}] Processed: {xml_path.parent.name}")
+                    record(xml_path, result)
+                
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                         initargs=(self, bool(article_table))) as executor:
+                    # Keep a few documents queued per worker; progress is reported in completion order
+                    futures = {}
+                    for (_, xml_path, celex), (_, data, size) in zip(todo, buffers):
+                        while len(futures) >= 2 * workers:
+                            for future in wait(futures, return_when=FIRST_COMPLETED)[0]:
+                                finish(future)
+                        future = executor.submit(_process_in_batch_worker, xml_path, celex, output_format, data)
+                        # The buffer is handed to the worker; its budget is free once the worker is done
+                        if reader is not None:
+                            future.add_done_callback(lambda _, size=size: reader.release(size))
+                        futures[future] = xml_path
+                    while futures:
+                        for future in wait(futures, return_when=FIRST_COMPLETED)[0]:
+                            finish(future)
+            else:
+                for (i, xml_path, celex), (_, data, size) in zip(todo, buffers):
+                    # Process document
+                    if verbose:
+                        print(f"[{i}/{len(xml_files)}] Processing: {xml_path.parent.name}")
+                    
+                    record(xml_path, self.process_for_batch(xml_path, celex, output_format, data))
+                    if eurovoc_dictionary is not None:
+                        eurovoc_dictionary.add(self.drain_eurovoc_labels())
+                    if reader is not None:
+                        reader.release(size)
+        finally:
+            buffers.close()
+            if output_sync is not None:
+                output_sync.sync()
+        
+        if article_table:
+            references.update(ArticleReferenceParser.stop_collecting())
+            ArticleReferenceParser.save_normalization_table(article_table, references)
+            print(f"Saved {len(references)} article references to {article_table}")
+        
+        return aggregate.summary()
+
+
+# Parser owned by a process_batch worker process for its whole lifetime
+_batch_parser = None
+
+
+def _init_batch_worker(parser, collect_references=False):
+    """Process pool initializer: keep the (unpickled) parser for all tasks"""
+    global _batch_parser
+    _batch_parser = parser
+    if collect_references:
+        ArticleReferenceParser.collect_references()
+
+
+def _process_in_batch_worker(xml_path, celex, output_format='json', data=None):
+    """Process one document (from its read-ahead bytes, if given) with the worker's long-lived parser"""
+    result = _batch_parser.process_for_batch(xml_path, celex, output_format, data)
+    # New article references (stage timings, Eurovoc labels) travel back with the
+    # result for the batch normalization table (profile, Eurovoc dictionary)
+    timings = _batch_parser.profiler.take() if _batch_parser.profiler is not None else []
+    return result, ArticleReferenceParser.drain_references(), timings, _batch_parser.drain_eurovoc_labels()
+
+
+class StreamedNode:
+    """WORK or EXPRESSION element captured by the streaming engine"""
+    
+    def __init__(self, node_id, tag, parent_id, parent_tag, work_ids):
+        self.id = node_id
+        self.tag = tag
+        self.parent_id = parent_id
+        self.parent_tag = parent_tag
+        self.work_ids = work_ids  # ids of the enclosing WORK elements
+        self.fields = {}          # XPath -> raw values in document order
+
+
+class StreamedNotice:
+    """Everything CellarStreamingParser keeps from one tree notice"""
+    
+    def __init__(self):
+        self.works = []          # StreamedNode per WORK, in document order
+        self.expressions = []    # StreamedNode per EXPRESSION, in document order
+        self.fields = {}         # tree-level XPath -> raw values in document order
+        self.lang_attributes = set()
+        self.caselaw = {}        # case type -> caselaw items
+        self.implementation = []
+
+
+class CellarStreamingParser(CellarXMLParser):
+    """
+    Tree-less parser for CELLAR tree notices built on lxml.etree.iterparse.
+    
+    Instead of building a DOM, every XPath used by build_metadata_json is
+    registered on the tag of its first step (its "anchor"). When an anchor
+    element ends, the remaining path is evaluated on that small subtree and
+    the values are stored on the enclosing WORK/EXPRESSION or on the notice.
+    Elements are cleared as soon as no open anchor needs them, so memory
+    stays flat no matter how many expressions and manifestations a notice has.
+    It trades time for that: the Python loop over every start/end event makes
+    it slower than the tree engine.
+    
+    The extract_* methods of CellarXMLParser run unchanged on the collected
+    values, so the JSON output is identical to the tree engine.
+    """
+    
+    
+    # Tree-level paths read by the extractors outside of the config sections, by output section
+    TREE_XPATHS = {
+        'title': [DOCUMENT_XPATHS['expression_titles']],
+        'languages': [DOCUMENT_XPATHS['expression_languages'], DOCUMENT_XPATHS['lang_tags']]
+    }
+    
+    # WORK-relative paths read outside of MAIN_WORK_XPATHS
+    WORK_XPATHS = ['.//RESOURCE_LEGAL_ID_CELEX']
+    
+    # Config sections whose '//' paths are used as tree-level fallbacks
+    TREE_SECTIONS = ['title', 'dates', 'identifiers', 'eurovoc', 'legal_relations', 'metadata']
+    
+    def __init__(self, config_path='cellar_xpath_config.json', title_languages=None):
+        super().__init__(config_path, title_languages)
+        self.compile_stream_plan()
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        for key in ('anchors', 'record_anchors', 'stream_paths'):
+            del state[key]
+        return state
+    
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.compile_stream_plan()
+    
+    def compile_stream_plan(self):
+        """
+        Register the extraction XPaths of the selected sections on their anchor
+        tags. Elements below no registered anchor are dropped as soon as they
+        end, so a narrow --sections selection streams through most of the notice.
+        """
+        self.anchors = {}        # anchor tag -> [(xpath, context, axis, compiled, as_label)]
+        self.record_anchors = {} # anchor tag -> [(kind, key, compiled)]
+        self.stream_paths = set()
+        
+        eurovoc_labels = {cfg for key, cfg in self.config['eurovoc'].items() if key.endswith('_label')}
+        
+        for section in self.TREE_SECTIONS:
+            if self.extracts(section):
+                for xpath in self.config[section].values():
+                    if xpath.startswith('//'):
+                        self.register_path(xpath, None, as_label=xpath in eurovoc_labels)
+        for section, xpaths in self.TREE_XPATHS.items():
+            if self.extracts(section):
+                for xpath in xpaths:
+                    self.register_path(xpath, None)
+        
+        # The main work is identified by the CELEX values of every WORK
+        for xpath in self.WORK_XPATHS:
+            self.register_path(xpath, 'WORK')
+        self.register_path(MAIN_WORK_XPATHS['identifiers']['celex_values'], 'WORK')
+        for section, xpaths in MAIN_WORK_XPATHS.items():
+            if self.extracts(section):
+                for xpath in xpaths.values():
+                    self.register_path(xpath, 'WORK')
+        if self.extracts('eurovoc'):
+            for xpath in self.config['eurovoc'].values():
+                self.register_path('.//' + xpath.lstrip('/'), 'WORK', as_label=xpath in eurovoc_labels)
+        if self.extracts('title'):
+            for xpath in EXPRESSION_XPATHS.values():
+                self.register_path(xpath, 'EXPRESSION')
+        
+        # Case law and implementation entries are built from the whole anchor subtree
+        if self.extracts('caselaw'):
+            for case_type, case_cfg in self.config['caselaw'].items():
+                self.register_record('caselaw', case_type, case_cfg['xpath'])
+        if self.extracts('implementation'):
+            self.register_record('implementation', None, self.config['implementation']['xpath'])
+    
+    def extracts(self, section):
+        """Whether a config/output section is part of the section selection"""
+        return self.sections is None or CONFIG_SECTIONS.get(section, section) in self.sections
+    
+    def select_sections(self, sections):
+        super().select_sections(sections)
+        self.compile_stream_plan()
+    
+    @staticmethod
+    def split_anchor(xpath):
+        """split_anchor() for paths the streaming engine must support"""
+        anchored = split_anchor(xpath)
+        if anchored is None:
+            raise ValueError(f"XPath not supported by the streaming engine: {xpath}")
+        return anchored
+    
+    def register_path(self, xpath, context, as_label=False):
+        """Collect xpath relative to every WORK/EXPRESSION (context) or the notice (None)"""
+        if xpath in self.stream_paths:
+            return
+        axis, anchor, compiled = self.split_anchor(xpath)
+        self.anchors.setdefault(anchor, []).append((xpath, context, axis, compiled, as_label))
+        self.stream_paths.add(xpath)
+    
+    def register_record(self, kind, key, xpath):
+        """Build caselaw/implementation entries from every element matched by xpath"""
+        axis, anchor, compiled = self.split_anchor(xpath)
+        self.record_anchors.setdefault(anchor, []).append((kind, key, compiled))
+    
+    def parse_xml_file(self, xml_path, data=None):
+        """Collect all extraction fields from an XML file (or its read-ahead bytes) in one forward pass"""
+        try:
+            with open_notice(xml_path, data) as f:
+                context = etree.iterparse(
+                    f, events=('start', 'end'),
+                    remove_blank_text=True, huge_tree=True
+                )
+                if self.pruner is not None:
+                    self.pruned_languages = LanguageSummary()
+                    context = self.pruner.events(context, self.pruned_languages)
+                return self.collect(context)
+        except Exception as e:
+            raise Exception(f"Failed to parse XML: {e}")
+    
+    def collect(self, context):
+        """Consume iterparse events and return a StreamedNotice"""
+        notice = StreamedNotice()
+        anchors = self.anchors
+        record_anchors = self.record_anchors
+        stack = []            # (node id, tag, StreamedNode or None) per open element
+        open_nodes = {'WORK': [], 'EXPRESSION': []}
+        open_anchors = 0
+        next_id = 0
+        # An anchor nested in one of the same tag (a relation of an embedded WORK) ends
+        # first; its values wait for the enclosing one, so they stay in document order
+        open_anchor_ids = {}  # anchor tag -> ids of its open elements
+        deferred = {}         # anchor id -> [(values list, values)] of nested anchors
+        
+        for event, elem in context:
+            tag = elem.tag
+            
+            if event == 'start':
+                for lang in (elem.get(XML_LANG), elem.get('lang')):
+                    if lang:
+                        notice.lang_attributes.add(lang)
+                
+                node = None
+                if tag in open_nodes:
+                    parent_id, parent_tag = (stack[-1][0], stack[-1][1]) if stack else (None, None)
+                    node = StreamedNode(next_id, tag, parent_id, parent_tag,
+                                        [work.id for work in open_nodes['WORK']])
+                    open_nodes[tag].append(node)
+                    (notice.works if tag == 'WORK' else notice.expressions).append(node)
+                if tag in anchors or tag in record_anchors:
+                    open_anchors += 1
+                    open_anchor_ids.setdefault(tag, []).append(next_id)
+                stack.append((next_id, tag, node))
+                next_id += 1
+                continue
+            
+            elem_id, _, node = stack.pop()
+            if node is not None:
+                open_nodes[tag].pop()
+            
+            if tag in anchors or tag in record_anchors:
+                found = []
+                for xpath, context_tag, axis, compiled, as_label in anchors.get(tag, ()):
+                    values = self.stream_values(compiled(elem), as_label)
+                    if not values:
+                        continue
+                    if context_tag is None:
+                        found.append((notice.fields.setdefault(xpath, []), values))
+                    elif axis == 'descendant':
+                        for owner in open_nodes[context_tag]:
+                            found.append((owner.fields.setdefault(xpath, []), values))
+                    elif stack and stack[-1][2] is not None and stack[-1][1] == context_tag:
+                        found.append((stack[-1][2].fields.setdefault(xpath, []), values))
+                
+                for kind, key, compiled in record_anchors.get(tag, ()):
+                    for match in compiled(elem):
+                        if kind == 'caselaw':
+                            found.append((notice.caselaw.setdefault(key, []), self.caselaw_items(match, key)))
+                        else:
+                            item = self.implementation_item(match, self.config['implementation'])
+                            if item:
+                                found.append((notice.implementation, [item]))
+                
+                found.extend(deferred.pop(elem_id, ()))
+                ids = open_anchor_ids[tag]
+                ids.pop()
+                if ids:
+                    deferred.setdefault(ids[-1], []).extend(found)
+                else:
+                    for values, new_values in found:
+                        values.extend(new_values)
+                open_anchors -= 1
+            
+            # Drop consumed elements unless an enclosing anchor still needs them
+            if not open_anchors:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        
+        return notice
+    
+    @staticmethod
+    def stream_values(results, as_label):
+        """Turn XPath results into the raw values the accessors work on"""
+        values = []
+        for result in results:
+            if as_label:
+                values.append((result.text, result.get('xml:lang') or result.get('lang')))
+            elif hasattr(result, 'text'):
+                values.append(result.text)
+            else:
+                values.append(str(result))
+        return values
+    
+    def collected(self, context, xpath):
+        """Return the raw values collected for xpath on a StreamedNotice/StreamedNode"""
+        if xpath not in self.stream_paths:
+            raise KeyError(f"XPath not collected by the streaming engine: {xpath}")
+        return context.fields.get(xpath, [])
+    
+    def build_celex_index(self, notice):
+        """Build the CELEX -> WORK index from the collected WORK values"""
+        values = {
+            work: self.celex_values(work) for work in notice.works
+            if self.collected(work, './/RESOURCE_LEGAL_ID_CELEX')
+        }
+        return CelexIndex(notice.works, values)
+    
+    def celex_values(self, work):
+        """Return all RESOURCE_LEGAL_ID_CELEX values below a WORK"""
+        return self.collected(work, MAIN_WORK_XPATHS['identifiers']['celex_values'])
+    
+    def extract_text_from_element(self, element, xpath):
+        """Collected counterpart of CellarXMLParser.extract_text_from_element"""
+        values = self.collected(element, xpath)
+        if values:
+            text = values[0]
+            return text.strip() if text else None
+        return None
+    
+    def extract_array_from_element(self, element, xpath):
+        """Collected counterpart of CellarXMLParser.extract_array_from_element"""
+        return [text.strip() for text in self.collected(element, xpath) if text and text.strip()]
+    
+    extract_text = extract_text_from_element
+    extract_array = extract_array_from_element
+    
+    def extract_texts(self, context, xpath):
+        """Raw texts collected for xpath"""
+        return self.collected(context, xpath)
+    
+    def extract_labels(self, context, xpath):
+        """(text, language) pairs collected for xpath"""
+        return self.collected(context, xpath)
+    
+    def detect_languages(self, notice):
+        """Detect available languages from the collected language fields"""
+        summary = LanguageSummary()
+        for text in self.collected(notice, DOCUMENT_XPATHS['expression_languages']):
+            summary.add_expression_language(text)
+        for text in self.collected(notice, DOCUMENT_XPATHS['lang_tags']):
+            summary.add_lang_tag(text)
+        for lang in notice.lang_attributes:
+            summary.add_attribute(lang)
+        if self.pruned_languages is not None:
+            summary.languages.update(self.pruned_languages.languages)
+        return summary.codes()
+    
+    def title_expressions(self, notice, main_work):
+        """Return the EXPRESSION nodes that belong to the main work"""
+        if main_work is not None:
+            if main_work.parent_tag == 'NOTICE':
+                return [expr for expr in notice.expressions if expr.parent_id == main_work.parent_id]
+            return [expr for expr in notice.expressions if main_work.id in expr.work_ids]
+        return notice.expressions
+    
+    def extract_caselaw(self, notice):
+        """Case law entries grouped in config order, as in the tree engine"""
+        return [item for case_type in self.config['caselaw']
+                for item in notice.caselaw.get(case_type, [])]
+    
+    def extract_implementation(self, notice):
+        """Implementation entries built while streaming"""
+        return notice.implementation
+
+
+XSL_NAMESPACE = 'http://www.w3.org/1999/XSL/Transform'
+
+
+class CellarXSLTParser(CellarStreamingParser):
+    """
+    Parser that runs the whole extraction mapping as one XSLT stylesheet.
+    
+    Every XPath the streaming engine collects (tree-level, per WORK and per
+    EXPRESSION), the case law and implementation records and the language
+    attributes are compiled into a single stylesheet that libxslt applies
+    once per document, in one apply-templates walk (see compile_stylesheet).
+    It is not faster than the tree engine, whose tag index beats libxslt's
+    template dispatch. Its result is loaded into a StreamedNotice, so Python
+    only post-processes it (main work choice, article parsing, stats) with
+    the accessors of the streaming engine, and the JSON output is identical
+    to the other engines.
+    """
+    
+    def __init__(self, config_path='cellar_xpath_config.json', title_languages=None):
+        super().__init__(config_path, title_languages)
+        self.compile_stylesheet()
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        for key in ('stylesheet', 'stylesheet_paths'):
+            del state[key]
+        return state
+    
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.compile_stylesheet()
+    
+    def select_sections(self, sections):
+        super().select_sections(sections)
+        self.compile_stylesheet()
+    
+    def compile_stylesheet(self):
+        """
+        Build and compile the extraction stylesheet.
+        
+        The stylesheet walks the notice once with apply-templates. Each anchor
+        tag (see CellarStreamingParser) has a match template that emits the
+        values of the paths and records registered on it, then walks on into
+        its children; WORK and EXPRESSION templates emit their node first.
+        Every other element only passes the walk on, so no path costs a scan
+        of its own. A field is only emitted when its path matches.
+        
+        Sets self.stylesheet (etree.XSLT) and self.stylesheet_paths (field
+        number -> (xpath, context, as_label)). The result lists, in document order:
+            
+            <notice>
+              <node tag="WORK" id=".." parent=".." parent-tag=".." works=".."/>
+              <f k="0"><v>text</v><v none="1"/></f>          tree-level field
+              <f k="5" o="id1 id2"><v lang="en">..</v></f>    field of WORK/EXPRESSION nodes
+              <case k="interpreted_by"><celex/><ecli/><articles/></case>
+              <impl><identifier/><country/></impl>
+              <lang>en</lang>
+            </notice>
+        """
+        self.stylesheet_paths = []
+        
+        def xsl(parent, tag, **attributes):
+            return etree.SubElement(parent, f'{{{XSL_NAMESPACE}}}{tag}', **attributes)
+        
+        def values(parent, xpath, template='value'):
+            for_each = xsl(parent, 'for-each', select=xpath)
+            xsl(for_each, 'call-template', name=template)
+        
+        def relative(xpath):
+            """A registered path relative to its anchor element"""
+            match = ANCHORED_XPATH.match(xpath)
+            return 'self::' + xpath[len(match.group(1)):]
         
-        return results
+        def walk(parent):
+            xsl(parent, 'apply-templates', select='*')
+        
+        sheet = etree.Element(f'{{{XSL_NAMESPACE}}}stylesheet', version='1.0', nsmap={'xsl': XSL_NAMESPACE})
+        notice = etree.SubElement(xsl(sheet, 'template', match='/'), 'notice')
+        walk(notice)
+        if self.extracts('languages'):
+            lang = etree.SubElement(xsl(notice, 'for-each', select='//@xml:lang | //@lang'), 'lang')
+            xsl(lang, 'value-of', select='.')
+        walk(xsl(sheet, 'template', match='*'))
+        
+        records = {}
+        caselaw = self.config['caselaw'] if self.extracts('caselaw') else {}
+        for case_type, case_cfg in caselaw.items():
+            records.setdefault(self.split_anchor(case_cfg['xpath'])[1], []).append(('caselaw', case_type, case_cfg))
+        if self.extracts('implementation'):
+            impl_cfg = self.config['implementation']
+            records.setdefault(self.split_anchor(impl_cfg['xpath'])[1], []).append(('implementation', None, impl_cfg))
+        
+        for tag in sorted(set(self.anchors) | set(records) | {'WORK', 'EXPRESSION'}):
+            template = xsl(sheet, 'template', match=tag)
+            if tag in ('WORK', 'EXPRESSION'):
+                node = etree.SubElement(template, 'node', {
+                    'tag': tag, 'id': '{generate-id()}', 'parent': '{generate-id(..)}', 'parent-tag': '{name(..)}'
+                })
+                works = xsl(xsl(node, 'attribute', name='works'), 'for-each', select='ancestor::WORK')
+                xsl(works, 'value-of', select='generate-id()')
+                xsl(works, 'text').text = ' '
+            
+            for xpath, context, axis, _, as_label in self.anchors.get(tag, ()):
+                test = relative(xpath)
+                if context is not None and axis == 'child':
+                    # './A/B' of a WORK/EXPRESSION: only for anchors that are its children
+                    test = f'parent::{context} and {test}'
+                parent = xsl(template, 'if', test=test)
+                field = etree.SubElement(parent, 'f', k=str(len(self.stylesheet_paths)))
+                self.stylesheet_paths.append((xpath, context, as_label))
+                if context is not None:
+                    owners = xsl(field, 'attribute', name='o')
+                    if axis == 'child':
+                        xsl(owners, 'value-of', select='generate-id(..)')
+                    else:
+                        owners = xsl(owners, 'for-each', select=f'ancestor::{context}')
+                        xsl(owners, 'value-of', select='generate-id()')
+                        xsl(owners, 'text').text = ' '
+                values(field, relative(xpath), 'label' if as_label else 'value')
+            
+            for kind, case_type, cfg in records.get(tag, ()):
+                if kind == 'caselaw':
+                    case = etree.SubElement(xsl(template, 'for-each', select=relative(cfg['xpath'])),
+                                            'case', k=case_type)
+                    choose = xsl(etree.SubElement(case, 'celex'), 'choose')
+                    values(xsl(choose, 'when', test=cfg['celex']), cfg['celex'])
+                    values(xsl(choose, 'otherwise'), cfg['identifier'])
+                    for key in ('ecli', 'articles'):
+                        if key in cfg:
+                            values(etree.SubElement(case, key), cfg[key])
+                else:
+                    impl = etree.SubElement(xsl(template, 'for-each', select=relative(cfg['xpath'])), 'impl')
+                    for key in ('identifier', 'country'):
+                        values(etree.SubElement(impl, key), cfg[key])
+            walk(template)
+        
+        # Raw value of a matched node: the element's .text (absent: none="1"),
+        # the string value of anything else; labels also carry the lang attribute
+        for template in ('value', 'label'):
+            v = etree.SubElement(xsl(sheet, 'template', name=template), 'v')
+            if template == 'label':
+                copy_lang = xsl(xsl(v, 'if', test='@lang'), 'attribute', name='lang')
+                xsl(copy_lang, 'value-of', select='@lang')
+            choose = xsl(v, 'choose')
+            xsl(xsl(choose, 'when', test='not(self::*)'), 'value-of', select='.')
+            xsl(xsl(choose, 'when', test='node()[1][self::text()]'), 'value-of', select='node()[1]')
+            xsl(xsl(xsl(choose, 'otherwise'), 'attribute', name='none'), 'text').text = '1'
+        
+        self.stylesheet = etree.XSLT(sheet)
+    
+    def parse_xml_file(self, xml_path, data=None):
+        """Parse an XML file (or its read-ahead bytes) and run the extraction stylesheet on it"""
+        try:
+            result = self.stylesheet(self.read_tree(xml_path, data))
+        except Exception as e:
+            raise Exception(f"Failed to parse XML: {e}")
+        return self.load_result(result.getroot())
+    
+    @staticmethod
+    def result_values(parent, as_label=False):
+        """Raw values (or (text, language) pairs) of the <v> children of a result element"""
+        values = []
+        for v in parent:
+            text = None if v.get('none') is not None else (v.text or '')
+            values.append((text, v.get('lang')) if as_label else text)
+        return values
+    
+    def load_result(self, root):
+        """Turn the stylesheet result into a StreamedNotice"""
+        notice = StreamedNotice()
+        paths = self.stylesheet_paths
+        nodes = {}
+        
+        for elem in root:
+            tag = elem.tag
+            if tag == 'f':
+                if not len(elem):
+                    continue
+                xpath, context, as_label = paths[int(elem.get('k'))]
+                found = self.result_values(elem, as_label)
+                if context is None:
+                    notice.fields.setdefault(xpath, []).extend(found)
+                else:
+                    for owner in elem.get('o').split():
+                        nodes[owner].fields.setdefault(xpath, []).extend(found)
+            elif tag == 'node':
+                node = StreamedNode(elem.get('id'), elem.get('tag'), elem.get('parent'),
+                                    elem.get('parent-tag') or None, elem.get('works').split())
+                nodes[node.id] = node
+                (notice.works if node.tag == 'WORK' else notice.expressions).append(node)
+            elif tag == 'case':
+                case_type = elem.get('k')
+                ecli = elem.find('ecli')
+                ecli_texts = self.result_values(ecli) if ecli is not None else []
+                articles = elem.find('articles')
+                notice.caselaw.setdefault(case_type, []).extend(self.caselaw_entries(
+                    case_type,
+                    self.result_values(elem.find('celex')),
+                    ecli_texts[0] if ecli_texts else None,
+                    self.result_values(articles) if articles is not None else []
+                ))
+            elif tag == 'impl':
+                identifiers = self.result_values(elem.find('identifier'))
+                countries = self.result_values(elem.find('country'))
+                item = self.implementation_entry(identifiers[0] if identifiers else None,
+                                                 countries[0] if countries else None)
+                if item:
+                    notice.implementation.append(item)
+            elif tag == 'lang' and elem.text:
+                notice.lang_attributes.add(elem.text)
+        return notice
+
+
+# Extraction engines selectable with --engine
+ENGINES = {
+    'tree': CellarXMLParser,
+    'stream': CellarStreamingParser,
+    'xslt': CellarXSLTParser
+}
 
 
 def main():
@@ -853,18 +3962,105 @@ def main():
                        help='Print detailed progress')
     parser.add_argument('--config', type=str, default='cellar_xpath_config.json',
                        help='Path to XPath configuration file')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker processes for --root (default: 1)')
+    parser.add_argument('--read-ahead', type=float, default=64,
+                       help='MB of upcoming notices read into memory while --root parses (default: 64; 0 = off)')
+    parser.add_argument('--read-threads', type=int, default=4,
+                       help='Threads reading notices ahead (default: 4)')
+    parser.add_argument('--fsync-batch', type=int, default=256,
+                       help='fsync written JSON outputs before renaming them into place, and their directories '
+                            'every N files of a --root batch (default: 256; 0 = never fsync)')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='tree',
+                       help='Extraction engine: full DOM (tree, fastest), iterparse streaming with flat memory but slower '
+                            '(stream) or the mapping as one XSLT stylesheet, also slower (xslt)')
+    parser.add_argument('--languages', type=str,
+                       help='Only parse the EXPRESSIONs of these languages and English (e.g. fra,deu; "all" keeps '
+                            'every EXPRESSION) and skip all MANIFESTATIONs')
+    parser.add_argument('--title-languages', type=str,
+                       help='Only put the titles of these languages in title.multilingual (e.g. eng,fra,deu); '
+                            'the other EXPRESSIONs are skipped before any title XPath runs')
+    parser.add_argument('--sections', type=str,
+                       help=f'Only extract these output sections (comma-separated: {",".join(SECTIONS)}); '
+                            'the other extractors never run')
+    parser.add_argument('--schema', choices=SCHEMAS, default='full',
+                       help='JSON/JSONL output schema: full (default) or compact (deduplicated, no '
+                            'placeholders, unindented; see CompactSchema)')
+    parser.add_argument('--cache', type=str,
+                       help='SQLite extraction cache for --root: skip notices unchanged since their last extraction')
+    parser.add_argument('--quarantine', type=str,
+                       help='SQLite failure quarantine for --root: notices that failed are skipped by later '
+                            'batches until their content changes')
+    parser.add_argument('--retry-quarantined', action='store_true',
+                       help='Process quarantined notices again (released from the quarantine if they succeed)')
+    parser.add_argument('--quarantine-report', action='store_true',
+                       help='Print the notices of --quarantine grouped by error type and exit')
+    parser.add_argument('--eurovoc-dictionary', type=str,
+                       help='SQLite Eurovoc label dictionary for --root: documents only store Eurovoc IDs, '
+                            'new labels are added to the dictionary')
+    parser.add_argument('--eurovoc-thesaurus', type=str,
+                       help='Load the labels of a Eurovoc SKOS RDF/XML file (.rdf, .gz, .zst) into '
+                            '--eurovoc-dictionary first')
+    parser.add_argument('--inventory-index', type=str,
+                       help='Inventory index file for --root: later runs only rescan changed directories')
+    parser.add_argument('--output-format', choices=['json', 'jsonl', 'sqlite'], default='json',
+                       help='--root output: one JSON file per notice (json), one corpus file (jsonl) '
+                            'or one SQLite database (sqlite)')
+    parser.add_argument('--output-file', type=str,
+                       help='Corpus file for --output-format jsonl (.jsonl or .jsonl.zst) or sqlite')
+    parser.add_argument('--article-table', type=str,
+                       help='Save the raw -> parsed article reference table of a --root batch (JSON)')
+    parser.add_argument('--profile', type=str,
+                       help='Time every extraction stage of a --root batch: print p50/p95/max per stage '
+                            'and save per-document timings (CSV)')
     
     args = parser.parse_args()
     
     # Initialize parser
     try:
-        extractor = CellarXMLParser(args.config)
+        extractor = ENGINES[args.engine](args.config, args.title_languages)
+        if args.languages:
+            extractor.select_languages(
+                'all' if args.languages == 'all' else [lang.strip() for lang in args.languages.split(',') if lang.strip()]
+            )
+        if args.sections:
+            extractor.select_sections(args.sections)
+        extractor.select_schema(args.schema)
     except Exception as e:
         print(f"Error loading configuration: {e}")
         return 1
     
+    # Eurovoc thesaurus import (on its own or before a batch)
+    if args.eurovoc_thesaurus:
+        if not args.eurovoc_dictionary:
+            print("Error: --eurovoc-thesaurus requires --eurovoc-dictionary")
+            return 1
+        dictionary = EurovocDictionary(args.eurovoc_dictionary)
+        try:
+            count = dictionary.load_thesaurus(args.eurovoc_thesaurus)
+        except Exception as e:
+            print(f"Error loading Eurovoc thesaurus: {e}")
+            return 1
+        finally:
+            dictionary.close()
+        print(f"Loaded {count} Eurovoc labels into {args.eurovoc_dictionary}")
+        if not (args.xml or args.folder or args.root or args.quarantine_report):
+            return 0
+    
+    # Quarantine report
+    if args.quarantine_report:
+        if not args.quarantine:
+            print("Error: --quarantine-report requires --quarantine")
+            return 1
+        quarantine = FailureQuarantine(args.quarantine)
+        try:
+            quarantine.print_report()
+        finally:
+            quarantine.close()
+        return 0
+    
     # Single file mode
-    if args.xml:
+    elif args.xml:
         print(f"Processing single file: {args.xml}")
         success, output_path, error = extractor.process_document(
             args.xml, args.celex, args.output
@@ -880,10 +4076,10 @@ def main():
     # Folder mode
     elif args.folder:
         folder_path = Path(args.folder)
-        xml_path = folder_path / 'cellar_tree_notice.xml'
+        xml_path = find_notice(folder_path)
         
-        if not xml_path.exists():
-            print(f"Error: No cellar_tree_notice.xml found in {folder_path}")
+        if xml_path is None:
+            print(f"Error: No cellar_tree_notice.xml (.gz, .zst) found in {folder_path}")
             return 1
         
         print(f"Processing folder: {folder_path.name}")
@@ -898,30 +4094,61 @@ def main():
     
     # Batch mode
     elif args.root:
+        if args.output_format != 'json' and not args.output_file:
+            print(f"Error: --output-format {args.output_format} requires --output-file")
+            return 1
+        
         print(f"Scanning directory: {args.root}")
-        results = extractor.process_batch(
-            args.root,
-            limit=args.limit,
-            skip_existing=args.skip_existing,
-            verbose=args.verbose
-        )
+        aggregate = ExtractionAggregator()
+        try:
+            extractor.process_batch(
+                args.root,
+                limit=args.limit,
+                skip_existing=args.skip_existing,
+                verbose=args.verbose,
+                workers=args.workers,
+                article_table=args.article_table,
+                cache=args.cache,
+                inventory_index=args.inventory_index,
+                output_format=args.output_format,
+                output_file=args.output_file,
+                profile=args.profile,
+                read_ahead=int(args.read_ahead * (1 << 20)),
+                read_threads=args.read_threads,
+                fsync_batch=args.fsync_batch,
+                quarantine=args.quarantine,
+                retry_quarantined=args.retry_quarantined,
+                aggregate=aggregate,
+                eurovoc_dictionary=args.eurovoc_dictionary
+            )
+        except ImportError as e:
+            print(f"Error: {e}")
+            return 1
         
         # Print summary
         print("\n" + "="*60)
         print("PROCESSING SUMMARY")
         print("="*60)
-        print(f"✓ Success: {results['success']}")
-        print(f"✗ Failed:  {results['failed']}")
-        print(f"⏭ Skipped: {results['skipped']}")
+        print(f"✓ Success: {aggregate.success}")
+        print(f"✗ Failed:  {aggregate.failed}")
+        print(f"⏭ Skipped: {aggregate.skipped}")
+        if args.quarantine:
+            print(f"⊘ Quarantined (skipped): {aggregate.quarantined}")
+        if aggregate.unchanged:
+            print(f"= Unchanged (not rewritten): {aggregate.unchanged}")
+        if aggregate.success:
+            print("\nTotals: " + ", ".join(f"{name} {count}" for name, count in aggregate.totals.items()))
+            print(f"Mean extraction time: {aggregate.timings.get('extract', 0.0) / aggregate.success * 1000:.1f} ms")
         
-        if results['errors']:
-            print(f"\nErrors ({len(results['errors'])}):")
-            for err in results['errors'][:5]:
+        if aggregate.errors:
+            print("\nErrors by type: " + ", ".join(f"{name} {count}" for name, count in aggregate.error_types()))
+            print(f"\nErrors ({len(aggregate.errors)}):")
+            for err in aggregate.errors[:5]:
                 print(f"  - {Path(err['file']).parent.name}: {err['error']}")
-            if len(results['errors']) > 5:
-                print(f"  ... and {len(results['errors']) - 5} more")
+            if len(aggregate.errors) > 5:
+                print(f"  ... and {len(aggregate.errors) - 5} more")
         
-        return 0 if results['failed'] == 0 else 1
+        return 0 if aggregate.failed == 0 else 1
     
     else:
         parser.print_help()
@@ -6,12 +6,12 @@ Interactive web interface for extracting metadata from CELLAR tree XML notices.
 """
 
 import streamlit as st
-import json
 import re
 from pathlib import Path
 from datetime import datetime
 import time
-from cellar_metadata_extractor import CellarXMLParser
+from cellar_metadata_extractor import CellarXMLParser, ExtractionAggregator
+from cellar_corpus_inventory import CorpusInventory
 
 # Helper functions for filtering
 def extract_type_and_year_from_path(xml_path):
@@ -89,15 +89,8 @@ if 'errors' not in st.session_state:
     st.session_state.errors = []
 if 'start_time' not in st.session_state:
     st.session_state.start_time = None
-if 'stats_aggregate' not in st.session_state:
-    st.session_state.stats_aggregate = {
-        'total_languages': 0,
-        'total_cases': 0,
-        'total_eurovoc': 0,
-        'total_articles': 0,
-        'total_relations': 0,
-        'total_implementations': 0
-    }
+if 'aggregate' not in st.session_state:
+    st.session_state.aggregate = ExtractionAggregator()
 
 # Title and description
 st.title("📊 CELLAR Metadata Extractor")
@@ -152,7 +145,19 @@ config_file = st.sidebar.text_input(
 # Scan for available documents and extract filters
 root_path = Path(root_dir)
 if root_path.exists():
-    all_xml_files = list(root_path.rglob('cellar_tree_notice.xml'))
+    # Keep the inventory and its plan across reruns. The corpus is only rescanned
+    # for a new root directory, on Rescan and when an extraction starts; rescans
+    # only list directories whose mtime changed
+    if 'inventory' not in st.session_state or st.session_state.inventory.root != root_path:
+        st.session_state.inventory = CorpusInventory(root_path)
+        st.session_state.work_plan = None
+    if st.sidebar.button("🔄 Rescan", disabled=st.session_state.processing,
+                         help="Scan the root directory again for new and changed notices"):
+        st.session_state.work_plan = None
+    if st.session_state.get('work_plan') is None:
+        st.session_state.work_plan = st.session_state.inventory.plan()
+    work_plan = st.session_state.work_plan
+    all_xml_files = [entry.xml_path for entry in work_plan.notices]
     available_types, available_years = extract_filters_from_paths(all_xml_files)
     
     st.sidebar.markdown("---")
@@ -207,6 +212,7 @@ if root_path.exists():
     else:
         st.sidebar.markdown(f"**🔍 No filters applied**")
 else:
+    work_plan = None
     all_xml_files = []
     filtered_xml_files = []
     available_types = []
@@ -243,14 +249,9 @@ with tab1:
             st.session_state.recent_docs = []
             st.session_state.errors = []
             st.session_state.start_time = datetime.now()
-            st.session_state.stats_aggregate = {
-                'total_languages': 0,
-                'total_cases': 0,
-                'total_eurovoc': 0,
-                'total_articles': 0,
-                'total_relations': 0,
-                'total_implementations': 0
-            }
+            st.session_state.aggregate = ExtractionAggregator()
+            # Plan the run on a fresh scan (Resume keeps the plan of the run)
+            st.session_state.work_plan = None
             st.rerun()
     
     with col2:
@@ -313,37 +314,23 @@ with tab1:
                 if celex_pattern:
                     celex_match = celex_pattern.group(1)
                 
-                if celex_match:
-                    output_path = xml_path.parent / f"{celex_match}_metadata.json"
-                    if skip_existing and output_path.exists():
-                        st.session_state.skipped += 1
-                        st.session_state.processed += 1
-                        continue
+                if skip_existing and work_plan.status(xml_path) == 'skip':
+                    st.session_state.skipped += 1
+                    st.session_state.aggregate.skip()
+                    st.session_state.processed += 1
+                    continue
                 
                 # Process document
-                success, out_path, error = parser.process_document(xml_path, celex_match)
+                result = parser.process_document(xml_path, celex_match)
                 
                 st.session_state.processed += 1
                 
-                if success:
+                # Aggregate the stats returned with the result (no need to re-read the JSON)
+                st.session_state.aggregate.add(result)
+                
+                if result.success:
                     st.session_state.success += 1
                     
-                    # Load the JSON to get stats
-                    try:
-                        with open(out_path, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                            stats = metadata.get('stats', {})
-                            
-                            # Aggregate stats
-                            st.session_state.stats_aggregate['total_languages'] += stats.get('languages', 0)
-                            st.session_state.stats_aggregate['total_cases'] += stats.get('cases', 0)
-                            st.session_state.stats_aggregate['total_eurovoc'] += stats.get('eurovoc', 0)
-                            st.session_state.stats_aggregate['total_articles'] += stats.get('articles', 0)
-                            st.session_state.stats_aggregate['total_relations'] += stats.get('relations', 0)
-                            st.session_state.stats_aggregate['total_implementations'] += stats.get('implementations', 0)
-                    except:
-                        pass
-                    
                     # Add to recent docs
                     st.session_state.recent_docs.insert(0, {
                         'name': folder_name,
@@ -355,7 +342,7 @@ with tab1:
                     st.session_state.failed += 1
                     st.session_state.errors.append({
                         'name': folder_name,
-                        'error': error
+                        'error': result.error
                     })
                     
                     st.session_state.recent_docs.insert(0, {
@@ -437,15 +424,15 @@ with tab2:
     if st.session_state.success > 0:
         col1, col2, col3 = st.columns(3)
         
-        col1.metric("🌍 Total Languages", st.session_state.stats_aggregate['total_languages'])
-        col2.metric("⚖️ Total Case Law", st.session_state.stats_aggregate['total_cases'])
-        col3.metric("🏷️ Total Eurovoc", st.session_state.stats_aggregate['total_eurovoc'])
+        col1.metric("🌍 Total Languages", st.session_state.aggregate.totals['languages'])
+        col2.metric("⚖️ Total Case Law", st.session_state.aggregate.totals['cases'])
+        col3.metric("🏷️ Total Eurovoc", st.session_state.aggregate.totals['eurovoc'])
         
         col1, col2, col3 = st.columns(3)
         
-        col1.metric("📋 Total Articles", st.session_state.stats_aggregate['total_articles'])
-        col2.metric("🔗 Total Relations", st.session_state.stats_aggregate['total_relations'])
-        col3.metric("🌐 Total Implementations", st.session_state.stats_aggregate['total_implementations'])
+        col1.metric("📋 Total Articles", st.session_state.aggregate.totals['articles'])
+        col2.metric("🔗 Total Relations", st.session_state.aggregate.totals['relations'])
+        col3.metric("🌐 Total Implementations", st.session_state.aggregate.totals['implementations'])
         
         # Averages
         st.markdown("---")
@@ -453,9 +440,9 @@ with tab2:
         
         col1, col2, col3 = st.columns(3)
         
-        avg_langs = st.session_state.stats_aggregate['total_languages'] / st.session_state.success if st.session_state.success > 0 else 0
-        avg_cases = st.session_state.stats_aggregate['total_cases'] / st.session_state.success if st.session_state.success > 0 else 0
-        avg_eurovoc = st.session_state.stats_aggregate['total_eurovoc'] / st.session_state.success if st.session_state.success > 0 else 0
+        avg_langs = st.session_state.aggregate.average('languages')
+        avg_cases = st.session_state.aggregate.average('cases')
+        avg_eurovoc = st.session_state.aggregate.average('eurovoc')
         
         col1.metric("Avg Languages", f"{avg_langs:.1f}")
         col2.metric("Avg Case Law", f"{avg_cases:.1f}")
@@ -463,9 +450,9 @@ with tab2:
         
         col1, col2, col3 = st.columns(3)
         
-        avg_articles = st.session_state.stats_aggregate['total_articles'] / st.session_state.success if st.session_state.success > 0 else 0
-        avg_relations = st.session_state.stats_aggregate['total_relations'] / st.session_state.success if st.session_state.success > 0 else 0
-        avg_impl = st.session_state.stats_aggregate['total_implementations'] / st.session_state.success if st.session_state.success > 0 else 0
+        avg_articles = st.session_state.aggregate.average('articles')
+        avg_relations = st.session_state.aggregate.average('relations')
+        avg_impl = st.session_state.aggregate.average('implementations')
         
         col1.metric("Avg Articles", f"{avg_articles:.1f}")
         col2.metric("Avg Relations", f"{avg_relations:.1f}")
@@ -489,7 +476,7 @@ with tab3:
     
     st.code('''
 {
-  "extraction_timestamp": "2025-11-07T00:06:32.643066",
+  "content_hash": "5a58119fc6d930409cb34e54cf982285594fd8f350b761f384be7691944d5f4a",
   "selected_language": "eng",
   "available_languages": ["eng", "fra", "deu", ...],
   "document": {
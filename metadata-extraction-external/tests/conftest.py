@@ -0,0 +1,69 @@
+"""Shared fixtures: a small corpus of synthetic notices (cellar_extractor_benchmark.generate_notice)"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cellar_extractor_benchmark import generate_notice
+
+CONFIG_PATH = ROOT / 'cellar_xpath_config.json'
+
+# Folder CELEX -> generate_notice arguments
+NOTICES = {
+    '32016R0679': dict(languages=4, caselaw=5, embedded_works=1, eurovoc=5, seed=0),
+    '32016R0680': dict(languages=6, caselaw=12, embedded_works=2, eurovoc=8, seed=1, amendments=2,
+                       implementations=3),
+    '32016R0681': dict(languages=3, caselaw=30, embedded_works=3, eurovoc=4, seed=2, manifestation_items=6),
+    '32016R0682': dict(languages=2, caselaw=8, embedded_works=1, eurovoc=3, seed=3),
+}
+
+# Appended to the main WORK of 32016R0682: relations of an embedded WORK nested
+# in relations of the same tag
+NESTED_RELATIONS = {
+    '32016R0682': (
+        '<RESOURCE_LEGAL_INTERPRETED_BY_CASE-LAW>'
+        '<SAMEAS><URI><IDENTIFIER>62020CJ0001</IDENTIFIER><TYPE>celex</TYPE></URI></SAMEAS>'
+        '<EMBEDDED_NOTICE><WORK>'
+        '<RESOURCE_LEGAL_INTERPRETED_BY_CASE-LAW>'
+        '<SAMEAS><URI><IDENTIFIER>62020CJ0002</IDENTIFIER><TYPE>celex</TYPE></URI></SAMEAS>'
+        '</RESOURCE_LEGAL_INTERPRETED_BY_CASE-LAW>'
+        '<RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+        '<SAMEAS><URI><IDENTIFIER>32010R0002</IDENTIFIER><TYPE>celex</TYPE></URI></SAMEAS>'
+        '</RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+        '</WORK></EMBEDDED_NOTICE>'
+        '</RESOURCE_LEGAL_INTERPRETED_BY_CASE-LAW>'
+        '<RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+        '<SAMEAS><URI><IDENTIFIER>32010R0001</IDENTIFIER><TYPE>celex</TYPE></URI></SAMEAS>'
+        '<EMBEDDED_NOTICE><WORK>'
+        '<RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+        '<SAMEAS><URI><IDENTIFIER>32010R0003</IDENTIFIER><TYPE>celex</TYPE></URI></SAMEAS>'
+        '</RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+        '</WORK></EMBEDDED_NOTICE>'
+        '</RESOURCE_LEGAL_AMENDS_RESOURCE_LEGAL>'
+    )
+}
+
+
+def notice_xml(celex):
+    """The synthetic notice of a NOTICES entry"""
+    xml = generate_notice(**NOTICES[celex])
+    if celex in NESTED_RELATIONS:
+        # The main WORK is the last one to end
+        end = xml.rindex('</WORK>')
+        xml = xml[:end] + NESTED_RELATIONS[celex] + xml[end:]
+    return xml
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Root folder with one CELEX folder (and cellar_tree_notice.xml) per entry of NOTICES"""
+    root = tmp_path / 'corpus'
+    for celex in NOTICES:
+        folder = root / celex
+        folder.mkdir(parents=True)
+        (folder / 'cellar_tree_notice.xml').write_text(notice_xml(celex), encoding='utf-8')
+    return root
@@ -0,0 +1,67 @@
+"""--schema compact: CompactSchema.compact/expand round trip and its stats"""
+
+import copy
+
+import pytest
+
+from cellar_metadata_extractor import CellarXMLParser, CompactSchema
+
+from conftest import CONFIG_PATH, NOTICES
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return CellarXMLParser(str(CONFIG_PATH))
+
+
+def extract(parser, corpus, celex):
+    celex, metadata = parser.extract_document(corpus / celex / 'cellar_tree_notice.xml')
+    return metadata
+
+
+def with_duplicates(metadata):
+    """Copy of a full-schema document with a repeated case, relation and Eurovoc concept"""
+    metadata = copy.deepcopy(metadata)
+    document = metadata['document']
+    document['caselaw'].append(copy.deepcopy(document['caselaw'][0]))
+    document['legalRelations']['cites'].append('32016R0679')
+    document['legalRelations']['cites'].append('32016R0679')
+    document['eurovoc']['concepts'].append(copy.deepcopy(document['eurovoc']['concepts'][0]))
+    metadata['stats'] = CellarXMLParser.calculate_stats(document)
+    return metadata
+
+
+@pytest.mark.parametrize('celex', sorted(NOTICES))
+def test_expand_gives_back_the_full_document(parser, corpus, celex):
+    metadata = extract(parser, corpus, celex)
+    compact = CompactSchema.compact(metadata)
+    assert compact['schema'] == CompactSchema.NAME
+    expanded = CompactSchema.expand(compact)
+    assert CompactSchema.compact(expanded) == compact
+    
+    # Only the articles of a case repeat in these notices; they come back deduplicated
+    sections = {section: data for section, data in metadata['document'].items() if section != 'caselaw'}
+    assert {section: data for section, data in expanded['document'].items() if section != 'caselaw'} == sections
+    assert [(case['celexId'], CompactSchema.unique(case['articles'])) for case in metadata['document']['caselaw']] == \
+        [(case['celexId'], case['articles']) for case in expanded['document']['caselaw']]
+    assert expanded['available_languages'] == metadata['available_languages']
+
+
+@pytest.mark.parametrize('celex', sorted(NOTICES))
+def test_stats_count_the_deduplicated_document(parser, corpus, celex):
+    metadata = with_duplicates(extract(parser, corpus, celex))
+    compact = CompactSchema.compact(metadata)
+    document = compact['document']
+    relations = document['legalRelations']
+    stats = compact['stats']
+    
+    assert stats['cases'] == len(document['caselaw']) == len(metadata['document']['caselaw']) - 1
+    assert stats['relations'] == sum(len(relations.get(key, []))
+                                     for key in CompactSchema.SECTION_DEFAULTS['legalRelations'])
+    assert stats['eurovoc'] == sum(len(items) for items in document['eurovoc'].values())
+    assert stats['eurovoc'] == metadata['stats']['eurovoc'] - 1
+
+    # Expanding keeps the counts of the deduplicated document
+    expanded = CompactSchema.expand(compact)
+    assert expanded['stats'] == CellarXMLParser.calculate_stats(expanded['document'])
+    assert CompactSchema.compact(expanded) == compact
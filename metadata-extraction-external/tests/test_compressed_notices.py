@@ -0,0 +1,60 @@
+"""Compressed notices (.xml.gz / .xml.zst) read like plain ones"""
+
+import gzip
+import json
+
+import pytest
+
+import cellar_metadata_extractor
+from cellar_metadata_extractor import CellarXMLParser, FailureQuarantine, open_notice
+
+from conftest import CONFIG_PATH
+
+zstandard = pytest.importorskip('zstandard')
+
+
+def compress_in_frames(data, frame_size=4096):
+    """zstd stream with one frame per frame_size bytes, as written by streaming compressors"""
+    compressor = zstandard.ZstdCompressor()
+    return b''.join(compressor.compress(data[i:i + frame_size]) for i in range(0, len(data), frame_size))
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.zst'])
+def test_compressed_notice_reads_whole(corpus, suffix):
+    notice = corpus / '32016R0680' / 'cellar_tree_notice.xml'
+    data = notice.read_bytes()
+    compressed = notice.with_name(notice.name + suffix)
+    compressed.write_bytes(gzip.compress(data) if suffix == '.gz' else compress_in_frames(data))
+    with open_notice(compressed) as f:
+        assert f.read() == data
+    with open_notice(compressed, compressed.read_bytes()) as f:
+        assert f.read() == data
+
+
+def test_compressed_notice_extracts_like_plain(corpus, tmp_path):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    notice = corpus / '32016R0681' / 'cellar_tree_notice.xml'
+    compressed = notice.with_name(notice.name + '.zst')
+    compressed.write_bytes(compress_in_frames(notice.read_bytes()))
+    
+    plain = parser.process_document(notice, output_dir=tmp_path / 'plain')
+    packed = parser.process_document(compressed, output_dir=tmp_path / 'packed')
+    assert plain.success and packed.success, packed.error
+    load = lambda path: {key: value for key, value in json.loads(path.read_text(encoding='utf-8')).items()
+                         if key != 'extraction_timestamp'}
+    assert load(packed.output) == load(plain.output)
+
+
+def test_missing_zstandard_stops_the_batch(corpus, tmp_path, monkeypatch):
+    notice = corpus / '32016R0679' / 'cellar_tree_notice.xml'
+    notice.with_name(notice.name + '.zst').write_bytes(compress_in_frames(notice.read_bytes()))
+    notice.unlink()
+    monkeypatch.setattr(cellar_metadata_extractor, 'zstandard', None)
+    
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    with pytest.raises(ImportError):
+        parser.process_batch(corpus, quarantine=tmp_path / 'quarantine.sqlite')
+    # A single document fails, but is not quarantined as broken
+    result = parser.process_document(corpus / '32016R0679' / 'cellar_tree_notice.xml.zst')
+    assert not result.success
+    assert result.error_type in FailureQuarantine.TRANSIENT
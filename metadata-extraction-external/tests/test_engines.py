@@ -0,0 +1,77 @@
+"""The tree, stream and xslt engines against the output of the original extractor
+
+tests/baseline holds the output of the original (pre-engine) extractor for
+every notice of conftest.NOTICES, without its extraction_timestamp. That
+extractor deduplicated basedOn and repeals through a set, so both are
+compared sorted.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from cellar_extractor_benchmark import generate_notice
+from cellar_metadata_extractor import ENGINES
+
+from conftest import CONFIG_PATH, NOTICES
+
+BASELINE = Path(__file__).resolve().parent / 'baseline'
+
+
+def comparable(data):
+    """Output without the keys the baseline lacks, basedOn and repeals sorted"""
+    data = {key: value for key, value in data.items() if key not in ('content_hash', 'extraction_timestamp')}
+    relations = data['document']['legalRelations']
+    for key in ('basedOn', 'repeals'):
+        relations[key] = sorted(relations[key])
+    return data
+
+
+@pytest.fixture(scope='module', params=sorted(ENGINES))
+def parser(request):
+    return ENGINES[request.param](str(CONFIG_PATH))
+
+
+@pytest.mark.parametrize('celex', sorted(NOTICES))
+def test_engine_matches_baseline(parser, corpus, tmp_path, celex):
+    success, output_path, error = parser.process_document(corpus / celex / 'cellar_tree_notice.xml',
+                                                          output_dir=tmp_path / 'output')
+    assert success, error
+    expected = json.loads((BASELINE / f'{celex}_metadata.json').read_text(encoding='utf-8'))
+    assert comparable(json.loads(output_path.read_text(encoding='utf-8'))) == expected
+
+
+def test_language_pruning_keeps_english(parser, tmp_path):
+    # BUL..FRA: the English EXPRESSION gives the primary title
+    notice = tmp_path / '32016R0690' / 'cellar_tree_notice.xml'
+    notice.parent.mkdir()
+    notice.write_text(generate_notice(languages=9, caselaw=3, embedded_works=1, eurovoc=3, seed=4), encoding='utf-8')
+    
+    outputs = []
+    for languages in (None, ['fra', 'deu']):
+        parser.select_languages(languages)
+        try:
+            success, output_path, error = parser.process_document(notice, output_dir=tmp_path / str(len(outputs)))
+        finally:
+            parser.select_languages(None)
+        assert success, error
+        outputs.append(json.loads(output_path.read_text(encoding='utf-8'))['document'])
+    full, pruned = outputs
+    assert pruned['title']['primary'] == full['title']['primary']
+    assert sorted(pruned['title']['multilingual']) == ['deu', 'eng', 'fra']
+
+
+@pytest.mark.parametrize('celex', sorted(NOTICES))
+def test_language_pruning_keeps_primary_title(parser, corpus, tmp_path, celex):
+    parser.select_languages(['fra', 'deu'])
+    try:
+        success, output_path, error = parser.process_document(corpus / celex / 'cellar_tree_notice.xml',
+                                                              output_dir=tmp_path / 'output')
+    finally:
+        parser.select_languages(None)
+    assert success, error
+    expected = json.loads((BASELINE / f'{celex}_metadata.json').read_text(encoding='utf-8'))
+    document = json.loads(output_path.read_text(encoding='utf-8'))['document']
+    assert document['title']['primary'] == expected['document']['title']['primary']
+    assert document['languages'] == expected['document']['languages']
@@ -0,0 +1,62 @@
+"""ExtractionCache: what a batch re-extracts and what it skips"""
+
+from cellar_metadata_extractor import CellarXMLParser, JsonlCorpusWriter
+
+from conftest import CONFIG_PATH, NOTICES
+
+
+def run(corpus, cache, **kwargs):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    select_schema = kwargs.pop('schema', None)
+    if select_schema:
+        parser.select_schema(select_schema)
+    return parser.process_batch(corpus, cache=cache, **kwargs)
+
+
+def test_unchanged_notices_are_skipped(corpus, tmp_path):
+    cache = tmp_path / 'cache.sqlite'
+    assert run(corpus, cache)['success'] == len(NOTICES)
+    summary = run(corpus, cache)
+    assert (summary['success'], summary['skipped']) == (0, len(NOTICES))
+
+
+def test_changed_notice_is_reextracted(corpus, tmp_path):
+    cache = tmp_path / 'cache.sqlite'
+    run(corpus, cache)
+    notice = corpus / '32016R0680' / 'cellar_tree_notice.xml'
+    notice.write_text(notice.read_text(encoding='utf-8').replace('2016-04-27', '2016-04-28'), encoding='utf-8')
+    summary = run(corpus, cache)
+    assert (summary['success'], summary['skipped']) == (1, len(NOTICES) - 1)
+
+
+def test_config_change_reextracts(corpus, tmp_path):
+    cache = tmp_path / 'cache.sqlite'
+    run(corpus, cache)
+    summary = run(corpus, cache, schema='compact')
+    assert (summary['success'], summary['skipped']) == (len(NOTICES), 0)
+
+
+def test_output_format_change_reextracts(corpus, tmp_path):
+    cache = tmp_path / 'cache.sqlite'
+    corpus_file = tmp_path / 'corpus.jsonl'
+    run(corpus, cache)
+    summary = run(corpus, cache, output_format='jsonl', output_file=corpus_file)
+    assert summary['success'] == len(NOTICES)
+    assert set(JsonlCorpusWriter.load_index(corpus_file)) == set(NOTICES)
+    
+    summary = run(corpus, cache, output_format='jsonl', output_file=corpus_file)
+    assert (summary['success'], summary['skipped']) == (0, len(NOTICES))
+    summary = run(corpus, cache, output_format='sqlite', output_file=tmp_path / 'corpus.sqlite')
+    assert summary['success'] == len(NOTICES)
+
+
+def test_new_corpus_file_reextracts(corpus, tmp_path):
+    cache = tmp_path / 'cache.sqlite'
+    corpus_file = tmp_path / 'corpus.jsonl'
+    run(corpus, cache, output_format='jsonl', output_file=corpus_file)
+    assert run(corpus, cache, output_format='jsonl', output_file=tmp_path / 'other.jsonl')['success'] == len(NOTICES)
+    
+    corpus_file.unlink()
+    JsonlCorpusWriter.index_file(corpus_file).unlink()
+    assert run(corpus, cache, output_format='jsonl', output_file=corpus_file)['success'] == len(NOTICES)
+    assert set(JsonlCorpusWriter.load_index(corpus_file)) == set(NOTICES)
@@ -0,0 +1,79 @@
+"""JSONL corpus output: every CELEX read back through the offset index"""
+
+import json
+
+import pytest
+
+from cellar_metadata_extractor import CellarXMLParser, JsonlCorpusWriter, content_hash, zstandard
+
+from conftest import CONFIG_PATH, NOTICES
+
+SUFFIXES = ['.jsonl', pytest.param('.jsonl.zst', marks=pytest.mark.skipif(zstandard is None, reason='zstandard'))]
+
+
+def expected_documents(corpus):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    return {celex: parser.extract_document(corpus / celex / 'cellar_tree_notice.xml')[1] for celex in NOTICES}
+
+
+def without_hash(data):
+    return {key: value for key, value in data.items() if key != 'content_hash'}
+
+
+@pytest.mark.parametrize('suffix', SUFFIXES)
+@pytest.mark.parametrize('workers', [1, 2])
+def test_index_reads_back_every_document(corpus, tmp_path, suffix, workers):
+    output_file = tmp_path / f'corpus{suffix}'
+    summary = CellarXMLParser(str(CONFIG_PATH)).process_batch(
+        corpus, workers=workers, output_format='jsonl', output_file=output_file
+    )
+    assert summary['success'] == len(NOTICES)
+    
+    index = JsonlCorpusWriter.load_index(output_file)
+    assert sorted(index) == sorted(NOTICES)
+    # The entries tile the file in write order
+    spans = sorted(index.values())
+    assert spans[0][0] == 0
+    assert all(offset + length == following for (offset, length), (following, _) in zip(spans, spans[1:]))
+    assert sum(spans[-1]) == output_file.stat().st_size
+    
+    for celex, expected in expected_documents(corpus).items():
+        document = JsonlCorpusWriter.read_document(output_file, celex, index)
+        assert content_hash(document) == document['content_hash']
+        assert without_hash(document) == expected
+    assert JsonlCorpusWriter.read_document(output_file, '32099R9999', index) is None
+
+
+def test_plain_lines_match_the_index(corpus, tmp_path):
+    output_file = tmp_path / 'corpus.jsonl'
+    CellarXMLParser(str(CONFIG_PATH)).process_batch(corpus, output_format='jsonl', output_file=output_file)
+    index = JsonlCorpusWriter.load_index(output_file)
+    by_offset = {offset: (celex, length) for celex, (offset, length) in index.items()}
+    expected = expected_documents(corpus)
+    
+    # Each line is one document, at the offset and length its index entry gives
+    offset = 0
+    with open(output_file, 'rb') as f:
+        for line in f:
+            celex, length = by_offset.pop(offset)
+            assert length == len(line)
+            assert without_hash(json.loads(line)) == expected[celex]
+            offset += len(line)
+    assert not by_offset
+
+
+def test_appended_document_replaces_the_indexed_one(corpus, tmp_path):
+    output_file = tmp_path / 'corpus.jsonl'
+    cache = tmp_path / 'cache.sqlite'
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    parser.process_batch(corpus, cache=cache, output_format='jsonl', output_file=output_file)
+    notice = corpus / '32016R0680' / 'cellar_tree_notice.xml'
+    notice.write_text(notice.read_text(encoding='utf-8').replace('2016-04-27', '2016-04-28'), encoding='utf-8')
+    assert parser.process_batch(corpus, cache=cache, output_format='jsonl', output_file=output_file)['success'] == 1
+    
+    # The changed document is appended; the index resolves to its latest line
+    assert len(JsonlCorpusWriter.index_file(output_file).read_text(encoding='utf-8').splitlines()) == len(NOTICES) + 1
+    index = JsonlCorpusWriter.load_index(output_file)
+    assert sorted(index) == sorted(NOTICES)
+    document = JsonlCorpusWriter.read_document(output_file, '32016R0680', index)
+    assert document['document']['dates']['document'] == '2016-04-28'
@@ -0,0 +1,47 @@
+"""Per-document JSON outputs: content_hash, unchanged outputs and atomic writes"""
+
+import json
+import os
+
+from cellar_metadata_extractor import CellarXMLParser, content_hash
+
+from conftest import CONFIG_PATH, NOTICES
+
+
+def test_content_hash_leaves_out_the_extraction_time(corpus):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    success, output_path, error = parser.process_document(corpus / '32016R0679' / 'cellar_tree_notice.xml')
+    assert success, error
+    with open(output_path, 'rb') as f:
+        head = f.read(128)
+    data = json.loads(output_path.read_text(encoding='utf-8'))
+    assert b'"content_hash"' in head
+    assert data['extraction_timestamp']
+    assert content_hash(data) == data['content_hash']
+    assert content_hash(dict(data, extraction_timestamp='2000-01-01T00:00:00')) == data['content_hash']
+
+
+def test_unchanged_outputs_are_not_rewritten(corpus):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    assert parser.process_batch(corpus, skip_existing=False)['success'] == len(NOTICES)
+    outputs = sorted(corpus.rglob('*_metadata.json'))
+    before = {path: (path.stat().st_ino, path.read_bytes()) for path in outputs}
+    
+    # Outputs older than their notices are extracted again, to the same content
+    for path in outputs:
+        notice = path.parent / 'cellar_tree_notice.xml'
+        os.utime(path, ns=(path.stat().st_atime_ns, notice.stat().st_mtime_ns - 10 ** 9))
+    summary = parser.process_batch(corpus)
+    assert (summary['success'], summary['unchanged']) == (len(NOTICES), len(NOTICES))
+    assert {path: (path.stat().st_ino, path.read_bytes()) for path in outputs} == before
+    
+    # ...and their refreshed mtime makes the next run skip them
+    assert parser.process_batch(corpus)['skipped'] == len(NOTICES)
+
+
+def test_writes_leave_no_side_files(corpus):
+    parser = CellarXMLParser(str(CONFIG_PATH))
+    parser.process_batch(corpus, skip_existing=False, fsync_batch=2)
+    for folder in corpus.iterdir():
+        assert sorted(path.name for path in folder.iterdir()) == [
+            f'{folder.name}_metadata.json', 'cellar_tree_notice.xml']